@@ -1,2 +1,2 @@
 export { CORS_BASE_ALLOWED_HEADERS, CORS_METHODS } from "./http-constants"
-export { QUEUE_NAME, PIPELINE_TASK_NAME, QUEUE_ORIGIN } from "./queue-constants"
+export { BULK_QUEUE_NAME, LANE_QUEUE_MAX_PRIORITY, PIPELINE_TASK_NAME, QUEUE_NAME, QUEUE_ORIGIN, SMALL_QUEUE_NAME } from "./queue-constants"
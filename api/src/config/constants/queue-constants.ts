@@ -1,3 +1,6 @@
 export const QUEUE_NAME = "profiling.jobs"
+export const SMALL_QUEUE_NAME = "profiling.jobs.small"
+export const BULK_QUEUE_NAME = "profiling.jobs.bulk"
+export const LANE_QUEUE_MAX_PRIORITY = 9
 export const PIPELINE_TASK_NAME = "pipeline.process_session"
 export const QUEUE_ORIGIN = "elysia@api"
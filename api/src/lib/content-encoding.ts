@@ -0,0 +1,23 @@
+const textDecoder = new TextDecoder();
+
+/**
+ * Decode a JSON request body sent with `Content-Encoding: gzip` or `zstd`.
+ *
+ * Returns `undefined` for identity-encoded requests so Elysia falls back to
+ * its default body parser. Unsupported encodings throw.
+ */
+export async function parseEncodedJson(request: Request) {
+	const encoding = request.headers.get("content-encoding")?.trim().toLowerCase();
+	if (!encoding || encoding === "identity")
+		return undefined;
+
+	const data = new Uint8Array(await request.arrayBuffer());
+	switch (encoding) {
+		case "gzip":
+			return JSON.parse(textDecoder.decode(Bun.gunzipSync(data)));
+		case "zstd":
+			return JSON.parse(textDecoder.decode(Bun.zstdDecompressSync(data)));
+		default:
+			throw new Error(`Unsupported content encoding: ${encoding}`);
+	}
+}
@@ -1,16 +1,28 @@
 /**
  * RabbitMQ publisher for dispatching pipeline jobs.
  *
- * Publishes Celery-compatible task messages to the profiling.jobs queue.
- * Uses amqplib with a persistent connection and channel.
+ * Publishes Celery-compatible task messages to the profiling.jobs queue, or,
+ * when size-aware lanes are enabled, to profiling.jobs.small or
+ * profiling.jobs.bulk. Uses amqplib with a persistent connection and channel.
  */
 
 import { randomUUIDv7 } from "bun";
 import amqplib, { type Connection, type ChannelModel, type Channel } from "amqplib";
-import { QUEUE_NAME, PIPELINE_TASK_NAME, QUEUE_ORIGIN } from "~/config/constants";
+import {
+	BULK_QUEUE_NAME,
+	LANE_QUEUE_MAX_PRIORITY,
+	PIPELINE_TASK_NAME,
+	QUEUE_NAME,
+	QUEUE_ORIGIN,
+	SMALL_QUEUE_NAME,
+} from "~/config/constants";
 import { apiEnv } from "~/config/env";
 
 const url = apiEnv.queue.brokerUrl;
+const lanesEnabled = apiEnv.queue.smallLaneMaxFiles > 0;
+
+// Must match the queue arguments the worker declares in celeryconfig.py
+const LANE_QUEUE_OPTIONS = { durable: true, arguments: { "x-max-priority": LANE_QUEUE_MAX_PRIORITY } };
 
 export let channel: Channel | null = null;
 export let connection: Connection | null = null;
@@ -31,6 +43,10 @@ async function getChannel() {
 	connection = channelModel.connection;
 
 	await channel.assertQueue(QUEUE_NAME, { durable: true });
+	if (lanesEnabled) {
+		await channel.assertQueue(SMALL_QUEUE_NAME, LANE_QUEUE_OPTIONS);
+		await channel.assertQueue(BULK_QUEUE_NAME, LANE_QUEUE_OPTIONS);
+	}
 
 	connection.on("error", (err) => {
 		resetConnectionState();
@@ -55,9 +71,36 @@ export type PipelineJobPayload = {
 	}[];
 };
 
-async function publishCeleryTask({ taskName, args }: {
+export type PipelineJobRoute = {
+	queue: string;
+	priority?: number;
+};
+
+/**
+ * Pick the queue lane for a session by file count and total upload size.
+ *
+ * Sessions within both small-lane limits go to profiling.jobs.small, the rest
+ * to profiling.jobs.bulk. Within a lane, sessions with fewer files get a higher
+ * message priority, so a 5-file session isn't queued behind a 200-file one.
+ * With lanes disabled every session goes to profiling.jobs.
+ */
+export function selectPipelineQueue({ fileCount, totalBytes }: {
+	fileCount: number;
+	totalBytes: number;
+}): PipelineJobRoute {
+	if (!lanesEnabled)
+		return { queue: QUEUE_NAME };
+
+	const small = fileCount <= apiEnv.queue.smallLaneMaxFiles && totalBytes <= apiEnv.queue.smallLaneMaxBytes;
+	const priority = Math.max(0, LANE_QUEUE_MAX_PRIORITY - Math.floor(Math.log2(Math.max(1, fileCount))));
+
+	return { queue: small ? SMALL_QUEUE_NAME : BULK_QUEUE_NAME, priority };
+}
+
+async function publishCeleryTask({ taskName, args, route }: {
 	taskName: string;
 	args: unknown[];
+	route: PipelineJobRoute;
 }) {
 	const ch = await getChannel();
 	const taskId = randomUUIDv7();
@@ -74,10 +117,11 @@ async function publishCeleryTask({ taskName, args }: {
 	]);
 
 	const sent = ch.sendToQueue(
-		QUEUE_NAME,
+		route.queue,
 		Buffer.from(body),
 		{
 			persistent: true,
+			priority: route.priority,
 			contentType: "application/json",
 			contentEncoding: "utf-8",
 			correlationId: taskId,
@@ -98,6 +142,8 @@ async function publishCeleryTask({ taskName, args }: {
 				argsrepr: null,
 				kwargsrepr: null,
 				origin: QUEUE_ORIGIN,
+				// Not part of Celery's protocol; the worker reads it to measure queue wait
+				published_at: Date.now() / 1000,
 			},
 		},
 	);
@@ -112,12 +158,14 @@ async function publishCeleryTask({ taskName, args }: {
  * Publish a pipeline job to the RabbitMQ queue in Celery-compatible format.
  *
  * The message follows Celery's wire protocol so that a Python Celery worker
- * can consume it directly without any adapter.
+ * can consume it directly without any adapter. `totalBytes` is the summed size
+ * of the session's files and only affects lane selection.
  */
-export async function publishPipelineJob(payload: PipelineJobPayload) {
+export async function publishPipelineJob(payload: PipelineJobPayload, { totalBytes = 0 }: { totalBytes?: number } = {}) {
 	return publishCeleryTask({
 		taskName: PIPELINE_TASK_NAME,
 		args: [payload],
+		route: selectPipelineQueue({ fileCount: payload.files.length, totalBytes }),
 	});
 }
 
@@ -1,4 +1,4 @@
-import { and, asc, eq } from "drizzle-orm"
+import { and, asc, eq, sql } from "drizzle-orm"
 
 import * as schema from "@resumemo/core/schemas"
 
@@ -115,6 +115,30 @@ function setSessionResultsCaches(
 	repositoryCache.set(sessionRepositoryCacheKeys.resultsData(sessionId, "desc", activeRunId), descResults)
 }
 
+function invalidateSessionResultsCaches(sessionId: string, activeRunId: string, results: CandidateResultRow[]) {
+	repositoryCache.delete(sessionRepositoryCacheKeys.resultsData(sessionId, "asc", activeRunId))
+	repositoryCache.delete(sessionRepositoryCacheKeys.resultsData(sessionId, "desc", activeRunId))
+	for (const result of results)
+		repositoryCache.delete(sessionRepositoryCacheKeys.result(sessionId, result.id, activeRunId))
+}
+
+function toCandidateResultValues(sessionId: string, runId: string, results: SessionResultUpsertInput[]) {
+	return results.map(result => ({
+		sessionId,
+		runId,
+		fileId: result.file_id,
+		candidateName: result.candidate_name,
+		candidateEmail: result.candidate_email,
+		candidatePhone: result.candidate_phone,
+		rawText: result.raw_text,
+		parsedProfile: result.parsed_profile,
+		overallScore: String(result.overall_score),
+		scoreBreakdown: result.score_breakdown,
+		summary: result.summary,
+		skillsMatched: result.skills_matched,
+	}))
+}
+
 function primeSessionCaches(payload: {
 	session: SessionListItem
 	files: SessionFileView[]
@@ -146,6 +170,10 @@ function patchSessionState(payload: {
 		current => patchSessionListEntry(current, payload.session),
 	)
 
+	// Leave the results caches alone when the caller did not load the full result set
+	if (payload.results === undefined)
+		return
+
 	setSessionResultsCaches(
 		payload.session.id,
 		payload.session.activeRunId,
@@ -624,4 +652,76 @@ export const sessionRepository = {
 
 		return true
 	},
+
+	/**
+	 * Insert or overwrite results for a run without deleting the run's other rows.
+	 *
+	 * Used for incremental pipeline delivery: `partial` callbacks upsert each
+	 * batch, and the final callback upserts the remainder and sets `finalStatus`.
+	 * Replaying a batch overwrites the same (run, file) rows.
+	 */
+	async upsertRunResults(params: {
+		sessionId: string
+		runId: string
+		results: SessionResultUpsertInput[]
+		finalStatus?: { status: "completed" } | { status: "failed", error: string }
+	}) {
+		let session: SessionListItem | null = null
+		let upsertedResults: CandidateResultRow[] = []
+
+		try {
+			await db.transaction(async (tx) => {
+				const [updatedSessions, upserted] = await Promise.all([
+					params.finalStatus
+						? tx.update(schema.profilingSession)
+							.set(params.finalStatus.status === "completed"
+								? { status: "completed", errorMessage: null, lastCompletedAt: new Date() }
+								: { status: "failed", errorMessage: params.finalStatus.error, lastCompletedAt: null })
+							.where(
+								and(
+									eq(schema.profilingSession.id, params.sessionId),
+									eq(schema.profilingSession.activeRunId, params.runId),
+								),
+							)
+							.returning()
+						: [],
+					params.results.length > 0
+						? tx.insert(schema.candidateResult)
+							.values(toCandidateResultValues(params.sessionId, params.runId, params.results))
+							.onConflictDoUpdate({
+								target: [schema.candidateResult.runId, schema.candidateResult.fileId],
+								set: {
+									candidateName: sql`excluded.candidate_name`,
+									candidateEmail: sql`excluded.candidate_email`,
+									candidatePhone: sql`excluded.candidate_phone`,
+									rawText: sql`excluded.raw_text`,
+									parsedProfile: sql`excluded.parsed_profile`,
+									overallScore: sql`excluded.overall_score`,
+									scoreBreakdown: sql`excluded.score_breakdown`,
+									summary: sql`excluded.summary`,
+									skillsMatched: sql`excluded.skills_matched`,
+								},
+							})
+							.returning()
+						: [],
+				])
+
+				session = updatedSessions[0] ?? null
+				upsertedResults = upserted
+			})
+		}
+		catch {
+			return false
+		}
+
+		if (params.finalStatus && !session)
+			return false
+
+		invalidateSessionResultsCaches(params.sessionId, params.runId, upsertedResults)
+
+		if (session)
+			patchSessionState({ session, files: await getSessionFilesData(params.sessionId) })
+
+		return true
+	},
 }
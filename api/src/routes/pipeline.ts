@@ -3,10 +3,13 @@
  *
  * Receives completion and error callbacks from the Celery worker.
  * Authenticated by shared secret (PIPELINE_CALLBACK_SECRET), not user auth.
+ * Bodies may be gzip or zstd encoded (worker CALLBACK_CONTENT_ENCODING).
  */
 
 import { Elysia } from "elysia"
 
+import { parseEncodedJson } from "~/lib/content-encoding"
+
 import {
 	getPipelineSecretHeader,
 	pipelineCallbackBodySchema,
@@ -29,5 +32,8 @@ export const pipelineCallbackRoutes = new Elysia({ prefix: "/api/internal/pipeli
 
 			return result.data
 		},
-		{ body: pipelineCallbackBodySchema },
+		{
+			parse: ({ request }) => parseEncodedJson(request),
+			body: pipelineCallbackBodySchema,
+		},
 	)
@@ -13,12 +13,22 @@ export const pipelineResultSchema = t.Object({
 	skills_matched: t.Array(t.String()),
 })
 
+export const pipelinePartialBodySchema = t.Object({
+	type: t.Literal("partial"),
+	session_id: t.String(),
+	run_id: t.String(),
+	batch: t.Number(),
+	results: t.Array(pipelineResultSchema),
+})
+
+// total_results is set when earlier partial callbacks already delivered part of the run
 export const pipelineCompletionBodySchema = t.Object({
 	type: t.Literal("completion"),
 	session_id: t.String(),
 	run_id: t.String(),
 	status: t.Literal("completed"),
 	results: t.Array(pipelineResultSchema),
+	total_results: t.Optional(t.Nullable(t.Number())),
 })
 
 export const pipelineErrorBodySchema = t.Object({
@@ -28,9 +38,11 @@ export const pipelineErrorBodySchema = t.Object({
 	status: t.Literal("failed"),
 	error: t.String(),
 	partial_results: t.Array(pipelineResultSchema),
+	total_results: t.Optional(t.Nullable(t.Number())),
 })
 
 export const pipelineCallbackBodySchema = t.Union([
+	pipelinePartialBodySchema,
 	pipelineCompletionBodySchema,
 	pipelineErrorBodySchema,
 ])
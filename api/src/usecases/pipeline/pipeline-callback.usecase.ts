@@ -16,6 +16,48 @@ function hasValidSecret(secretHeader?: string | null) {
 	return secretHeader === PIPELINE_CALLBACK_SECRET
 }
 
+function applyCallback(body: PipelineCallbackBody) {
+	if (body.type === "partial") {
+		return sessionRepository.upsertRunResults({
+			sessionId: body.session_id,
+			runId: body.run_id,
+			results: body.results,
+		})
+	}
+
+	// Earlier partial callbacks already stored part of the run, so keep those rows
+	const incremental = body.total_results !== undefined && body.total_results !== null
+
+	if (body.type === "completion") {
+		return incremental
+			? sessionRepository.upsertRunResults({
+				sessionId: body.session_id,
+				runId: body.run_id,
+				results: body.results,
+				finalStatus: { status: "completed" },
+			})
+			: sessionRepository.replaceRunResultsAndSetCompleted({
+				sessionId: body.session_id,
+				runId: body.run_id,
+				results: body.results,
+			})
+	}
+
+	return incremental
+		? sessionRepository.upsertRunResults({
+			sessionId: body.session_id,
+			runId: body.run_id,
+			results: body.partial_results,
+			finalStatus: { status: "failed", error: body.error },
+		})
+		: sessionRepository.replaceRunResultsAndSetFailed({
+			sessionId: body.session_id,
+			runId: body.run_id,
+			error: body.error,
+			partialResults: body.partial_results,
+		})
+}
+
 export async function pipelineCallbackUsecase(input: {
 	body: PipelineCallbackBody
 	secretHeader?: string | null
@@ -38,18 +80,7 @@ export async function pipelineCallbackUsecase(input: {
 	if (!session.activeRunId || session.activeRunId !== input.body.run_id)
 		return usecaseSuccess({ status: "ok", skipped: true })
 
-	const handled = input.body.type === "completion"
-		? await sessionRepository.replaceRunResultsAndSetCompleted({
-			sessionId: input.body.session_id,
-			runId: input.body.run_id,
-			results: input.body.results,
-		})
-		: await sessionRepository.replaceRunResultsAndSetFailed({
-			sessionId: input.body.session_id,
-			runId: input.body.run_id,
-			error: input.body.error,
-			partialResults: input.body.partial_results,
-		})
+	const handled = await applyCallback(input.body)
 
 	if (!handled)
 		return usecaseSuccess({ status: "ok", skipped: true })
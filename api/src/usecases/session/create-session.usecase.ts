@@ -80,6 +80,8 @@ export async function createSessionUsecase(input: {
 					storage_key: file.storageKey,
 					original_name: file.originalName,
 				})),
+			}, {
+				totalBytes: created.files.reduce((sum, file) => sum + Number(file.size), 0),
 			})
 		}
 		catch {
@@ -55,6 +55,8 @@ export async function retrySessionUsecase(input: {
 		})
 	}
 
+	const totalBytes = currentFiles.reduce((sum, file) => sum + file.size, 0)
+
 	const reusableFailures = await verifyUploads(currentFiles.map(file => ({
 		storageKey: file.storageKey,
 		fileName: file.originalName,
@@ -110,7 +112,7 @@ export async function retrySessionUsecase(input: {
 							storage_key: file.storageKey,
 							original_name: file.originalName,
 						})),
-					})
+					}, { totalBytes })
 				}
 				catch {
 					await sessionRepository.updateSessionFailure(existingSession.id, RETRY_SESSION_FAILED_MESSAGE)
@@ -171,7 +173,7 @@ export async function retrySessionUsecase(input: {
 							storage_key: file.storageKey,
 							original_name: file.originalName,
 						})),
-					})
+					}, { totalBytes })
 				}
 				catch {
 					await sessionRepository.updateSessionFailure(targetSessionId, RETRY_CLONE_FAILED_MESSAGE)
@@ -227,7 +229,7 @@ export async function retrySessionUsecase(input: {
 							storage_key: file.storageKey,
 							original_name: file.originalName,
 						})),
-					})
+					}, { totalBytes })
 				}
 				catch {
 					await sessionRepository.updateSessionFailure(existingSession.id, RETRY_SESSION_FAILED_MESSAGE)
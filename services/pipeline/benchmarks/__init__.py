@@ -0,0 +1,6 @@
+"""Stage-level micro-benchmarks over a synthetic resume corpus.
+
+    python -m benchmarks.run <results.json> [repeat]
+    python -m benchmarks.compare <baseline.json> <results.json> [threshold]
+    python -m benchmarks.corpus <output_dir> [per_size_class]
+"""
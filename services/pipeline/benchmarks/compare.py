@@ -0,0 +1,85 @@
+"""Compare benchmark results with a stored baseline and flag regressions.
+
+    python -m benchmarks.compare <baseline.json> <results.json> [threshold]
+
+A case regresses when its median is more than `threshold` (default 0.15,
+for 15%) slower than the baseline's and at least NOISE_FLOOR_MS slower in
+absolute terms. Exits with status 1 when any case regresses, so CI can gate
+on it. Runs on different models, settings, or hardware are still compared,
+but with a warning, since their numbers do not mean the same thing.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+DEFAULT_THRESHOLD = 0.15
+# Timer and scheduling jitter on sub-millisecond cases; smaller changes are never reported
+NOISE_FLOOR_MS = 0.05
+
+
+def compare(baseline: dict, results: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Return one row per case in either document, with its change and a status."""
+    rows = []
+    for name in sorted(baseline["cases"].keys() | results["cases"].keys()):
+        before = baseline["cases"].get(name)
+        after = results["cases"].get(name)
+        if before is None or after is None:
+            rows.append({"case": name, "status": "added" if before is None else "removed"})
+            continue
+
+        base_ms, current_ms = before["median_ms"], after["median_ms"]
+        change = (current_ms - base_ms) / base_ms if base_ms > 0 else 0.0
+        if change > threshold and current_ms - base_ms >= NOISE_FLOOR_MS:
+            status = "regressed"
+        elif change < -threshold and base_ms - current_ms >= NOISE_FLOOR_MS:
+            status = "improved"
+        else:
+            status = "unchanged"
+        rows.append(
+            {"case": name, "baseline_ms": base_ms, "current_ms": current_ms, "change": change, "status": status}
+        )
+    return rows
+
+
+def mismatches(baseline: dict, results: dict) -> list[str]:
+    """Name the settings and environment fields that differ between two runs."""
+    differing = []
+    for section in ("config", "environment"):
+        before, after = baseline.get(section, {}), results.get(section, {})
+        for key in sorted(before.keys() | after.keys()):
+            if key != "repeat" and before.get(key) != after.get(key):
+                differing.append(f"{section}.{key}: {before.get(key)!r} -> {after.get(key)!r}")
+    return differing
+
+
+def _format_row(row: dict) -> str:
+    if "change" not in row:
+        return f"{row['case']:<45} {'':>12} {'':>12} {'':>8}  {row['status']}"
+    return (
+        f"{row['case']:<45} {row['baseline_ms']:>12.4f} {row['current_ms']:>12.4f} "
+        f"{row['change']:>+8.1%}  {row['status']}"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+
+    baseline = json.loads(Path(sys.argv[1]).read_text())
+    results = json.loads(Path(sys.argv[2]).read_text())
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_THRESHOLD
+
+    for difference in mismatches(baseline, results):
+        print(f"warning: runs differ in {difference}", file=sys.stderr)
+
+    rows = compare(baseline, results, threshold)
+    print(f"{'case':<45} {'baseline ms':>12} {'current ms':>12} {'change':>8}  status")
+    for row in rows:
+        print(_format_row(row))
+
+    regressed = [row["case"] for row in rows if row["status"] == "regressed"]
+    print(json.dumps({"threshold": threshold, "regressed": regressed}))
+    sys.exit(1 if regressed else 0)
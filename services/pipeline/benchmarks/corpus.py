@@ -0,0 +1,216 @@
+"""Deterministic synthetic resumes in TXT, DOCX, and PDF across size classes.
+
+Resumes follow the layout the parse stage expects (contact header, summary,
+experience with date ranges and bullets, education, skills) and draw skills
+from the real taxonomy, so every stage does representative work. The same
+seed and size class always produce the same text.
+
+Write a corpus to disk, for example to feed `python -m utils.idf_table`, with:
+    python -m benchmarks.corpus <output_dir> [per_size_class]
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import random
+import sys
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+
+from utils.skill_matcher import SKILLS_TAXONOMY_PATH
+
+FORMATS = ("txt", "docx", "pdf")
+SECTION_HEADINGS = frozenset({"Summary", "Experience", "Projects", "Education", "Publications", "Skills"})
+
+
+@dataclass(frozen=True)
+class SizeClass:
+    jobs: int
+    bullets: int
+    projects: int
+    publications: int
+
+
+SIZE_CLASSES: dict[str, SizeClass] = {
+    "small": SizeClass(jobs=2, bullets=3, projects=0, publications=0),
+    "medium": SizeClass(jobs=5, bullets=5, projects=2, publications=0),
+    "large": SizeClass(jobs=12, bullets=7, projects=5, publications=10),
+    "xlarge": SizeClass(jobs=30, bullets=8, projects=10, publications=60),
+}
+
+FIRST_NAMES = ["Jane", "John", "Ana", "Wei", "Priya", "Omar", "Sofia", "Liam", "Chen", "Amara", "Mateo", "Yuki"]
+LAST_NAMES = ["Doe", "Smith", "Lopez", "Zhang", "Patel", "Haddad", "Rossi", "Murphy", "Okafor", "Silva", "Tanaka"]
+COMPANIES = [
+    "Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises",
+    "Hooli", "Pied Piper", "Vandelay Industries", "Cyberdyne Systems", "Soylent Foods", "Tyrell Corporation",
+]
+TITLES = [
+    "Software Engineer", "Senior Software Engineer", "Backend Engineer", "Data Engineer",
+    "Machine Learning Engineer", "Staff Engineer", "Engineering Manager", "DevOps Engineer",
+    "Full Stack Developer", "Site Reliability Engineer",
+]
+CITIES = ["Austin, TX", "Seattle, WA", "New York, NY", "London, UK", "Berlin, Germany", "Toronto, Canada"]
+UNIVERSITIES = ["University of Texas", "Stanford University", "University of Toronto", "Imperial College London"]
+DEGREES = ["BS Computer Science", "MS Computer Science", "BEng Software Engineering", "PhD Computer Science"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+ACTIONS = [
+    "Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Scaled", "Maintained", "Launched", "Refactored",
+]
+OBJECTS = [
+    "a payments API serving 2M requests per day",
+    "the event ingestion pipeline",
+    "internal developer tooling",
+    "a recommendation service",
+    "the CI/CD platform",
+    "customer-facing dashboards",
+    "a multi-region storage layer",
+    "the search indexing jobs",
+]
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Backend Engineer with 5+ years of experience building distributed systems. "
+    "You will design APIs in Python and Go, run services on Kubernetes and AWS, and own PostgreSQL and Redis "
+    "data stores. Experience with Docker, Terraform, Kafka, and CI/CD pipelines is expected; familiarity "
+    "with machine learning infrastructure is a plus."
+)
+
+
+def _skills() -> list[str]:
+    return json.loads(Path(SKILLS_TAXONOMY_PATH).read_text(encoding="utf-8"))
+
+
+def generate_resume(seed: int, size_class: str = "medium") -> str:
+    """Return the plain text of one synthetic resume."""
+    size = SIZE_CLASSES[size_class]
+    rng = random.Random(f"{size_class}:{seed}")
+    skills = _skills()
+
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    phone = f"+1 555-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}"
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | {phone} | {rng.choice(CITIES)}",
+        f"linkedin.com/in/{first.lower()}{last.lower()}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {size.jobs + 2} years of experience in "
+        f"{', '.join(rng.sample(skills, 4))} and {rng.choice(skills)}.",
+        "",
+        "Experience",
+    ]
+
+    year = 2025
+    for _ in range(size.jobs):
+        start = year - rng.randint(1, 3)
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}")
+        end = f"{rng.choice(MONTHS)} {year}" if year < 2025 else "Present"
+        lines.append(f"{rng.choice(MONTHS)} {start} - {end}")
+        for _ in range(size.bullets):
+            used = rng.sample(skills, 2)
+            lines.append(f"• {rng.choice(ACTIONS)} {rng.choice(OBJECTS)} using {used[0]} and {used[1]}")
+        lines.append("")
+        year = start
+
+    if size.projects:
+        lines.append("Projects")
+        for index in range(size.projects):
+            stars = rng.randrange(50, 5000)
+            lines.append(f"• Project {index + 1}: open-source {rng.choice(skills)} library with {stars} stars")
+        lines.append("")
+
+    lines.append("Education")
+    lines.append(f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)}, {year - rng.randint(0, 2)}")
+    lines.append("")
+
+    if size.publications:
+        lines.append("Publications")
+        for index in range(size.publications):
+            lines.append(
+                f"{last}, {first[0]}. et al. ({2024 - index % 20}). Scaling {rng.choice(skills)} for "
+                f"{rng.choice(OBJECTS)}. Proceedings of SysConf {index + 1}."
+            )
+        lines.append("")
+
+    lines.append("Skills")
+    lines.append(", ".join(rng.sample(skills, min(len(skills), 8 + 2 * size.jobs))))
+    return "\n".join(lines)
+
+
+def render(text: str, file_format: str) -> bytes:
+    """Encode resume text as a TXT, DOCX, or PDF file."""
+    if file_format == "txt":
+        return text.encode("utf-8")
+    if file_format == "docx":
+        return _render_docx(text)
+    if file_format == "pdf":
+        return _render_pdf(text)
+    raise ValueError(f"Unknown format {file_format!r}, expected one of {FORMATS}")
+
+
+def _render_docx(text: str) -> bytes:
+    """Lay the resume out the way editors do: contact lines in the header, headings, bullets, and a skills table."""
+    from docx import Document
+
+    lines = text.split("\n")
+    document = Document()
+    header = document.sections[0].header.paragraphs[0]
+    header.text = lines[1]
+
+    skills_index = len(lines) - 2
+    for index, line in enumerate(lines):
+        if index == 1 or index >= skills_index:
+            continue
+        if index == 0:
+            document.add_heading(line, level=0)
+        elif line in SECTION_HEADINGS:
+            document.add_heading(line, level=1)
+        elif line.startswith("• "):
+            document.add_paragraph(line[2:], style="List Bullet")
+        elif line:
+            document.add_paragraph(line)
+
+    document.add_heading(lines[skills_index], level=1)
+    skills = lines[-1].split(", ")
+    table = document.add_table(rows=(len(skills) + 3) // 4, cols=4)
+    for index, skill in enumerate(skills):
+        table.cell(index // 4, index % 4).text = skill
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_pdf(text: str) -> bytes:
+    import pymupdf
+
+    wrapped: list[str] = []
+    for line in text.split("\n"):
+        wrapped.extend(textwrap.wrap(line, width=95) or [""])
+
+    document = pymupdf.open()
+    lines_per_page = 60
+    for start in range(0, len(wrapped), lines_per_page):
+        page = document.new_page()
+        page.insert_text((50, 60), "\n".join(wrapped[start:start + lines_per_page]), fontsize=10)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    output_dir = Path(sys.argv[1])
+    per_size_class = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for size_class in SIZE_CLASSES:
+        for seed in range(per_size_class):
+            text = generate_resume(seed, size_class)
+            for file_format in FORMATS:
+                (output_dir / f"{size_class}-{seed}.{file_format}").write_bytes(render(text, file_format))
+                written += 1
+    print(json.dumps({"files": written, "output_dir": str(output_dir)}))
@@ -0,0 +1,212 @@
+"""Time each pipeline stage function on the synthetic corpus and write the results as JSON.
+
+    python -m benchmarks.run <results.json> [repeat] [auto|real|stub]
+
+The last argument picks the models (see `benchmarks.stubs.install_models`);
+`auto`, the default, uses the real ones where they load. Every case calls one
+function on RESUMES_PER_SIZE_CLASS resumes of a size class, `repeat` times
+each. Calls shorter than MIN_SAMPLE_SECONDS are looped and averaged, so
+microsecond functions are not lost in timer noise.
+"""
+
+from __future__ import annotations
+
+import os
+
+# Repeated calls on one text would otherwise be answered from the embedding cache
+os.environ["EMBEDDING_CACHE_DIR"] = ""
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.corpus import FORMATS, JOB_DESCRIPTION, SIZE_CLASSES, generate_resume, render
+from benchmarks.stubs import install_models
+from config import LEXICAL_MODE, SEMANTIC_BACKEND, SPACY_PARSE_MODE
+
+RESUMES_PER_SIZE_CLASS = 3
+DEFAULT_REPEAT = 10
+MIN_SAMPLE_SECONDS = 0.01
+MAX_LOOPS = 1000
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    function: Callable
+    calls: list[tuple]
+
+
+def build_cases() -> list[Case]:
+    """Prepare every case's inputs, running the earlier stages once to get later stages' inputs."""
+    from stages.extract import extract_text
+    from stages.parse import parse_resume
+    from stages.score import (
+        _score_experience_fit,
+        _score_semantic_similarity,
+        _score_skill_match,
+        _score_text_similarity,
+        build_job_context,
+        score_resume,
+    )
+    from stages.summarize import summarize_candidate
+
+    job = build_job_context(JOB_DESCRIPTION)
+    cases: list[Case] = []
+
+    for size_class in SIZE_CLASSES:
+        texts = [generate_resume(seed, size_class) for seed in range(RESUMES_PER_SIZE_CLASS)]
+        profiles = [parse_resume(text) for text in texts]
+        similarities = [(_score_text_similarity(text, job), _score_semantic_similarity(text, job)) for text in texts]
+        scorings = [
+            score_resume(text, profile, job, lexical_sim, semantic_sim)
+            for text, profile, (lexical_sim, semantic_sim) in zip(texts, profiles, similarities)
+        ]
+
+        for file_format in FORMATS:
+            files = [(render(text, file_format), f"resume.{file_format}") for text in texts]
+            cases.append(Case(f"extract_text/{file_format}/{size_class}", extract_text, files))
+
+        cases += [
+            Case(f"parse_resume/{size_class}", parse_resume, [(text,) for text in texts]),
+            Case(f"_score_text_similarity/{size_class}", _score_text_similarity, [(text, job) for text in texts]),
+            Case(
+                f"_score_semantic_similarity/{size_class}",
+                _score_semantic_similarity,
+                [(text, job) for text in texts],
+            ),
+            Case(
+                f"_score_skill_match/{size_class}",
+                _score_skill_match,
+                [(profile.skills, job.required_skills) for profile in profiles],
+            ),
+            Case(
+                f"_score_experience_fit/{size_class}",
+                _score_experience_fit,
+                [(profile.total_experience_years, job.required_years) for profile in profiles],
+            ),
+            # With the similarities precomputed, as the worker calls it after the batched passes
+            Case(
+                f"score_resume/{size_class}",
+                score_resume,
+                [
+                    (text, profile, job, lexical_sim, semantic_sim)
+                    for text, profile, (lexical_sim, semantic_sim) in zip(texts, profiles, similarities)
+                ],
+            ),
+            Case(
+                f"summarize_candidate/{size_class}",
+                summarize_candidate,
+                [(profile, scoring) for profile, scoring in zip(profiles, scorings)],
+            ),
+        ]
+
+    return cases
+
+
+def calibrate(case: Case) -> int:
+    """Warm a case up and return how many calls make one sample of at least MIN_SAMPLE_SECONDS."""
+    for args in case.calls:
+        case.function(*args)
+
+    started = time.perf_counter()
+    case.function(*case.calls[0])
+    single = time.perf_counter() - started
+    return max(1, min(MAX_LOOPS, int(MIN_SAMPLE_SECONDS / max(single, 1e-9))))
+
+
+def sample(case: Case, loops: int) -> list[float]:
+    """Time one pass over a case's calls, returning milliseconds per call."""
+    samples = []
+    for args in case.calls:
+        started = time.perf_counter()
+        for _ in range(loops):
+            case.function(*args)
+        samples.append((time.perf_counter() - started) / loops * 1000)
+    return samples
+
+
+def summarize(samples: list[float], loops: int) -> dict:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 6),
+        "mean_ms": round(statistics.fmean(samples), 6),
+        "min_ms": round(samples[0], 6),
+        "p90_ms": round(samples[min(len(samples) - 1, int(0.9 * len(samples)))], 6),
+        "stdev_ms": round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+        "samples": len(samples),
+        "loops": loops,
+    }
+
+
+def run(repeat: int = DEFAULT_REPEAT, models: str = "auto") -> dict:
+    """Run every case and return the results document.
+
+    Cases are sampled round-robin, one pass over each per round, so a slow
+    spell on the machine spreads over every case instead of skewing one.
+    """
+    used_models = install_models(models)
+    cases = build_cases()
+    loops = {case.name: calibrate(case) for case in cases}
+    samples: dict[str, list[float]] = {case.name: [] for case in cases}
+
+    # As in timeit, collection pauses would land on whichever call happens to trigger them
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for case in cases:
+                samples[case.name] += sample(case, loops[case.name])
+            gc.collect()
+    finally:
+        gc.enable()
+
+    results = {}
+    for case in cases:
+        results[case.name] = summarize(samples[case.name], loops[case.name])
+        print(f"{case.name:<45} {results[case.name]['median_ms']:>12.4f} ms", file=sys.stderr)
+
+    return {
+        "created_at": time.time(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "models": used_models,
+            "spacy_parse_mode": SPACY_PARSE_MODE,
+            "lexical_mode": LEXICAL_MODE,
+            "semantic_backend": SEMANTIC_BACKEND,
+            "resumes_per_size_class": RESUMES_PER_SIZE_CLASS,
+            "repeat": repeat,
+        },
+        "cases": results,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    started = time.perf_counter()
+    document = run(
+        repeat=int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REPEAT,
+        models=sys.argv[3] if len(sys.argv) > 3 else "auto",
+    )
+    output = Path(sys.argv[1])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2) + "\n")
+    print(json.dumps({
+        "cases": len(document["cases"]),
+        "models": document["config"]["models"],
+        "output": str(output),
+        "seconds": round(time.perf_counter() - started, 1),
+    }))
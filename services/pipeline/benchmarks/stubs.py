@@ -0,0 +1,93 @@
+"""Stand-in spaCy and sentence-transformer models for machines without the real weights.
+
+The stubs keep the code paths of the parse and score stages intact but not
+the model cost, so stub timings are only comparable with other stub runs.
+`benchmarks.run` records which models each run used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+
+import numpy as np
+
+from benchmarks.corpus import CITIES, COMPANIES, FIRST_NAMES, LAST_NAMES, UNIVERSITIES
+from config import SEMANTIC_MODEL_NAME, SPACY_MODEL
+
+logger = logging.getLogger(__name__)
+
+MODEL_CHOICES = ("auto", "real", "stub")
+STUB_EMBEDDING_DIM = 384
+
+
+class StubSentenceEncoder:
+    """Hashed bag-of-words encoder with the `SentenceTransformer.encode` signature."""
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        embeddings = np.zeros((len(texts), STUB_EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+                embeddings[row, int.from_bytes(digest, "little") % STUB_EMBEDDING_DIM] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.where(norms == 0, 1.0, norms)
+        return embeddings
+
+
+def build_stub_nlp():
+    """Return a blank English pipeline whose entity ruler knows the corpus's people, employers, and places."""
+    import spacy
+
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [{"label": "PERSON", "pattern": f"{first} {last}"} for first in FIRST_NAMES for last in LAST_NAMES]
+        + [{"label": "ORG", "pattern": name} for name in (*COMPANIES, *UNIVERSITIES)]
+        + [{"label": "GPE", "pattern": city.split(",")[0]} for city in CITIES]
+    )
+    return nlp
+
+
+def install_models(choice: str = "auto") -> dict[str, str]:
+    """Load the real models or put stubs in their place, returning which was used for each.
+
+    `auto` falls back to a stub for any model that fails to load; `real`
+    raises instead, and `stub` never tries the real weights.
+    """
+    import stages.parse as parse
+    import stages.score as score
+
+    if choice not in MODEL_CHOICES:
+        raise ValueError(f"Unknown model choice {choice!r}, expected one of {MODEL_CHOICES}")
+
+    used: dict[str, str] = {}
+    for name, load, real_name in (
+        ("spacy", parse._get_nlp, SPACY_MODEL),
+        ("semantic", score._get_semantic_model, SEMANTIC_MODEL_NAME),
+    ):
+        if choice == "stub":
+            continue
+        try:
+            load()
+            used[name] = real_name
+        except Exception as error:
+            if choice == "real":
+                raise
+            logger.warning("Model unavailable, benchmarking with a stub", extra={"model": name, "error": str(error)})
+
+    if "spacy" not in used:
+        parse._nlp = build_stub_nlp()
+        used["spacy"] = "stub"
+    if "semantic" not in used:
+        score._semantic_model = StubSentenceEncoder()
+        score._semantic_backend = "stub"
+        used["semantic"] = "stub"
+    return used
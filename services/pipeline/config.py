@@ -14,8 +14,60 @@ SCORING_WEIGHT_SEMANTIC_SIMILARITY = float(os.environ.get("SCORING_WEIGHT_SEMANT
 
 TFIDF_MAX_FEATURES = 5000
 TFIDF_NGRAM_RANGE = (1, 2)
+LEXICAL_MODE = os.environ.get("LEXICAL_MODE", "session").lower()
+LEXICAL_IDF_DIR = os.environ.get("LEXICAL_IDF_DIR", "")
+LEXICAL_HASH_FEATURES = int(os.environ.get("LEXICAL_HASH_FEATURES", str(2 ** 20)))
 SEMANTIC_MAX_CHARS = int(os.environ.get("SEMANTIC_MAX_CHARS", "15000"))
+SEMANTIC_BATCH_SIZE = int(os.environ.get("SEMANTIC_BATCH_SIZE", "16"))
 SEMANTIC_MODEL_NAME = os.environ.get("SEMANTIC_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_MODEL_DIR = os.environ.get("SEMANTIC_MODEL_DIR", "")
+SEMANTIC_BACKEND = os.environ.get("SEMANTIC_BACKEND", "torch").lower()
+SEMANTIC_ONNX_FILE = os.environ.get("SEMANTIC_ONNX_FILE", "")
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", "")
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
 CALLBACK_RETRY_ATTEMPTS = 3
 CALLBACK_RETRY_BACKOFF = [2, 5, 15]
+CALLBACK_TIMEOUT_SECONDS = float(os.environ.get("CALLBACK_TIMEOUT_SECONDS", "30"))
+CALLBACK_CONTENT_ENCODING = os.environ.get("CALLBACK_CONTENT_ENCODING", "").lower()
+CALLBACK_COMPRESS_MIN_BYTES = int(os.environ.get("CALLBACK_COMPRESS_MIN_BYTES", "1024"))
+CALLBACK_PARTIAL_BATCH_SIZE = int(os.environ.get("CALLBACK_PARTIAL_BATCH_SIZE", "0"))
+CALLBACK_PARTIAL_INTERVAL_SECONDS = float(os.environ.get("CALLBACK_PARTIAL_INTERVAL_SECONDS", "30"))
+CALLBACK_OUTBOX_DIR = os.environ.get("CALLBACK_OUTBOX_DIR", "")
+CALLBACK_OUTBOX_MAX_BACKOFF_SECONDS = float(os.environ.get("CALLBACK_OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+CALLBACK_OUTBOX_MAX_AGE_SECONDS = float(os.environ.get("CALLBACK_OUTBOX_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "200000"))
+PDF_TIME_BUDGET_SECONDS = float(os.environ.get("PDF_TIME_BUDGET_SECONDS", "20"))
+PDF_SLOW_PAGE_SECONDS = float(os.environ.get("PDF_SLOW_PAGE_SECONDS", "0.5"))
+PDF_ISOLATION = os.environ.get("PDF_ISOLATION", "suspect").lower()
+PDF_ISOLATION_MIN_BYTES = int(os.environ.get("PDF_ISOLATION_MIN_BYTES", str(5 * 1024 * 1024)))
+STORAGE_PREFETCH_CONCURRENCY = int(os.environ.get("STORAGE_PREFETCH_CONCURRENCY", "4"))
+STORAGE_PREFETCH_MAX_BYTES = int(os.environ.get("STORAGE_PREFETCH_MAX_BYTES", str(64 * 1024 * 1024)))
+DOCUMENT_CACHE_DIR = os.environ.get("DOCUMENT_CACHE_DIR", "")
+DOCUMENT_CACHE_MAX_BYTES = int(os.environ.get("DOCUMENT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+DOCUMENT_CACHE_ETAG_LOOKUP = os.environ.get("DOCUMENT_CACHE_ETAG_LOOKUP", "false").lower() in ("1", "true", "yes")
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "true").lower() in ("1", "true", "yes")
+WORKER_READY_FILE = os.environ.get("WORKER_READY_FILE", "")
+SESSION_PROCESS_WORKERS = int(os.environ.get("SESSION_PROCESS_WORKERS", "0"))
+SESSION_FANOUT_MIN_FILES = int(os.environ.get("SESSION_FANOUT_MIN_FILES", "0"))
+SESSION_FANOUT_CHUNK_SIZE = int(os.environ.get("SESSION_FANOUT_CHUNK_SIZE", "1"))
+FILE_TASK_SOFT_TIME_LIMIT_SECONDS = int(os.environ.get("FILE_TASK_SOFT_TIME_LIMIT_SECONDS", "120"))
+FILE_TASK_MAX_RETRIES = int(os.environ.get("FILE_TASK_MAX_RETRIES", "2"))
+CHECKPOINT_DIR = os.environ.get("CHECKPOINT_DIR", "")
+CHECKPOINT_MAX_AGE_SECONDS = float(os.environ.get("CHECKPOINT_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+RUN_LEASE_SECONDS = float(os.environ.get("RUN_LEASE_SECONDS", "60"))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+TRACE_DIR = os.environ.get("TRACE_DIR", "")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.environ.get("TRACE_BACKUP_COUNT", "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+PROFILE_EVERY_N = int(os.environ.get("PROFILE_EVERY_N", "0"))
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "cprofile").lower()
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
 SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_md")
+SPACY_BATCH_SIZE = int(os.environ.get("SPACY_BATCH_SIZE", "32"))
+SPACY_N_PROCESS = int(os.environ.get("SPACY_N_PROCESS", "1"))
+SPACY_PARSE_MODE = os.environ.get("SPACY_PARSE_MODE", "full").lower()
@@ -1,5 +1,7 @@
 """Pydantic models for pipeline input, output, and intermediate data."""
 from __future__ import annotations
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 class FileManifestItem(BaseModel):
@@ -53,6 +55,15 @@ class CandidateProfile(BaseModel):
 
 
 
+class ParsedDocument(BaseModel):
+    """A fetched, extracted, and parsed file awaiting scoring."""
+
+    file: FileManifestItem
+    raw_text: str
+    profile: CandidateProfile | None = None
+
+
+
 class SubScore(BaseModel):
     """A single scoring criterion result."""
 
@@ -89,3 +100,40 @@ class FileResult(BaseModel):
     score_breakdown: dict
     summary: str
     skills_matched: list[str] = Field(default_factory=list)
+
+
+class PartialCallback(BaseModel):
+    """Callback body carrying one batch of results before the session finishes."""
+
+    type: Literal["partial"] = "partial"
+    session_id: str
+    run_id: str
+    batch: int
+    results: list[FileResult]
+
+
+class CompletionCallback(BaseModel):
+    """Callback body reporting a finished session.
+
+    When earlier `partial` callbacks were delivered, `results` holds only the
+    remainder and `total_results` counts every result of the run.
+    """
+
+    type: Literal["completion"] = "completion"
+    session_id: str
+    run_id: str
+    status: Literal["completed"] = "completed"
+    results: list[FileResult]
+    total_results: int | None = None
+
+
+class ErrorCallback(BaseModel):
+    """Callback body reporting a failed session, with any results produced before the failure."""
+
+    type: Literal["error"] = "error"
+    session_id: str
+    run_id: str
+    status: Literal["failed"] = "failed"
+    error: str
+    partial_results: list[FileResult] = Field(default_factory=list)
+    total_results: int | None = None
@@ -1,11 +1,51 @@
 """Stage 1: Text extraction from PDF, DOCX, and TXT files."""
 from __future__ import annotations
 import logging
+import multiprocessing
+import re
+import time
+import zipfile
+from collections.abc import Iterator
 from io import BytesIO
 from pathlib import Path
+from xml.etree import ElementTree
+
+from config import (
+    PDF_ISOLATION,
+    PDF_ISOLATION_MIN_BYTES,
+    PDF_MAX_CHARS,
+    PDF_MAX_PAGES,
+    PDF_SLOW_PAGE_SECONDS,
+    PDF_TIME_BUDGET_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
+# Part of the document cache key; bump whenever a change alters extract_text output
+EXTRACTOR_VERSION = 4
+
+# Extra time an isolated extraction gets past its budget before it is killed
+PDF_KILL_GRACE_SECONDS = 2.0
+
+DOCX_HEADER_PART = re.compile(r"word/header(\d*)\.xml")
+DOCX_FOOTER_PART = re.compile(r"word/footer(\d*)\.xml")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = f"{_W}p"
+_W_R = f"{_W}r"
+_W_T = f"{_W}t"
+_W_TAB = f"{_W}tab"
+_W_PTAB = f"{_W}ptab"
+_W_BR = f"{_W}br"
+_W_CR = f"{_W}cr"
+_W_NO_BREAK_HYPHEN = f"{_W}noBreakHyphen"
+_W_TYPE = f"{_W}type"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+
+def extractor_fingerprint() -> str:
+    """Identify everything that can change extract output: the extractor version and the PDF limits."""
+    return f"extract-{EXTRACTOR_VERSION}:pdf-pages-{PDF_MAX_PAGES}:pdf-chars-{PDF_MAX_CHARS}"
+
 
 def extract_text(file_bytes: bytes, file_name: str):
     """Extract plain text from a file based on its filename extension.
@@ -40,24 +80,210 @@ def extract_text(file_bytes: bytes, file_name: str):
 
 
 def _extract_pdf(file_bytes: bytes):
-    """Extract text from a PDF using PyMuPDF."""
+    """Extract text from a PDF using PyMuPDF, within page, character, and time limits.
+
+    Suspect documents (files of at least PDF_ISOLATION_MIN_BYTES) run in a
+    child process that is killed if it overruns the time budget, keeping the
+    pages read so far. The page limit is enforced page by page in either case.
+    """
+    if _should_isolate_pdf(file_bytes):
+        return _extract_pdf_isolated(file_bytes)
+
+    deadline = time.monotonic() + PDF_TIME_BUDGET_SECONDS
+    return "\n".join(_iter_pdf_pages(file_bytes, deadline)).strip()
+
+
+def _iter_pdf_pages(file_bytes: bytes, deadline: float) -> Iterator[str]:
+    """Yield the text of each page until a page, character, or time limit is reached.
+
+    The time budget is checked between pages, so a single stuck page can only
+    be interrupted by running the extraction in a child process.
+    """
     import pymupdf
 
+    # Plain text only: no image blocks, and annotations are never part of page text
+    flags = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_IMAGES
     doc = pymupdf.open(stream=file_bytes, filetype="pdf")
-    pages = []
-    for page in doc:
-        pages.append(page.get_text())
-    doc.close()
+    try:
+        chars = 0
+        for page_number in range(doc.page_count):
+            if page_number >= PDF_MAX_PAGES:
+                logger.warning("PDF page limit reached", extra={"pages": doc.page_count, "max_pages": PDF_MAX_PAGES})
+                return
+            if time.monotonic() > deadline:
+                logger.warning("PDF time budget exhausted", extra={"pages_read": page_number, "pages": doc.page_count})
+                return
+
+            started = time.perf_counter()
+            text = doc[page_number].get_text("text", flags=flags)
+            elapsed = time.perf_counter() - started
+            if elapsed >= PDF_SLOW_PAGE_SECONDS:
+                logger.warning(
+                    "Slow PDF page",
+                    extra={"page": page_number, "seconds": round(elapsed, 3), "chars": len(text)},
+                )
+
+            if chars + len(text) > PDF_MAX_CHARS:
+                logger.warning("PDF character limit reached", extra={"pages_read": page_number + 1})
+                yield text[:PDF_MAX_CHARS - chars]
+                return
+            chars += len(text)
+            yield text
+    finally:
+        doc.close()
+
+
+def _should_isolate_pdf(file_bytes: bytes) -> bool:
+    """Decide from the mode and byte size alone; opening the PDF to look closer is what isolation guards against."""
+    if PDF_ISOLATION == "off":
+        return False
+    # Daemonic processes (such as SESSION_PROCESS_WORKERS pool workers) cannot start children
+    if multiprocessing.current_process().daemon:
+        return False
+    return PDF_ISOLATION == "always" or len(file_bytes) >= PDF_ISOLATION_MIN_BYTES
+
+
+def _extract_pdf_isolated(file_bytes: bytes) -> str:
+    """Run `_iter_pdf_pages` in a child process, streaming pages back and killing it past the budget."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_pdf_child, args=(sender, file_bytes, PDF_TIME_BUDGET_SECONDS), daemon=True)
+    process.start()
+    sender.close()
+
+    pages: list[str] = []
+    kill_at = time.monotonic() + PDF_TIME_BUDGET_SECONDS + PDF_KILL_GRACE_SECONDS
+    try:
+        while True:
+            remaining = kill_at - time.monotonic()
+            if remaining <= 0 or not receiver.poll(remaining):
+                logger.warning(
+                    "Killed PDF extraction past its time budget",
+                    extra={"pages_read": len(pages), "budget_seconds": PDF_TIME_BUDGET_SECONDS},
+                )
+                process.kill()
+                break
+
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                logger.warning("PDF extraction process exited early", extra={"pages_read": len(pages)})
+                break
+
+            if kind == "page":
+                pages.append(value)
+            elif kind == "error":
+                raise RuntimeError(value)
+            else:
+                break
+    finally:
+        receiver.close()
+        process.join(timeout=1)
+
     return "\n".join(pages).strip()
 
 
+def _pdf_child(sender, file_bytes: bytes, budget_seconds: float):
+    try:
+        for text in _iter_pdf_pages(file_bytes, time.monotonic() + budget_seconds):
+            sender.send(("page", text))
+        sender.send(("done", None))
+    except Exception as error:
+        sender.send(("error", str(error)))
+    finally:
+        sender.close()
+
+
 def _extract_docx(file_bytes: bytes):
-    """Extract text from a DOCX using python-docx."""
-    from docx import Document
+    """Extract text from a DOCX by streaming its WordprocessingML parts.
+
+    Paragraphs are read in document order from headers, the body, and footers,
+    including those inside tables and text boxes. Header and footer lines
+    repeated across sections are emitted once.
+    """
+    with zipfile.ZipFile(BytesIO(file_bytes)) as archive:
+        names = set(archive.namelist())
+        headers = _numbered_parts(names, DOCX_HEADER_PART)
+        footers = _numbered_parts(names, DOCX_FOOTER_PART)
+
+        lines: list[str] = []
+        repeated: set[str] = set()
+        for part in [*headers, "word/document.xml", *footers]:
+            if part not in names:
+                continue
+            is_body = part == "word/document.xml"
+            with archive.open(part) as stream:
+                for line in _iter_docx_paragraphs(stream):
+                    if not line.strip():
+                        continue
+                    if not is_body:
+                        if line in repeated:
+                            continue
+                        repeated.add(line)
+                    lines.append(line)
+
+    return "\n".join(lines)
+
+
+def _numbered_parts(names: set[str], pattern: re.Pattern[str]) -> list[str]:
+    """Return the part names matching `pattern` ordered by their number, so header2 comes before header10."""
+    matches = [match for match in map(pattern.fullmatch, names) if match]
+    return [match.string for match in sorted(matches, key=lambda match: int(match.group(1) or 0))]
+
+
+def _iter_docx_paragraphs(stream) -> Iterator[str]:
+    """Yield the text of each `w:p` in a part, matching python-docx's run text rules."""
+    paragraphs: list[list[str]] = []
+    run_depth = 0
+    fallback_depth = 0
+
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == _MC_FALLBACK:
+                fallback_depth += 1
+            elif fallback_depth:
+                continue
+            elif tag == _W_P:
+                paragraphs.append([])
+            elif tag == _W_R:
+                run_depth += 1
+            continue
+
+        if tag == _MC_FALLBACK:
+            # Fallback holds a legacy copy of the text box already read from mc:Choice
+            fallback_depth -= 1
+            element.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        if tag == _W_P:
+            text = "".join(paragraphs.pop())
+            element.clear()
+            yield text
+        elif tag == _W_R:
+            run_depth -= 1
+        elif run_depth and paragraphs:
+            piece = _docx_run_text(tag, element)
+            if piece:
+                paragraphs[-1].append(piece)
+
 
-    doc = Document(BytesIO(file_bytes))
-    paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-    return "\n".join(paragraphs)
+def _docx_run_text(tag: str, element) -> str:
+    if tag == _W_T:
+        return element.text or ""
+    if tag in (_W_TAB, _W_PTAB):
+        return "\t"
+    if tag == _W_CR:
+        return "\n"
+    if tag == _W_BR:
+        # Page and column breaks carry no text
+        return "\n" if element.get(_W_TYPE, "textWrapping") == "textWrapping" else ""
+    if tag == _W_NO_BREAK_HYPHEN:
+        return "-"
+    return ""
 
 
 def _extract_txt(file_bytes: bytes):
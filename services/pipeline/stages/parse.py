@@ -2,46 +2,57 @@
 
 from __future__ import annotations
 from datetime import datetime
-import json
 import logging
 import re
-from pathlib import Path
+import time
 
-import spacy
-
-from config import SPACY_MODEL
+from config import SPACY_BATCH_SIZE, SPACY_MODEL, SPACY_N_PROCESS, SPACY_PARSE_MODE
 from models import CandidateProfile, EducationEntry, WorkEntry
+from utils.skill_matcher import SkillHit, get_skill_matcher
+from utils.tracing import current_span
 
 
 logger = logging.getLogger(__name__)
 
 _nlp = None
-_skills_taxonomy: set[str] | None = None
-
-SKILLS_TAXONOMY_PATH = Path(__file__).parent.parent / "data" / "skills_taxonomy.json"
 
 
 def _get_nlp():
-    """Lazily load the spaCy model."""
+    """Lazily load the spaCy model, pruned to entity recognition in targeted mode."""
     global _nlp
     if _nlp is None:
+        import spacy
+
         _nlp = spacy.load(SPACY_MODEL)
+        if SPACY_PARSE_MODE == "targeted":
+            _prune_to_entity_components(_nlp)
     return _nlp
 
 
-def _get_skills_taxonomy():
-    """Lazily load the skills taxonomy."""
-    global _skills_taxonomy
-    if _skills_taxonomy is None:
-        if SKILLS_TAXONOMY_PATH.exists():
-            with open(SKILLS_TAXONOMY_PATH) as f:
-                raw = json.load(f)
-            _skills_taxonomy = {s.lower() for s in raw}
-        else:
-            logger.error("Skills taxonomy file not found", extra={"path": str(SKILLS_TAXONOMY_PATH)})
-            _skills_taxonomy = set()
-    return _skills_taxonomy
+def parser_fingerprint() -> str:
+    """Identify everything that can change parse output: model, model version, mode, and taxonomy."""
+    nlp = _get_nlp()
+    return f"{SPACY_MODEL}@{nlp.meta.get('version', 'unknown')}:{SPACY_PARSE_MODE}:skills-{get_skill_matcher().digest}"
+
+
+def _prune_to_entity_components(nlp):
+    """Remove components that neither set entities nor feed an entity component.
+
+    Removing (rather than disabling) the tagger, parser, and lemmatizer lets
+    their weights be freed, which is where most of the footprint goes.
+    """
+    keep = {name for name in nlp.pipe_names if "doc.ents" in nlp.get_pipe_meta(name).assigns}
+    for name, component in nlp.pipeline:
+        if keep & set(getattr(component, "listening_components", [])):
+            keep.add(name)
 
+    for name in [name for name in nlp.pipe_names if name not in keep]:
+        nlp.remove_pipe(name)
+
+    logger.info("Pruned spaCy pipeline for targeted parsing", extra={"components": nlp.pipe_names})
+
+
+NAME_ENTITY_WINDOW = 500
 
 EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
 PHONE_PATTERN = re.compile(r"[+]?[(]?[0-9]{1,4}[)]?[-\s./0-9]{7,15}")
@@ -126,25 +137,80 @@ def parse_resume(raw_text: str):
     Uses spaCy NER for entity extraction, regex for contact info,
     and section-based heuristics for work history, education, etc.
     """
-    nlp = _get_nlp()
-    doc = nlp(raw_text[:100_000])  # Cap at 100k chars for spaCy processing
+    return parse_resumes([raw_text])[0]
 
-    # Split text into lines for section parsing
-    lines = raw_text.split("\n")
 
+def parse_resumes(raw_texts: list[str]):
+    """Parse a batch of resume texts into CandidateProfiles, in input order.
+
+    Every resume and its education block go through a single `nlp.pipe`
+    stream, batched by SPACY_BATCH_SIZE and optionally spread over
+    SPACY_N_PROCESS processes, before the heuristic extractors run per resume.
+
+    With SPACY_PARSE_MODE=targeted, only the header window (for the name) and
+    the education block (for institutions) are sent to spaCy, and the header is
+    skipped entirely when the first line is already a well-formed name.
+    """
+    nlp = _get_nlp()
+    targeted = SPACY_PARSE_MODE == "targeted"
+    lines_list = [raw_text.split("\n") for raw_text in raw_texts]
+    sections_list = [_identify_sections(lines) for lines in lines_list]
+
+    def texts_with_context():
+        for index, raw_text in enumerate(raw_texts):
+            if not targeted:
+                yield raw_text[:100_000], (index, "resume")  # Cap at 100k chars for spaCy processing
+            elif _confident_top_line_name(lines_list[index]) is None:
+                # Extra context past the window keeps entities that straddle its edge intact
+                yield raw_text[:NAME_ENTITY_WINDOW * 2], (index, "resume")
+
+            education_lines = sections_list[index].get("education", [])
+            if education_lines:
+                yield "\n".join(education_lines)[:10_000], (index, "education")
+
+    pending: dict[int, dict] = {}
+    profiles: list[CandidateProfile] = []
+
+    def build_until(stop: int):
+        while len(profiles) < stop:
+            index = len(profiles)
+            profiles.append(
+                _build_profile(raw_texts[index], lines_list[index], sections_list[index], pending.pop(index, {}))
+            )
+
+    # spaCy and the heuristics interleave, so their split is reported on the parse span, not as child spans
+    ner_seconds = 0.0
+    resumed = time.perf_counter()
+    for doc, (index, kind) in nlp.pipe(
+        texts_with_context(),
+        as_tuples=True,
+        batch_size=SPACY_BATCH_SIZE,
+        n_process=SPACY_N_PROCESS,
+    ):
+        ner_seconds += time.perf_counter() - resumed
+        # Docs arrive in input order, so every earlier resume already has all of its docs
+        build_until(index)
+        pending.setdefault(index, {})[kind] = doc
+        resumed = time.perf_counter()
+    ner_seconds += time.perf_counter() - resumed
+
+    build_until(len(raw_texts))
+    current_span().set(ner_ms=round(ner_seconds * 1000, 2))
+    return profiles
+
+
+def _build_profile(raw_text: str, lines: list[str], sections: dict[str, list[str]], docs: dict):
+    """Run the heuristic extractors on a resume whose spaCy docs are ready."""
     # Extract contact info
-    name, identity_source, name_confidence, name_warnings = _extract_name(doc, lines)
+    name, identity_source, name_confidence, name_warnings = _extract_name(docs.get("resume"), lines)
     email = _extract_email(raw_text)
     phone = _extract_phone(raw_text)
 
-    # Extract sections
-    sections = _identify_sections(lines)
-
     # Extract structured fields
     skills = _extract_skills(raw_text, sections.get("skills", []))
     work_history = _extract_work_history(sections.get("experience", []))
     work_history, work_warnings = _sanitize_work_history(work_history)
-    education = _extract_education(sections.get("education", []), doc)
+    education = _extract_education(sections.get("education", []), docs.get("education"))
     certifications = _extract_certifications(sections.get("certifications", []))
     projects = _extract_projects(sections.get("projects", []))
 
@@ -187,15 +253,24 @@ def _collect_parse_warnings(
 
 
 def _extract_name(doc, lines: list[str]):
-    """Extract candidate name from spaCy PERSON entities near the top of the document."""
+    """Extract candidate name from spaCy PERSON entities near the top of the document.
+
+    `doc` is None when targeted parsing skipped spaCy because the first line
+    already looks like a person name.
+    """
     warnings: list[str] = []
 
-    # Look for PERSON entities in the first 500 characters
-    for ent in doc.ents:
-        if ent.label_ == "PERSON" and ent.start_char < 500:
-            name = ent.text.strip()
-            if _looks_like_person_name(name):
-                return name, "ner", 0.95, warnings
+    if doc is None:
+        top_line = _confident_top_line_name(lines)
+        if top_line:
+            return top_line, "top_line", 0.85, warnings
+    else:
+        # Look for PERSON entities in the first 500 characters
+        for ent in doc.ents:
+            if ent.label_ == "PERSON" and ent.start_char < NAME_ENTITY_WINDOW:
+                name = ent.text.strip()
+                if _looks_like_person_name(name):
+                    return name, "ner", 0.95, warnings
 
     warnings.append("name_ner_not_confident")
 
@@ -211,6 +286,15 @@ def _extract_name(doc, lines: list[str]):
     return None, "unknown", 0.0, warnings
 
 
+def _confident_top_line_name(lines: list[str]) -> str | None:
+    """Return the first non-empty line when it is, on its own, a well-formed person name."""
+    for line in lines[:5]:
+        stripped = line.strip()
+        if stripped:
+            return stripped if len(stripped) <= 100 and _looks_like_person_name(stripped) else None
+    return None
+
+
 def _looks_like_person_name(value: str) -> bool:
     candidate = re.sub(r"\s+", " ", value.strip())
     if len(candidate) < 3 or len(candidate) > 60:
@@ -292,39 +376,31 @@ def _identify_sections(lines: list[str]):
 
 def _extract_skills(raw_text: str, skills_section_lines: list[str]):
     """Extract skills with section-aware taxonomy matching and ranking."""
-    taxonomy = _get_skills_taxonomy()
-    if not taxonomy:
+    matcher = get_skill_matcher()
+    if not matcher:
         return []
 
-    text_lower = raw_text.lower()
     section_text = "\n".join(skills_section_lines)
-    section_lower = section_text.lower()
+    section_hits = matcher.first_hits(section_text, section="skills") if section_text else {}
+    resume_hits = matcher.first_hits(raw_text)
     found_skills: dict[str, tuple[int, int]] = {}
 
-    for skill in taxonomy:
+    for skill in section_hits.keys() | resume_hits.keys():
         if skill in SKILL_STOPWORDS:
             continue
 
-        pattern = r"\b" + re.escape(skill) + r"\b"
-        in_section = bool(section_lower and re.search(pattern, section_lower))
-        in_resume = bool(re.search(pattern, text_lower))
-        if not in_section and not in_resume:
-            continue
-
-        position_source = section_text if in_section else raw_text
-        match = re.search(pattern, position_source, re.IGNORECASE)
-        position = match.start() if match else 999_999
-        found_skills[skill] = (0 if in_section else 1, position)
+        in_section = skill in section_hits
+        hit = section_hits[skill] if in_section else resume_hits[skill]
+        found_skills[skill] = (0 if in_section else 1, hit.start)
 
     ranked_skills = sorted(found_skills.items(), key=lambda item: (item[1][0], item[1][1], item[0]))
-    return [_normalize_skill_display(skill, raw_text) for skill, _ in ranked_skills[:20]]
+    return [_normalize_skill_display(skill, resume_hits) for skill, _ in ranked_skills[:20]]
 
 
-def _normalize_skill_display(skill: str, raw_text: str) -> str:
-    pattern = re.compile(r"\b" + re.escape(skill) + r"\b", re.IGNORECASE)
-    match = pattern.search(raw_text)
-    if match:
-        return match.group(0)
+def _normalize_skill_display(skill: str, resume_hits: dict[str, SkillHit]) -> str:
+    hit = resume_hits.get(skill)
+    if hit:
+        return hit.text
     return skill.title() if len(skill) > 3 else skill.upper()
 
 
@@ -503,17 +579,14 @@ def _normalize_date(date_str: str):
     return year_match.group(0)
 
 
-def _extract_education(section_lines: list[str], doc):
-    """Extract education entries from the education section."""
-    if not section_lines:
+def _extract_education(section_lines: list[str], edu_doc):
+    """Extract education entries from the education section and its spaCy doc."""
+    if not section_lines or edu_doc is None:
         return []
 
     entries: list[EducationEntry] = []
     text_block = "\n".join(section_lines)
 
-    # Process the education section as a block
-    edu_doc = _get_nlp()(text_block[:10_000])
-
     # Find degree mentions
     degree_matches = list(DEGREE_PATTERN.finditer(text_block))
     org_entities = [ent for ent in edu_doc.ents if ent.label_ == "ORG"]
@@ -2,30 +2,50 @@
 
 from __future__ import annotations
 
+import importlib.util
 import logging
 import re
+from dataclasses import dataclass, replace
 from typing import Any
 
-from sentence_transformers import SentenceTransformer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 
 from config import (
+    LEXICAL_MODE,
     SCORING_WEIGHT_EXPERIENCE_FIT,
     SCORING_WEIGHT_SEMANTIC_SIMILARITY,
     SCORING_WEIGHT_SKILL_MATCH,
     SCORING_WEIGHT_TEXT_SIMILARITY,
+    SEMANTIC_BACKEND,
+    SEMANTIC_BATCH_SIZE,
     SEMANTIC_MAX_CHARS,
+    SEMANTIC_MODEL_DIR,
     SEMANTIC_MODEL_NAME,
+    SEMANTIC_ONNX_FILE,
     TFIDF_MAX_FEATURES,
     TFIDF_NGRAM_RANGE,
 )
 from models import CandidateProfile, ScoringResult, SubScore
-from stages.parse import _get_nlp, _get_skills_taxonomy
+from stages.parse import _get_nlp
+from utils.embedding_cache import at_storage_precision, get_embedding_cache
+from utils.idf_table import IdfTable, _identity_analyzer, get_idf_table
+from utils.metrics import SEMANTIC_FALLBACKS, stage_timer
+from utils.skill_matcher import get_skill_matcher
+from utils.tracing import current_span, span
 
 logger = logging.getLogger(__name__)
-_semantic_model: SentenceTransformer | None = SentenceTransformer(SEMANTIC_MODEL_NAME)
-_semantic_backend = "sentence-transformers"
+_semantic_model = None
+_semantic_runtime: tuple[str, str | None] | None = None
+# Set once the model loads or the spaCy fallback runs; until then, the resolved runtime's backend
+_semantic_backend: str | None = None
+_lexical_analyzer = None
+
+SEMANTIC_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    # The file `python -m utils.semantic_export` writes for the portable AVX2 quantization
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",
+}
 
 EXPERIENCE_YEARS_PATTERN = re.compile(
     r"(\d+)\+?\s*(?:years?|yrs?)(?:\s+of\s+experience)?",
@@ -33,16 +53,80 @@ EXPERIENCE_YEARS_PATTERN = re.compile(
 )
 
 
+@dataclass(frozen=True)
+class JobContext:
+    """Job-description-side scoring inputs, computed once per session."""
+
+    job_description: str
+    required_skills: frozenset[str]
+    required_years: int | None
+    jd_terms: list[str]
+    jd_embedding: np.ndarray | None
+
+
+def build_job_context(job_description: str, embed: bool = True) -> JobContext:
+    """Precompute everything score_resume needs from the job description.
+
+    With `embed=False` the JD is not encoded, for callers whose semantic
+    similarities are already computed.
+    """
+    match = EXPERIENCE_YEARS_PATTERN.search(job_description)
+
+    return JobContext(
+        job_description=job_description,
+        required_skills=frozenset(get_skill_matcher().skills_in(job_description)),
+        required_years=int(match.group(1)) if match else None,
+        jd_terms=_analyze_terms(job_description),
+        jd_embedding=_encode_job_description(job_description) if embed else None,
+    )
+
+
+def job_context_to_dict(job: JobContext, embed: bool = True) -> dict[str, Any]:
+    """Serialize a JobContext into a task argument, leaving out the embedding when `embed` is False."""
+    if not embed:
+        job = replace(job, jd_embedding=None)
+    return {
+        "job_description": job.job_description,
+        "required_skills": sorted(job.required_skills),
+        "required_years": job.required_years,
+        "jd_terms": job.jd_terms,
+        "jd_embedding": None if job.jd_embedding is None else job.jd_embedding.tolist(),
+    }
+
+
+def job_context_from_dict(raw_job: dict[str, Any]) -> JobContext:
+    """Rebuild a JobContext serialized by `job_context_to_dict`."""
+    embedding = raw_job["jd_embedding"]
+    return JobContext(
+        job_description=raw_job["job_description"],
+        required_skills=frozenset(raw_job["required_skills"]),
+        required_years=raw_job["required_years"],
+        jd_terms=list(raw_job["jd_terms"]),
+        jd_embedding=None if embedding is None else np.asarray(embedding, dtype=np.float32),
+    )
+
+
 def score_resume(
     raw_text: str,
     profile: CandidateProfile,
-    job_description: str,
+    job: JobContext,
+    lexical_sim: float | None = None,
+    semantic_sim: float | None = None,
 ) -> ScoringResult:
-    """Score a resume against a job description with a hybrid approach."""
-    lexical_sim = _score_text_similarity(raw_text, job_description)
-    semantic_sim = _score_semantic_similarity(raw_text, job_description)
-    skill_match, matched, missing, extra = _score_skill_match(profile.skills, job_description)
-    exp_fit, required_years = _score_experience_fit(profile.total_experience_years, job_description)
+    """Score a resume against a job description with a hybrid approach.
+
+    `lexical_sim` and `semantic_sim` may be precomputed for the whole session by
+    `score_lexical_batch` and `score_semantic_batch`; otherwise the resume is
+    scored on its own.
+    """
+    if lexical_sim is None:
+        lexical_sim = _score_text_similarity(raw_text, job)
+    if semantic_sim is None:
+        semantic_sim = _score_semantic_similarity(raw_text, job)
+    with stage_timer("score_skills"):
+        skill_match, matched, missing, extra = _score_skill_match(profile.skills, job.required_skills)
+    with stage_timer("score_experience"):
+        exp_fit, required_years = _score_experience_fit(profile.total_experience_years, job.required_years)
 
     weights = {
         "text_similarity": SCORING_WEIGHT_TEXT_SIMILARITY,
@@ -74,6 +158,7 @@ def score_resume(
             score=round(lexical_sim, 1),
             weight=round(weights["text_similarity"], 2),
             description="Lexical TF-IDF similarity between the resume and job description",
+            details=_lexical_details(),
         ),
         "semantic_similarity": SubScore(
             score=round(semantic_sim, 1),
@@ -81,8 +166,8 @@ def score_resume(
             description="Semantic similarity using sentence-transformer embeddings",
             details={
                 "max_chars": SEMANTIC_MAX_CHARS,
-                "backend": _semantic_backend,
-                "model": SEMANTIC_MODEL_NAME if _semantic_backend == "sentence-transformers" else "spacy-fallback",
+                "backend": _get_semantic_backend(),
+                "model": SEMANTIC_MODEL_NAME if _get_semantic_backend() != "spacy-fallback" else "spacy-fallback",
             },
         ),
         "skill_match": SubScore(
@@ -120,58 +205,271 @@ def _redistribute_weight(weights: dict[str, float], from_key: str, recipients: l
         weights[key] += share
 
 
-def _score_text_similarity(resume_text: str, job_description: str) -> float:
-    """Compute lexical TF-IDF cosine similarity between resume and JD."""
-    if not resume_text.strip() or not job_description.strip():
-        return 0.0
+def _get_lexical_analyzer():
+    global _lexical_analyzer
+    if _lexical_analyzer is None:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        _lexical_analyzer = TfidfVectorizer(stop_words="english", ngram_range=TFIDF_NGRAM_RANGE).build_analyzer()
+    return _lexical_analyzer
+
+
+def _analyze_terms(text: str) -> list[str]:
+    """Tokenize, drop stop words, and expand n-grams exactly as the TF-IDF vectorizer would."""
+    if not text.strip():
+        return []
 
     try:
-        vectorizer = TfidfVectorizer(
-            max_features=TFIDF_MAX_FEATURES,
-            stop_words="english",
-            ngram_range=TFIDF_NGRAM_RANGE,
-        )
-        tfidf_matrix = vectorizer.fit_transform([job_description, resume_text])
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return float(similarity * 100)
+        return _get_lexical_analyzer()(text)
     except Exception:
-        return 0.0
+        return []
+
+
+def score_lexical_batch(resume_texts: list[str], job: JobContext) -> list[float]:
+    """Compute lexical TF-IDF similarity for every resume of a session.
+
+    In the default `session` mode the vectorizer is fit once over the JD plus
+    all session resumes, so every resume is weighted by the same IDF and scores
+    are comparable within a session. In `corpus` mode terms are feature-hashed
+    and weighted by the precomputed corpus IDF table, with no fit at all.
+    """
+    scores = [0.0] * len(resume_texts)
+    indices = [i for i, text in enumerate(resume_texts) if text.strip()]
+    if not indices or not job.jd_terms:
+        return scores
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    table = _get_corpus_idf()
+    try:
+        with span("analyze", documents=len(indices)):
+            term_lists = [job.jd_terms, *(_analyze_terms(resume_texts[i]) for i in indices)]
+        with span("tfidf", documents=len(indices), idf_corpus=table is not None):
+            if table is not None:
+                tfidf_matrix = _hashed_tfidf(term_lists, table)
+            else:
+                vectorizer = TfidfVectorizer(max_features=TFIDF_MAX_FEATURES, analyzer=_identity_analyzer)
+                tfidf_matrix = vectorizer.fit_transform(term_lists)
+        # Rows are L2-normalised, so one sparse matrix-vector product yields every cosine similarity.
+        similarities = (tfidf_matrix[1:] @ tfidf_matrix[0].T).toarray().ravel()
+        for i, similarity in zip(indices, similarities):
+            scores[i] = float(similarity * 100)
+    except Exception:
+        return [0.0] * len(resume_texts)
+
+    return scores
+
+
+def _hashed_tfidf(term_lists: list[list[str]], table: IdfTable):
+    """Hash term counts into the table's feature space and apply the corpus IDF, row by row."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.preprocessing import normalize
+
+    counts = HashingVectorizer(
+        n_features=table.n_features,
+        analyzer=_identity_analyzer,
+        alternate_sign=False,
+        norm=None,
+    ).transform(term_lists)
+    counts.data *= table.idf[counts.indices]
+    return normalize(counts)
+
+
+def _get_corpus_idf() -> IdfTable | None:
+    """Return the corpus IDF table in `corpus` mode, or None to fit a session IDF."""
+    if LEXICAL_MODE != "corpus":
+        return None
+    return get_idf_table()
+
+
+def _lexical_details() -> dict[str, Any]:
+    table = _get_corpus_idf()
+    if table is None:
+        return {"idf_corpus": "session"}
+    return {"idf_corpus": "corpus", "idf_documents": table.documents, "hash_features": table.n_features}
+
+
+def _score_text_similarity(resume_text: str, job: JobContext) -> float:
+    """Compute lexical TF-IDF cosine similarity between resume and JD."""
+    return score_lexical_batch([resume_text], job)[0]
+
 
+def _encode_job_description(job_description: str) -> np.ndarray | None:
+    if not job_description.strip():
+        return None
 
-def _score_semantic_similarity(resume_text: str, job_description: str) -> float:
+    try:
+        with span("encode_job_description"):
+            return _encode_batched([job_description[:SEMANTIC_MAX_CHARS]])[0]
+    except Exception as error:
+        logger.error("Job description embedding failed", extra={"error": str(error)})
+        return None
+
+
+def _score_semantic_similarity(resume_text: str, job: JobContext) -> float:
     """Compute semantic similarity using sentence-transformers with spaCy fallback."""
-    if not resume_text.strip() or not job_description.strip():
+    if not resume_text.strip() or not job.job_description.strip():
         return 0.0
 
     try:
-        model = _get_semantic_model()
-        embeddings = model.encode(
-            [job_description[:SEMANTIC_MAX_CHARS], resume_text[:SEMANTIC_MAX_CHARS]],
-            normalize_embeddings=True,
-        )
-        similarity = float(embeddings[0] @ embeddings[1])
+        if job.jd_embedding is None:
+            raise RuntimeError("Job description embedding is unavailable")
+
+        embedding = _encode_batched([resume_text[:SEMANTIC_MAX_CHARS]])[0]
+        similarity = float(job.jd_embedding @ embedding)
         return max(0.0, min(100.0, float(similarity * 100)))
     except Exception as primary_error:
-        return _score_semantic_similarity_spacy(resume_text, job_description, primary_error)
+        return _score_semantic_similarity_spacy(resume_text, job.job_description, primary_error)
+
+
+def score_semantic_batch(resume_texts: list[str], job: JobContext) -> list[float]:
+    """Compute semantic similarity for every resume of a session in batched encoder passes."""
+    scores = [0.0] * len(resume_texts)
+    indices = [i for i, text in enumerate(resume_texts) if text.strip()]
+    if not indices or not job.job_description.strip():
+        return scores
+
+    try:
+        if job.jd_embedding is None:
+            raise RuntimeError("Job description embedding is unavailable")
+
+        embeddings = _encode_batched([resume_texts[i][:SEMANTIC_MAX_CHARS] for i in indices])
+        similarities = embeddings @ job.jd_embedding
+        for i, similarity in zip(indices, similarities):
+            scores[i] = max(0.0, min(100.0, float(similarity * 100)))
+    except Exception as primary_error:
+        for i in indices:
+            scores[i] = _score_semantic_similarity_spacy(resume_texts[i], job.job_description, primary_error)
+
+    return scores
+
+
+def _encode_batched(texts: list[str]) -> np.ndarray:
+    """Encode texts in length-sorted batches to minimise padding, returning rows in input order.
+
+    Texts already in the embedding cache skip the encoder entirely.
+    """
+    backend, onnx_file = _get_semantic_runtime()
+    cache, vectors = _read_embeddings(f"{SEMANTIC_MODEL_NAME}:{backend}:{onnx_file or ''}:{SEMANTIC_MAX_CHARS}", texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    current_span().set(embedding_cache_hits=len(texts) - len(missing))
+
+    if missing:
+        model = _get_semantic_model()
+        order = sorted(missing, key=lambda i: len(texts[i]), reverse=True)
+
+        for offset in range(0, len(order), SEMANTIC_BATCH_SIZE):
+            batch = order[offset:offset + SEMANTIC_BATCH_SIZE]
+            with span("encode", texts=len(batch), chars=sum(len(texts[i]) for i in batch), backend=backend):
+                encoded = model.encode(
+                    [texts[i] for i in batch],
+                    batch_size=SEMANTIC_BATCH_SIZE,
+                    normalize_embeddings=True,
+                )
+            for i, vector in zip(batch, encoded):
+                vectors[i] = vector
+
+        if cache is not None:
+            # Hits come back at float16 precision; round fresh vectors the same way so a score never depends on a hit
+            encoded = at_storage_precision(np.stack([vectors[i] for i in missing]))
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+            _store_embeddings(cache, [texts[i] for i in missing], encoded)
+
+    return np.stack(vectors).astype(np.float32, copy=False)
+
+
+def _read_embeddings(namespace: str, texts: list[str]):
+    """Return the embedding cache and its hits; a cache fault is an all-miss, costing an encoder pass, not the score."""
+    cache = None
+    try:
+        cache = get_embedding_cache(namespace)
+        if cache is not None:
+            return cache, cache.get_many(texts)
+    except Exception as error:
+        logger.warning("Embedding cache read failed", extra={"error": str(error)})
+    return cache, [None] * len(texts)
+
+
+def _store_embeddings(cache, texts: list[str], embeddings: np.ndarray):
+    try:
+        cache.put_many(texts, embeddings)
+    except Exception as error:
+        logger.warning("Embedding cache write failed", extra={"error": str(error)})
 
 
 def _get_semantic_model():
+    """Lazily load the sentence-transformer on the configured backend.
+
+    With SEMANTIC_MODEL_DIR set, the model is read from that directory only
+    and never fetched over the network.
+    """
     global _semantic_model
     global _semantic_backend
 
     if _semantic_model is None:
-        _semantic_model = SentenceTransformer(SEMANTIC_MODEL_NAME)
-        _semantic_backend = "sentence-transformers"
+        from sentence_transformers import SentenceTransformer
+
+        backend, onnx_file = _get_semantic_runtime()
+        kwargs: dict[str, Any] = {}
+        if SEMANTIC_MODEL_DIR:
+            kwargs["local_files_only"] = True
+        if onnx_file is not None:
+            kwargs["backend"] = "onnx"
+            kwargs["model_kwargs"] = {"file_name": onnx_file}
+
+        _semantic_model = SentenceTransformer(SEMANTIC_MODEL_DIR or SEMANTIC_MODEL_NAME, **kwargs)
+        _semantic_backend = backend
 
     return _semantic_model
 
 
+def _get_semantic_backend() -> str:
+    """Return the backend semantic scores come from, without loading the model."""
+    return _semantic_backend or _get_semantic_runtime()[0]
+
+
+def _get_semantic_runtime() -> tuple[str, str | None]:
+    """Resolve SEMANTIC_BACKEND to a backend name and ONNX file, falling back to torch when unusable."""
+    global _semantic_runtime
+    if _semantic_runtime is not None:
+        return _semantic_runtime
+
+    backend = SEMANTIC_BACKEND
+    if backend not in SEMANTIC_BACKENDS:
+        logger.error("Unknown semantic backend, using torch", extra={"backend": backend})
+        backend = "torch"
+
+    if backend != "torch":
+        # sentence-transformers loads ONNX models through optimum, which needs onnxruntime itself
+        missing = [name for name in ("onnxruntime", "optimum.onnxruntime") if not _module_available(name)]
+        if missing:
+            logger.error(
+                "ONNX backend packages are not installed, using the torch semantic backend",
+                extra={"backend": backend, "missing": missing},
+            )
+            backend = "torch"
+
+    onnx_file = None if backend == "torch" else SEMANTIC_ONNX_FILE or DEFAULT_ONNX_FILES[backend]
+    _semantic_runtime = (backend, onnx_file)
+    return _semantic_runtime
+
+
+def _module_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        # Raised for a submodule whose parent package is missing
+        return False
+
+
 def _score_semantic_similarity_spacy(
     resume_text: str,
     job_description: str,
     primary_error: Exception | None = None,
 ):
     global _semantic_backend
+    SEMANTIC_FALLBACKS.inc()
 
     try:
         nlp = _get_nlp()
@@ -193,18 +491,9 @@ def _score_semantic_similarity_spacy(
 
 def _score_skill_match(
     candidate_skills: list[str],
-    job_description: str,
+    required_skills: frozenset[str],
 ) -> tuple[float, list[str], list[str], list[str]]:
     """Score skill overlap between candidate and job description."""
-    taxonomy = _get_skills_taxonomy()
-    jd_lower = job_description.lower()
-
-    required_skills: set[str] = set()
-    for skill in taxonomy:
-        pattern = r"\b" + re.escape(skill) + r"\b"
-        if re.search(pattern, jd_lower):
-            required_skills.add(skill)
-
     if not required_skills:
         return 50.0, [], [], list(candidate_skills)
 
@@ -220,19 +509,16 @@ def _score_skill_match(
 
 def _score_experience_fit(
     candidate_years: float | None,
-    job_description: str,
+    required_years: int | None,
 ) -> tuple[float, int | None]:
     """Score experience alignment with JD requirements."""
-    match = EXPERIENCE_YEARS_PATTERN.search(job_description)
-    if not match:
+    if required_years is None:
         return 50.0, None
 
-    required = int(match.group(1))
-
     if candidate_years is None:
-        return 50.0, required
+        return 50.0, required_years
 
-    diff = candidate_years - required
+    diff = candidate_years - required_years
     if diff >= 0:
         score = 100.0
     elif diff >= -1:
@@ -242,4 +528,4 @@ def _score_experience_fit(
     else:
         score = 40.0
 
-    return score, required
+    return score, required_years
@@ -0,0 +1,237 @@
+import time
+
+import httpx
+import pytest
+
+from utils import callback
+from utils.callback_outbox import CallbackOutbox
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def outbox(tmp_path, clock):
+    return CallbackOutbox(tmp_path)
+
+
+def _enqueue(outbox: CallbackOutbox, key: str, content: bytes = b"{}", callback_type: str = "completion"):
+    outbox.enqueue(key, f"session-{key}", key, callback_type, content)
+
+
+def _state(outbox: CallbackOutbox, key: str) -> tuple[str, int] | None:
+    return outbox._db.execute("SELECT state, attempts FROM callbacks WHERE delivery_key = ?", (key,)).fetchone()
+
+
+def test_claim_returns_due_entries_oldest_first_and_leases_them(outbox, clock):
+    _enqueue(outbox, "run-1")
+    clock.advance(1)
+    _enqueue(outbox, "run-2")
+
+    first = outbox.claim_due(1, lease_seconds=60)
+    rest = outbox.claim_due(10, lease_seconds=60)
+
+    assert [entry.run_id for entry in first] == ["run-1"]
+    assert [entry.run_id for entry in rest] == ["run-2"]
+    assert outbox.claim_due(10, lease_seconds=60) == []
+
+
+def test_claim_is_shared_between_outboxes_on_one_directory(tmp_path, clock):
+    first, second = CallbackOutbox(tmp_path), CallbackOutbox(tmp_path)
+    _enqueue(first, "run-1")
+
+    assert len(first.claim_due(1, lease_seconds=60)) == 1
+    assert second.claim_due(1, lease_seconds=60) == []
+
+
+def test_expired_lease_makes_entry_claimable_again(outbox, clock):
+    _enqueue(outbox, "run-1")
+    (claimed,) = outbox.claim_due(1, lease_seconds=60)
+
+    clock.advance(59)
+    assert outbox.claim_due(1, lease_seconds=60) == []
+
+    clock.advance(2)
+    (reclaimed,) = outbox.claim_due(1, lease_seconds=60)
+    assert reclaimed.id == claimed.id
+
+
+def test_run_callbacks_are_claimed_in_order(outbox, clock):
+    outbox.enqueue("run-1:partial:0", "session-1", "run-1", "partial", b"partial")
+    clock.advance(1)
+    outbox.enqueue("run-1", "session-1", "run-1", "completion", b"completion")
+    _enqueue(outbox, "run-2")
+
+    (partial,) = outbox.claim_due(1, lease_seconds=60)
+    assert partial.type == "partial"
+    outbox.mark_failed(partial.id, "503", retry_at=clock.now + 30)
+
+    # The completion waits behind the partial's backoff; other runs are not held up
+    assert [entry.run_id for entry in outbox.claim_due(10, lease_seconds=60)] == ["run-2"]
+    assert outbox.seconds_until_due() == pytest.approx(30)
+
+    clock.advance(30)
+    (partial,) = outbox.claim_due(10, lease_seconds=60)
+    assert partial.type == "partial"
+    outbox.mark_delivered(partial.id)
+    (completion,) = outbox.claim_due(10, lease_seconds=60)
+    assert completion.type == "completion"
+
+
+def test_dead_partial_holds_back_its_run_until_requeued(outbox, clock):
+    outbox.enqueue("run-1:partial:0", "session-1", "run-1", "partial", b"partial")
+    clock.advance(1)
+    outbox.enqueue("run-1", "session-1", "run-1", "completion", b"completion")
+
+    (partial,) = outbox.claim_due(1, lease_seconds=60)
+    outbox.mark_failed(partial.id, "422", retry_at=None)
+
+    assert outbox.claim_due(10, lease_seconds=60) == []
+    assert outbox.seconds_until_due() is None
+
+    outbox.retry_dead()
+    assert [entry.type for entry in outbox.claim_due(10, lease_seconds=60)] == ["partial"]
+
+
+def test_enqueue_replaces_pending_body_with_the_same_key(outbox):
+    _enqueue(outbox, "run-1", b"old")
+    _enqueue(outbox, "run-1", b"new")
+
+    (entry,) = outbox.claim_due(10, lease_seconds=60)
+    assert entry.content == b"new"
+
+
+def test_delivered_entry_is_removed(outbox):
+    _enqueue(outbox, "run-1")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    outbox.mark_delivered(entry.id)
+
+    assert _state(outbox, "run-1") is None
+    assert outbox.stats()["depth"] == 0
+
+
+def test_failed_entry_is_retried_when_due(outbox, clock):
+    _enqueue(outbox, "run-1")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    outbox.mark_failed(entry.id, "503", retry_at=clock.now + 10)
+
+    assert outbox.claim_due(1, lease_seconds=60) == []
+    clock.advance(10)
+    (retried,) = outbox.claim_due(1, lease_seconds=60)
+    assert retried.attempts == 1
+
+
+def test_dead_entry_is_never_claimed_until_requeued(outbox, clock):
+    _enqueue(outbox, "run-1")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    outbox.mark_failed(entry.id, "400", retry_at=None)
+    clock.advance(365 * 24 * 60 * 60)
+
+    assert outbox.claim_due(1, lease_seconds=60) == []
+    assert outbox.stats() == {"depth": 0, "oldest_age_seconds": 0.0, "dead": 1}
+    assert outbox.seconds_until_due() is None
+
+    assert outbox.retry_dead() == 1
+    (requeued,) = outbox.claim_due(1, lease_seconds=60)
+    assert requeued.attempts == 0
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://api.test/callback")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status_code}", request=request, response=response)
+
+
+def _failing_send(error: Exception):
+    def send(*args, **kwargs):
+        raise error
+
+    return send
+
+
+def test_sender_deletes_delivered_entry(outbox, monkeypatch):
+    sent = []
+    monkeypatch.setattr(callback, "_send", lambda content, *args: sent.append(content))
+    _enqueue(outbox, "run-1", b"body")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    callback._deliver_outbox_entry(outbox, entry)
+
+    assert sent == [b"body"]
+    assert _state(outbox, "run-1") is None
+
+
+def test_sender_reschedules_server_errors(outbox, clock, monkeypatch):
+    monkeypatch.setattr(callback, "_send", _failing_send(_status_error(503)))
+    _enqueue(outbox, "run-1")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    callback._deliver_outbox_entry(outbox, entry)
+
+    assert _state(outbox, "run-1") == ("pending", 1)
+
+
+def test_sender_dead_letters_client_errors(outbox, monkeypatch):
+    monkeypatch.setattr(callback, "_send", _failing_send(_status_error(422)))
+    _enqueue(outbox, "run-1")
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    callback._deliver_outbox_entry(outbox, entry)
+
+    assert _state(outbox, "run-1") == ("dead", 1)
+
+
+def test_sender_dead_letters_entries_past_max_age(outbox, clock, monkeypatch):
+    monkeypatch.setattr(callback, "_send", _failing_send(httpx.ConnectError("refused")))
+    monkeypatch.setattr(callback, "CALLBACK_OUTBOX_MAX_AGE_SECONDS", 60)
+    _enqueue(outbox, "run-1")
+    clock.advance(61)
+    (entry,) = outbox.claim_due(1, lease_seconds=60)
+
+    callback._deliver_outbox_entry(outbox, entry)
+
+    assert _state(outbox, "run-1") == ("dead", 1)
+
+
+def test_sender_claims_one_entry_per_send(tmp_path, monkeypatch):
+    class StopSenderError(Exception):
+        pass
+
+    claims = []
+
+    class RecordingOutbox(CallbackOutbox):
+        def claim_due(self, limit, lease_seconds):
+            if claims:
+                raise StopSenderError
+            claims.append((limit, lease_seconds))
+            return super().claim_due(limit, lease_seconds)
+
+    _enqueue(CallbackOutbox(tmp_path), "run-1")
+    monkeypatch.setattr(callback, "CALLBACK_OUTBOX_DIR", str(tmp_path))
+    monkeypatch.setattr(callback, "CallbackOutbox", RecordingOutbox)
+    monkeypatch.setattr(callback, "_send", lambda *args: None)
+
+    with pytest.raises(StopSenderError):
+        callback._run_outbox_sender()
+
+    # One POST per lease, so the lease never has to cover a queue of slow sends
+    assert claims == [(1, callback.OUTBOX_LEASE_SECONDS)]
+    assert callback.OUTBOX_LEASE_SECONDS > callback.CALLBACK_TIMEOUT_SECONDS
@@ -0,0 +1,94 @@
+import sqlite3
+from concurrent.futures import Future
+
+import pytest
+
+import worker
+from models import CandidateProfile, FileManifestItem, JobPayload, ParsedDocument
+from utils import document_cache
+from utils.document_cache import DocumentCache, content_hash
+from utils.storage import FetchedFile
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DocumentCache(tmp_path, "v1")
+
+
+def test_object_lookup_miss_is_counted_once_with_the_content_lookup(cache):
+    cache.put(content_hash(b"old"), "old text", None, storage_key="key-1", etag='"1"')
+
+    assert cache.get_by_object("key-1", '"2"') is None
+    assert cache.get(content_hash(b"new")) is None
+
+    assert cache.get_by_object("key-1", '"1"') == ("old text", None)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_version_swap_closes_the_old_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_cache, "DOCUMENT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(document_cache, "_cache", None)
+
+    old = document_cache.get_document_cache("v1")
+    new = document_cache.get_document_cache("v2")
+
+    assert new is not old
+    with pytest.raises(sqlite3.ProgrammingError):
+        old._db.execute("SELECT 1")
+
+
+class BrokenCache:
+    version = "broken"
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        return fail
+
+
+class Prefetcher:
+    def __init__(self, storage_keys, etags=None):
+        self._storage_keys = storage_keys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def __iter__(self):
+        for storage_key in self._storage_keys:
+            future = Future()
+            future.set_result(FetchedFile(data=f"text of {storage_key}".encode(), etag='"1"'))
+            yield future
+
+
+def _parse_extracted(payload, extracted, errors):
+    return [
+        (index, ParsedDocument(file=payload.files[index], raw_text=raw_text, profile=CandidateProfile()))
+        for index, raw_text in extracted
+    ]
+
+
+@pytest.mark.parametrize("failure", ["open", "read"])
+def test_broken_cache_falls_back_to_extraction(monkeypatch, failure):
+    if failure == "open":
+        def get_document_cache(version):
+            raise PermissionError("cache directory is read-only")
+    else:
+        def get_document_cache(version):
+            return BrokenCache()
+
+    monkeypatch.setattr(worker, "get_document_cache", get_document_cache)
+    monkeypatch.setattr(worker, "DOCUMENT_CACHE_ETAG_LOOKUP", True)
+    monkeypatch.setattr(worker, "FilePrefetcher", Prefetcher)
+    monkeypatch.setattr(worker, "_parse_extracted", _parse_extracted)
+    files = [FileManifestItem(file_id=1, storage_key="key-1", original_name="resume.txt")]
+    payload = JobPayload(session_id="session-1", run_id="run-1", job_description="Python", files=files)
+    errors = []
+
+    documents = worker._extract_and_parse_all(payload, errors)
+
+    assert errors == []
+    assert [document.raw_text for document in documents] == ["text of key-1"]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from stages import score
+from utils.embedding_cache import EmbeddingCache
+
+
+class Encoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        self.calls += 1
+        rng = np.random.default_rng(len(texts[0]))
+        vectors = rng.standard_normal((len(texts), 16)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def encoder(tmp_path, monkeypatch):
+    encoder = Encoder()
+    monkeypatch.setattr(score, "_get_semantic_model", lambda: encoder)
+    monkeypatch.setattr(score, "_get_semantic_runtime", lambda: ("torch", None))
+    monkeypatch.setattr(score, "get_embedding_cache", lambda namespace: EmbeddingCache(tmp_path, namespace))
+    return encoder
+
+
+def test_cache_hit_returns_the_same_vector_as_the_miss(encoder):
+    missed = score._encode_batched(["Senior Python engineer"])
+    hit = score._encode_batched(["Senior Python engineer"])
+
+    assert encoder.calls == 1
+    assert missed.dtype == hit.dtype == np.float32
+    np.testing.assert_array_equal(missed, hit)
+
+
+def test_similarity_does_not_depend_on_cache_hits(encoder):
+    job, resumes = "Python engineer", ["Python and Docker", "Java developer"]
+    first = score._encode_batched([job, *resumes])
+    second = score._encode_batched([job, *resumes])
+
+    np.testing.assert_array_equal(first[1:] @ first[0], second[1:] @ second[0])
+
+
+@pytest.mark.parametrize("failing", ["open", "read"])
+def test_cache_fault_is_an_all_miss(encoder, monkeypatch, failing):
+    def fail(*args):
+        raise OSError("mmap failed")
+
+    if failing == "open":
+        monkeypatch.setattr(score, "get_embedding_cache", fail)
+    else:
+        monkeypatch.setattr(EmbeddingCache, "get_many", fail)
+
+    embeddings = score._encode_batched(["Senior Python engineer", "Java developer"])
+
+    assert encoder.calls == 1
+    assert embeddings.shape == (2, 16)
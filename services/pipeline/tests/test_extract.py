@@ -0,0 +1,78 @@
+import io
+import zipfile
+
+import pymupdf
+import pytest
+
+from stages import extract
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _part(root: str, *lines: str) -> str:
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+    return f'<w:{root} xmlns:w="{_W}"><w:body>{paragraphs}</w:body></w:{root}>'
+
+
+def _docx(parts: dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return buffer.getvalue()
+
+
+def _pdf(pages: int) -> bytes:
+    document = pymupdf.open()
+    for number in range(pages):
+        document.new_page().insert_text((50, 60), f"Page {number + 1}")
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+@pytest.fixture
+def suspect_mode(monkeypatch):
+    monkeypatch.setattr(extract, "PDF_ISOLATION", "suspect")
+    monkeypatch.setattr(extract, "PDF_ISOLATION_MIN_BYTES", 1024 * 1024)
+
+
+def test_isolation_is_decided_by_size_without_opening_the_pdf(suspect_mode, monkeypatch):
+    monkeypatch.setattr(pymupdf, "open", lambda *args, **kwargs: pytest.fail("PDF opened in the worker"))
+
+    assert not extract._should_isolate_pdf(b"%PDF-1.7 small")
+    assert extract._should_isolate_pdf(b"%PDF-1.7" + b"\0" * 1024 * 1024)
+
+
+def test_page_limit_applies_in_process(suspect_mode, monkeypatch):
+    monkeypatch.setattr(extract, "PDF_MAX_PAGES", 2)
+
+    assert extract.extract_text(_pdf(5), "resume.pdf") == "Page 1\n\nPage 2"
+
+
+def test_page_limit_applies_in_the_isolated_child(monkeypatch):
+    monkeypatch.setattr(extract, "PDF_ISOLATION", "always")
+    monkeypatch.setattr(extract, "PDF_MAX_PAGES", 2)
+
+    assert extract.extract_text(_pdf(5), "resume.pdf") == "Page 1\n\nPage 2"
+
+
+def test_docx_headers_and_footers_are_read_in_numeric_order():
+    parts = {"word/document.xml": _part("document", "Body")}
+    for number in (10, 2, 1):
+        parts[f"word/header{number}.xml"] = _part("hdr", f"Header {number}")
+        parts[f"word/footer{number}.xml"] = _part("ftr", f"Footer {number}")
+
+    text = extract.extract_text(_docx(parts), "resume.docx")
+
+    assert text.split("\n") == ["Header 1", "Header 2", "Header 10", "Body", "Footer 1", "Footer 2", "Footer 10"]
+
+
+def test_docx_unnumbered_part_comes_first():
+    parts = {
+        "word/document.xml": _part("document", "Body"),
+        "word/header1.xml": _part("hdr", "Numbered"),
+        "word/header.xml": _part("hdr", "Unnumbered"),
+    }
+
+    assert extract.extract_text(_docx(parts), "resume.docx").split("\n") == ["Unnumbered", "Numbered", "Body"]
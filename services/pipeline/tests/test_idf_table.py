@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.idf_table import IDF_FILE, META_FILE, IdfTable, build_idf_table
+
+
+def test_built_table_loads_with_smoothed_idf(tmp_path):
+    documents = build_idf_table([["python", "docker"], ["python"], ["java"]], tmp_path, n_features=64)
+
+    table = IdfTable(tmp_path)
+
+    assert documents == table.documents == 3
+    assert table.n_features == 64
+    assert table.idf.shape == (64,)
+    # ln((1 + n) / (1 + df)) + 1 for "python" (df 2), "docker" and "java" (df 1), and unseen features
+    expected = np.log(4 / np.array([3, 2, 1])) + 1
+    assert set(np.round(table.idf, 4)) == set(np.round(expected.astype(np.float32), 4))
+    assert json.loads((tmp_path / META_FILE).read_text())["n_features"] == 64
+
+
+def test_table_size_comes_from_the_weights_file_not_meta(tmp_path):
+    build_idf_table([["python"]], tmp_path, n_features=64)
+    # A rebuild in progress has swapped the weights but not yet meta.json
+    (tmp_path / META_FILE).write_text(json.dumps({"n_features": 32, "documents": 1}))
+
+    assert IdfTable(tmp_path).n_features == 64
+
+
+def test_truncated_or_headerless_table_is_rejected(tmp_path):
+    build_idf_table([["python"]], tmp_path, n_features=64)
+    path = tmp_path / IDF_FILE
+    path.write_bytes(path.read_bytes()[:-4])
+
+    with pytest.raises(ValueError):
+        IdfTable(tmp_path)
+
+    np.ones(64, dtype=np.float32).tofile(path)
+    with pytest.raises(ValueError):
+        IdfTable(tmp_path)
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import worker
+from models import FileManifestItem, JobPayload
+from utils import metrics
+from utils.callback import ResultBatcher
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_snapshot_name", metrics._snapshot_name)
+    for metric in metrics._registry.values():
+        metric.reset()
+
+
+def _sessions(values: dict) -> dict[str, float]:
+    return {json.loads(key)[0]: value for key, value in values.get("pipeline_sessions_total", {}).items()}
+
+
+def test_process_reusing_a_pid_keeps_the_earlier_snapshot(tmp_path):
+    metrics.SESSIONS.inc(outcome="completed")
+    metrics.write_snapshot()
+
+    # What a new process forked with the dead one's pid starts from
+    metrics._reset_after_fork()
+    metrics.SESSIONS.inc(outcome="completed", amount=2)
+    metrics.write_snapshot()
+
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert _sessions(metrics.collect()) == {"completed": 3}
+
+
+def test_collect_counts_the_live_process_once(tmp_path):
+    metrics.SESSIONS.inc(outcome="failed")
+    metrics.write_snapshot()
+    metrics.SESSIONS.inc(outcome="failed")
+
+    assert _sessions(metrics.collect()) == {"failed": 2}
+
+
+def _payload() -> JobPayload:
+    files = [FileManifestItem(file_id=1, storage_key="resumes/1.txt", original_name="1.txt")]
+    return JobPayload(session_id="session-1", run_id="run-1", job_description="Python", files=files)
+
+
+def test_session_whose_callback_fails_counts_only_as_crashed(monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError("callback failed")
+
+    monkeypatch.setattr(worker, "send_completion", fail)
+    monkeypatch.setattr(worker, "send_error", lambda **kwargs: None)
+    payload = _payload()
+    results = ResultBatcher(payload)
+
+    with pytest.raises(RuntimeError), worker._reporting_failures(payload, results):
+        worker._send_outcome(payload, results, errors=[])
+
+    assert _sessions(metrics.snapshot()) == {"crashed": 1}
+
+
+def test_session_is_counted_once_its_callback_is_sent(monkeypatch):
+    monkeypatch.setattr(worker, "send_completion", lambda **kwargs: None)
+    payload = _payload()
+
+    worker._send_outcome(payload, ResultBatcher(payload), errors=[])
+
+    assert _sessions(metrics.snapshot()) == {"completed": 1}
@@ -0,0 +1,40 @@
+import pytest
+from celery.concurrency import solo
+from celery.signals import worker_init
+
+import worker
+from utils import model_registry
+
+
+class Worker:
+    pool_cls = solo.TaskPool
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loads = []
+    monkeypatch.setattr(model_registry, "MODEL_LOADERS", {"skills": "utils.skill_matcher:get_skill_matcher"})
+    monkeypatch.setattr(model_registry, "get_model", loads.append)
+    monkeypatch.setattr(model_registry, "_warm_up", lambda: loads.append("warm_up"))
+    monkeypatch.setattr(model_registry, "_ready", False)
+    monkeypatch.setattr(model_registry, "_preload_timings", {})
+    return loads
+
+
+def test_preload_runs_once_per_process(loads):
+    first = model_registry.preload()
+    second = model_registry.preload()
+
+    assert loads == ["skills", "warm_up"]
+    assert second == first
+    assert model_registry.is_ready()
+
+
+def test_solo_worker_preloads_once(loads, monkeypatch):
+    monkeypatch.setattr(worker, "MODEL_PRELOAD", True)
+
+    # Startup order: worker_init, then the pool, whose constructor sends worker_process_init
+    worker_init.send(sender=Worker())
+    solo.TaskPool()
+
+    assert loads == ["skills", "warm_up"]
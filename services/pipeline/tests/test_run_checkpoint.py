@@ -0,0 +1,198 @@
+import sqlite3
+import time
+
+import pytest
+
+from models import FileResult
+from utils.run_checkpoint import (
+    CheckpointStore,
+    RunLease,
+    RunLeaseHeldError,
+    RunLeaseLostError,
+    RunLeaseUnconfirmedError,
+    hold_run_lease,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return CheckpointStore(tmp_path, lease_seconds=60)
+
+
+def _result(file_id: int) -> FileResult:
+    return FileResult(
+        file_id=file_id,
+        raw_text=f"resume {file_id}",
+        parsed_profile={},
+        overall_score=50.0,
+        score_breakdown={},
+        summary="",
+    )
+
+
+def test_acquire_takes_a_free_run_and_refuses_other_owners(store):
+    assert store.acquire("run-1", "worker-a")
+    assert store.acquire("run-1", "worker-a")
+
+    with pytest.raises(RunLeaseHeldError) as held:
+        store.acquire("run-1", "worker-b")
+    assert held.value.owner == "worker-a"
+    assert held.value.retry_after == pytest.approx(60)
+
+
+def test_expired_lease_is_taken_over(store, clock):
+    store.acquire("run-1", "worker-a")
+    clock.advance(61)
+
+    assert store.acquire("run-1", "worker-b")
+    assert not store.renew("run-1", "worker-a")
+    assert store.renew("run-1", "worker-b")
+
+
+def test_renewal_keeps_the_lease(store, clock):
+    store.acquire("run-1", "worker-a")
+    clock.advance(50)
+    assert store.renew("run-1", "worker-a")
+    clock.advance(50)
+
+    with pytest.raises(RunLeaseHeldError):
+        store.acquire("run-1", "worker-b")
+
+
+def test_released_lease_is_free_at_once(store):
+    store.acquire("run-1", "worker-a")
+    store.release("run-1", "worker-a")
+
+    assert store.acquire("run-1", "worker-b")
+
+
+def test_finished_run_is_skipped_and_only_its_owner_finishes_it(store, clock):
+    store.acquire("run-1", "worker-a")
+    clock.advance(61)
+    store.acquire("run-1", "worker-b")
+
+    store.finish("run-1", "worker-a")
+    with pytest.raises(RunLeaseHeldError):
+        store.acquire("run-1", "worker-c")
+
+    store.finish("run-1", "worker-b")
+    assert not store.acquire("run-1", "worker-c")
+
+
+def test_load_resumes_from_checkpointed_texts_and_results(store):
+    store.acquire("run-1", "worker-a")
+    store.save_text("run-1", 1, "resume 1")
+    store.save_text("run-1", 2, "resume 2")
+    store.save_result("run-1", _result(1))
+    store.save_text("run-1", 1, "re-extracted text is ignored")
+
+    texts, results = store.load("run-1")
+
+    assert texts == {2: "resume 2"}
+    assert results == {1: _result(1)}
+    assert store.load("run-2") == ({}, {})
+
+
+def test_finish_drops_checkpoints(store):
+    store.acquire("run-1", "worker-a")
+    store.save_text("run-1", 1, "resume 1")
+    store.save_result("run-1", _result(2))
+
+    store.finish("run-1", "worker-a")
+
+    assert store.load("run-1") == ({}, {})
+
+
+def test_lease_check_passes_while_held(store):
+    store.acquire("run-1", "worker-a")
+    lease = RunLease(store, "run-1", "worker-a")
+
+    lease.check()
+
+
+def test_lease_check_raises_once_another_worker_holds_the_run(store, clock):
+    store.acquire("run-1", "worker-a")
+    lease = RunLease(store, "run-1", "worker-a")
+    clock.advance(61)
+    store.acquire("run-1", "worker-b")
+
+    lease.lost.set()
+    with pytest.raises(RunLeaseLostError):
+        lease.check()
+
+
+def test_lease_check_raises_once_the_run_finished_elsewhere(store, clock):
+    store.acquire("run-1", "worker-a")
+    lease = RunLease(store, "run-1", "worker-a")
+    clock.advance(61)
+    store.acquire("run-1", "worker-b")
+    store.finish("run-1", "worker-b")
+
+    lease.lost.set()
+    with pytest.raises(RunLeaseLostError):
+        lease.check()
+
+
+def test_lapsed_lease_nobody_took_over_is_kept(store, clock, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store.acquire("run-1", "worker-a")
+    lease = RunLease(store, "run-1", "worker-a")
+
+    # The heartbeat stalled past the lease, but no other worker acquired the run
+    now[0] = 200.0
+    clock.advance(100)
+    lease.check()
+
+    assert not lease.lost.is_set()
+    with pytest.raises(RunLeaseHeldError):
+        store.acquire("run-1", "worker-b")
+    now[0] = 259.0
+    lease.check()
+
+
+def test_lapsed_lease_that_cannot_be_read_is_unconfirmed(store, monkeypatch):
+    store.acquire("run-1", "worker-a")
+    lease = RunLease(store, "run-1", "worker-a")
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "renew", locked)
+    lease.lost.set()
+    with pytest.raises(RunLeaseUnconfirmedError):
+        lease.check()
+
+
+def test_heartbeat_flags_a_lease_taken_over_by_another_worker(tmp_path):
+    store = CheckpointStore(tmp_path, lease_seconds=0.3)
+    store.acquire("run-1", "worker-a")
+
+    with hold_run_lease(store, "run-1", "worker-a") as lease:
+        store._db.execute("UPDATE runs SET lease_expires_at = 0")
+        CheckpointStore(tmp_path, lease_seconds=60).acquire("run-1", "worker-b")
+        assert lease.lost.wait(2)
+        with pytest.raises(RunLeaseLostError):
+            lease.check()
+
+    # Releasing a lost lease leaves the new holder's lease alone
+    with pytest.raises(RunLeaseHeldError):
+        store.acquire("run-1", "worker-c")
@@ -0,0 +1,41 @@
+import pytest
+
+from stages import score
+
+
+@pytest.fixture(autouse=True)
+def fresh_runtime(monkeypatch):
+    monkeypatch.setattr(score, "_semantic_runtime", None)
+    monkeypatch.setattr(score, "_semantic_backend", None)
+    monkeypatch.setattr(score, "SEMANTIC_ONNX_FILE", "")
+
+
+def _installed(*names):
+    return lambda name: name in names
+
+
+def test_onnx_backend_needs_onnxruntime_and_optimum(monkeypatch):
+    monkeypatch.setattr(score, "SEMANTIC_BACKEND", "onnx-int8")
+    monkeypatch.setattr(score, "_module_available", _installed("onnxruntime", "optimum.onnxruntime"))
+
+    assert score._get_semantic_runtime() == ("onnx-int8", "onnx/model_quint8_avx2.onnx")
+    assert score._get_semantic_backend() == "onnx-int8"
+
+
+@pytest.mark.parametrize("installed", [("onnxruntime",), ("optimum.onnxruntime",), ()])
+def test_onnx_backend_falls_back_to_torch_without_its_packages(monkeypatch, installed):
+    monkeypatch.setattr(score, "SEMANTIC_BACKEND", "onnx")
+    monkeypatch.setattr(score, "_module_available", _installed(*installed))
+
+    assert score._get_semantic_runtime() == ("torch", None)
+    assert score._get_semantic_backend() == "torch"
+
+
+def test_unknown_backend_falls_back_to_torch(monkeypatch):
+    monkeypatch.setattr(score, "SEMANTIC_BACKEND", "tensorrt")
+
+    assert score._get_semantic_runtime() == ("torch", None)
+
+
+def test_missing_parent_package_is_not_available():
+    assert not score._module_available("no_such_package.onnxruntime")
@@ -0,0 +1,26 @@
+from utils.skill_matcher import SkillMatcher
+
+
+def test_prefixes_are_the_shorter_skills_a_skill_starts_with():
+    matcher = SkillMatcher(["Spring", "spring boot", "spring boot admin", "Go", "golang", "springfield"])
+
+    assert matcher._prefixes == {
+        "spring": (),
+        "spring boot": ("spring",),
+        "spring boot admin": ("spring", "spring boot"),
+        "springfield": ("spring",),
+        "go": (),
+        "golang": ("go",),
+    }
+
+
+def test_overlapping_skills_are_all_found():
+    matcher = SkillMatcher(["spring", "spring boot", "go", "golang"])
+
+    hits = matcher.find_all("Spring Boot services in Golang")
+
+    assert [(hit.skill, hit.text) for hit in hits] == [
+        ("spring", "Spring"),
+        ("spring boot", "Spring Boot"),
+        ("golang", "Golang"),
+    ]
@@ -0,0 +1,73 @@
+import gc
+import weakref
+from concurrent.futures import wait
+
+import pytest
+
+from utils import storage
+from utils.storage import FilePrefetcher
+
+
+class Body:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class FakeS3:
+    def __init__(self, objects: dict[str, bytes]):
+        self._objects = objects
+
+    def get_object(self, Bucket, Key, **kwargs):  # noqa: N803 - boto3's argument names
+        data = self._objects[Key]
+        return {"Body": Body(data), "ContentLength": len(data), "ETag": f'"{Key}"'}
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3({f"key-{index}": bytes([index]) * 100 for index in range(4)})
+    monkeypatch.setattr(storage, "_get_s3_client", lambda: client)
+    monkeypatch.setattr(storage, "_get_bucket", lambda: "bucket")
+    return client
+
+
+def test_prefetcher_yields_files_in_order(s3):
+    keys = [f"key-{index}" for index in range(4)]
+
+    with FilePrefetcher(keys, concurrency=2) as prefetcher:
+        data = [future.result().data for future in prefetcher]
+
+    assert data == [bytes([index]) * 100 for index in range(4)]
+
+
+def test_consumed_futures_are_released_with_their_bytes(s3):
+    keys = [f"key-{index}" for index in range(3)]
+    consumed = []
+
+    with FilePrefetcher(keys, concurrency=1) as prefetcher:
+        for future in prefetcher:
+            future.result()
+            consumed.append(weakref.ref(future))
+            del future
+            gc.collect()
+            # Every earlier future (and so its bytes) is gone once the consumer moved on
+            assert [ref() for ref in consumed[:-1]] == [None] * (len(consumed) - 1)
+
+
+def test_held_bytes_count_against_the_budget_until_released(s3):
+    keys = [f"key-{index}" for index in range(3)]
+
+    with FilePrefetcher(keys, concurrency=3, max_buffered_bytes=200) as prefetcher:
+        files = iter(prefetcher)
+        next(files).result()
+        release = prefetcher.hold()
+        next(files).result()
+
+        # File 0 is still held, so file 2 cannot join file 1 in the buffer
+        third = prefetcher._futures[2]
+        assert not wait([third], timeout=0.2).done
+
+        release()
+        assert third.result(timeout=2).data == bytes([2]) * 100
@@ -0,0 +1,57 @@
+from utils.tracing import report
+
+MS = 1_000_000
+
+
+def _span(trace_id: str, name: str, start_ms: float, end_ms: float, parent: str | None = None, **attributes) -> dict:
+    return {
+        "trace_id": trace_id,
+        "span_id": f"{trace_id}-{name}-{start_ms}",
+        "parent_span_id": parent,
+        "name": name,
+        "start_time_unix_nano": int(start_ms * MS),
+        "end_time_unix_nano": int(end_ms * MS),
+        "attributes": attributes,
+    }
+
+
+def test_fanned_out_session_lasts_until_its_last_subtask():
+    spans = [
+        _span("fan", "session", 0, 5, run_id="run-fan", session_id="s-fan", files=40, mode="fan_out"),
+        _span("fan", "session.files", 10, 300, run_id="run-fan", files=20),
+        _span("fan", "file.extract", 20, 50, parent="fan-session.files-10"),
+        _span("fan", "session.files", 12, 280, run_id="run-fan", files=20),
+        _span("fan", "session.aggregate", 310, 400, run_id="run-fan", files=40),
+        _span("inline", "session", 0, 100, run_id="run-inline", session_id="s-inline", files=3, mode="inline"),
+    ]
+
+    slowest = report(spans)["slowest_sessions"]
+
+    assert [session["run_id"] for session in slowest] == ["run-fan", "run-inline"]
+    assert slowest[0] == {
+        "trace_id": "fan",
+        "session_id": "s-fan",
+        "run_id": "run-fan",
+        "files": 40,
+        "mode": "fan_out",
+        "tasks": 4,
+        "duration_ms": 400.0,
+    }
+    assert slowest[1]["duration_ms"] == 100.0
+
+
+def test_stage_percentiles_cover_every_span():
+    spans = [_span("t", "file.extract", 0, float(ms)) for ms in range(1, 101)]
+
+    stage = report(spans)["stages"]["file.extract"]
+
+    assert stage["count"] == 100
+    assert (stage["p50_ms"], stage["p90_ms"], stage["p99_ms"], stage["max_ms"]) == (50.0, 90.0, 99.0, 100.0)
+
+
+def test_top_n_limits_the_slowest_sessions():
+    spans = [_span(f"t{index}", "session", 0, index, run_id=f"run-{index}") for index in range(1, 6)]
+
+    slowest = report(spans, top_n=2)["slowest_sessions"]
+
+    assert [session["run_id"] for session in slowest] == ["run-5", "run-4"]
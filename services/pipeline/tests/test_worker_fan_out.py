@@ -0,0 +1,96 @@
+import pytest
+from celery.exceptions import ChordError
+
+import worker
+from models import CandidateProfile, FileManifestItem, FileResult, JobPayload, ParsedDocument
+from stages.score import JobContext
+
+
+def _payload(file_count: int = 3) -> dict:
+    files = [
+        FileManifestItem(file_id=file_id, storage_key=f"resumes/{file_id}.txt", original_name=f"{file_id}.txt")
+        for file_id in range(1, file_count + 1)
+    ]
+    return JobPayload(session_id="session-1", run_id="run-1", job_description="Python", files=files).model_dump()
+
+
+def _result(document: ParsedDocument, job, lexical_sim: float, semantic_sim: float) -> FileResult:
+    return FileResult(
+        file_id=document.file.file_id,
+        raw_text=document.raw_text,
+        parsed_profile={},
+        overall_score=semantic_sim,
+        score_breakdown={},
+        summary="",
+    )
+
+
+@pytest.fixture
+def callbacks(monkeypatch):
+    sent = []
+    monkeypatch.setattr(worker, "send_completion", lambda **kwargs: sent.append(("completion", kwargs)))
+    monkeypatch.setattr(worker, "send_error", lambda **kwargs: sent.append(("error", kwargs)))
+    return sent
+
+
+@pytest.fixture
+def eager(monkeypatch, callbacks):
+    # Eager chords run the header in place and hand its results to the body through the memory backend
+    monkeypatch.setattr(worker.app.conf, "task_always_eager", True)
+    monkeypatch.setattr(worker.app.conf, "result_backend", "cache+memory://")
+    monkeypatch.setattr(worker, "SESSION_FANOUT_MIN_FILES", 2)
+    monkeypatch.setattr(worker, "SESSION_FANOUT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(
+        worker,
+        "build_job_context",
+        lambda job_description, embed=True: JobContext(job_description, frozenset(), None, [], None),
+    )
+    monkeypatch.setattr(worker, "score_semantic_batch", lambda texts, job: [float(len(text)) for text in texts])
+    monkeypatch.setattr(worker, "_score_and_summarize", _result)
+
+
+def test_fanned_out_session_sends_one_completion_in_manifest_order(eager, callbacks, monkeypatch):
+    chunks = []
+
+    def extract_and_parse_all(payload, errors, *args):
+        chunks.append([file.file_id for file in payload.files])
+        return [
+            ParsedDocument(file=file, raw_text="x" * file.file_id, profile=CandidateProfile())
+            for file in payload.files
+        ]
+
+    monkeypatch.setattr(worker, "_extract_and_parse_all", extract_and_parse_all)
+
+    worker.process_session.apply(args=(_payload(),), task_id="task-1", throw=True)
+
+    assert chunks == [[1, 2], [3]]
+    ((kind, sent),) = callbacks
+    assert kind == "completion"
+    assert [(result.file_id, result.overall_score) for result in sent["results"]] == [(1, 1.0), (2, 2.0), (3, 3.0)]
+
+
+def test_aggregator_reports_chunk_results_it_cannot_read(callbacks):
+    chunk_results = [{"documents": [{"file": "not a manifest item"}], "semantic_scores": [0.5], "errors": []}]
+
+    result = worker.aggregate_session.apply(args=(chunk_results, _payload()))
+
+    assert result.failed()
+    ((kind, sent),) = callbacks
+    assert kind == "error"
+
+
+def test_chord_failure_sends_an_error_without_results(callbacks):
+    error = ChordError("Dependency task-2 raised RuntimeError('boom')")
+
+    worker.fail_session.apply(args=(None, error, None, _payload()))
+
+    ((kind, sent),) = callbacks
+    assert kind == "error"
+    assert "boom" in sent["error"]
+    assert sent["partial_results"] == []
+
+
+def test_aggregator_failure_is_left_to_the_aggregator(callbacks):
+    worker.fail_session.apply(args=(None, RuntimeError("scoring failed"), None, _payload()))
+
+    assert callbacks == []
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+import worker
+from models import CandidateProfile, FileManifestItem, FileResult, JobPayload, ParsedDocument
+from stages.score import JobContext
+from utils.run_checkpoint import CheckpointStore, RunLeaseUnconfirmedError
+
+
+def _payload(file_count: int = 3) -> dict:
+    files = [
+        FileManifestItem(file_id=file_id, storage_key=f"resumes/{file_id}.txt", original_name=f"{file_id}.txt")
+        for file_id in range(1, file_count + 1)
+    ]
+    return JobPayload(session_id="session-1", run_id="run-1", job_description="Python", files=files).model_dump()
+
+
+def _result(file_id: int) -> FileResult:
+    return FileResult(
+        file_id=file_id,
+        raw_text=f"resume {file_id}",
+        parsed_profile={},
+        overall_score=50.0,
+        score_breakdown={},
+        summary="",
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CheckpointStore(tmp_path)
+    monkeypatch.setattr(worker, "get_checkpoint_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def callbacks(monkeypatch):
+    sent = []
+    monkeypatch.setattr(worker, "send_completion", lambda **kwargs: sent.append(("completion", kwargs)))
+    monkeypatch.setattr(worker, "send_error", lambda **kwargs: sent.append(("error", kwargs)))
+    monkeypatch.setattr(worker, "SESSION_FANOUT_MIN_FILES", 0)
+    monkeypatch.setattr(
+        worker,
+        "build_job_context",
+        lambda job_description: JobContext(job_description, frozenset(), None, [], None),
+    )
+    monkeypatch.setattr(worker, "_score_and_summarize", lambda document, *args: _result(document.file.file_id))
+    return sent
+
+
+def _parsed(payload: JobPayload) -> list[ParsedDocument]:
+    return [
+        ParsedDocument(file=file, raw_text=f"resume {file.file_id}", profile=CandidateProfile())
+        for file in payload.files
+    ]
+
+
+def test_run_resumes_from_checkpoints_and_finishes(store, callbacks, monkeypatch):
+    # A worker died after scoring file 1 and extracting file 2
+    store.acquire("run-1", "dead-worker")
+    store.save_result("run-1", _result(1))
+    store.save_text("run-1", 2, "resume 2")
+    store._db.execute("UPDATE runs SET lease_expires_at = 0")
+
+    extracted = {}
+
+    def extract_and_parse_all(payload, errors, checkpoints, restored_texts, lease):
+        extracted.update(files=[file.file_id for file in payload.files], restored=restored_texts)
+        return _parsed(payload)
+
+    monkeypatch.setattr(worker, "_extract_and_parse_all", extract_and_parse_all)
+
+    worker.process_session.apply(args=(_payload(),), task_id="task-1", throw=True)
+
+    assert extracted == {"files": [2, 3], "restored": {2: "resume 2"}}
+    ((kind, sent),) = callbacks
+    assert kind == "completion"
+    assert sorted(result.file_id for result in sent["results"]) == [1, 2, 3]
+    # Finished runs are skipped on redelivery
+    assert not store.acquire("run-1", "worker-b")
+
+
+def test_run_stops_without_callbacks_once_another_worker_holds_it(store, callbacks, monkeypatch):
+    def extract_and_parse_all(payload, errors, checkpoints, restored_texts, lease):
+        # The lease lapsed and another delivery took the run over
+        store._db.execute("UPDATE runs SET lease_expires_at = 0")
+        store.acquire("run-1", "worker-b")
+        lease.lost.set()
+        return _parsed(payload)
+
+    monkeypatch.setattr(worker, "_extract_and_parse_all", extract_and_parse_all)
+
+    worker.process_session.apply(args=(_payload(),), task_id="task-1", throw=True)
+
+    assert callbacks == []
+    assert store.load("run-1") == ({}, {})
+    # Not marked finished, so the run's new holder still processes it
+    assert store.acquire("run-1", "worker-b")
+
+
+def test_run_keeps_a_lapsed_lease_nobody_took_over(store, callbacks, monkeypatch):
+    def extract_and_parse_all(payload, errors, checkpoints, restored_texts, lease):
+        # A stalled heartbeat let the lease lapse, but no other worker acquired the run
+        store._db.execute("UPDATE runs SET lease_expires_at = 0")
+        lease.renewed(time.monotonic() - lease.lease_seconds)
+        return _parsed(payload)
+
+    monkeypatch.setattr(worker, "_extract_and_parse_all", extract_and_parse_all)
+
+    worker.process_session.apply(args=(_payload(),), task_id="task-1", throw=True)
+
+    ((kind, sent),) = callbacks
+    assert kind == "completion"
+    assert sorted(result.file_id for result in sent["results"]) == [1, 2, 3]
+    assert not store.acquire("run-1", "worker-b")
+
+
+def test_run_retries_when_its_lease_cannot_be_confirmed(store, callbacks, monkeypatch):
+    calls = []
+
+    def extract_and_parse_all(payload, errors, checkpoints, restored_texts, lease):
+        calls.append(lease)
+        if len(calls) == 1:
+            raise RunLeaseUnconfirmedError("run-1")
+        return _parsed(payload)
+
+    monkeypatch.setattr(worker, "_extract_and_parse_all", extract_and_parse_all)
+
+    # Eager retries rerun in place instead of raising Retry
+    result = worker.process_session.apply(args=(_payload(),), task_id="task-1", throw=False)
+
+    assert result.successful()
+    assert len(calls) == 2
+    ((kind, _),) = callbacks
+    assert kind == "completion"
@@ -2,35 +2,155 @@
 
 from __future__ import annotations
 
+import gzip
 import logging
+import os
+import random
+import sqlite3
+import threading
 import time
 
 import httpx
+from pydantic import BaseModel
 
 from config import (
+    CALLBACK_COMPRESS_MIN_BYTES,
+    CALLBACK_CONTENT_ENCODING,
+    CALLBACK_OUTBOX_DIR,
+    CALLBACK_OUTBOX_MAX_AGE_SECONDS,
+    CALLBACK_OUTBOX_MAX_BACKOFF_SECONDS,
+    CALLBACK_PARTIAL_BATCH_SIZE,
+    CALLBACK_PARTIAL_INTERVAL_SECONDS,
     CALLBACK_RETRY_ATTEMPTS,
     CALLBACK_RETRY_BACKOFF,
+    CALLBACK_TIMEOUT_SECONDS,
     PIPELINE_CALLBACK_SECRET,
     PIPELINE_CALLBACK_URL,
     PIPELINE_SECRET_HEADER_NAME,
 )
-from models import JobPayload
+from models import CompletionCallback, ErrorCallback, FileResult, JobPayload, PartialCallback
+from utils.callback_outbox import CallbackOutbox, OutboxEntry, get_callback_outbox
+from utils.metrics import CALLBACK_FAILURES, CALLBACK_RETRIES, CALLBACK_SECONDS
 
 logger = logging.getLogger(__name__)
 headers = {
     PIPELINE_SECRET_HEADER_NAME: PIPELINE_CALLBACK_SECRET,
     "Content-Type": "application/json",
 }
+_client: httpx.Client | None = None
+_zstd_compressor = None
+_sender: threading.Thread | None = None
+_sender_pid: int | None = None
+_sender_wakeup = threading.Event()
 
-def _post_callback(payload: JobPayload, body: dict):
+OUTBOX_POLL_SECONDS = 5.0
+# Entries are claimed one at a time, so each lease only has to outlast a single POST
+OUTBOX_LEASE_SECONDS = CALLBACK_TIMEOUT_SECONDS * 2
+OUTBOX_STATS_LOG_INTERVAL = 60.0
+
+
+def _get_http_client() -> httpx.Client:
+    """Lazily create the keep-alive client reused by every callback in this process.
+
+    HTTP/2 is negotiated when the optional `h2` package is installed.
+    """
+    global _client
+    if _client is None:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+
+        _client = httpx.Client(
+            timeout=CALLBACK_TIMEOUT_SECONDS,
+            http2=http2,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60),
+        )
+    return _client
+
+
+def _reset_http_client():
+    """Drop the pooled client so the next attempt opens a fresh connection."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def _encode_body(body: BaseModel) -> tuple[bytes, str | None]:
+    """Serialize a callback model to JSON bytes, compressing it when configured.
+
+    Returns the body and its content encoding, or None when sent uncompressed.
+    """
+    content = body.model_dump_json().encode("utf-8")
+    if not CALLBACK_CONTENT_ENCODING or len(content) < CALLBACK_COMPRESS_MIN_BYTES:
+        return content, None
+
+    if CALLBACK_CONTENT_ENCODING == "gzip":
+        return gzip.compress(content, compresslevel=5), "gzip"
+
+    if CALLBACK_CONTENT_ENCODING == "zstd":
+        compressor = _get_zstd_compressor()
+        if compressor is not None:
+            return compressor.compress(content), "zstd"
+        return content, None
+
+    logger.warning("Unsupported callback content encoding", extra={"encoding": CALLBACK_CONTENT_ENCODING})
+    return content, None
+
+
+def _request_headers(content_encoding: str | None) -> dict[str, str]:
+    if content_encoding is None:
+        return headers
+    return {**headers, "Content-Encoding": content_encoding}
+
+
+def _send(content: bytes, content_encoding: str | None, callback_type: str, attempt: int = 0):
+    """POST an encoded callback body once, raising httpx errors."""
+    if attempt:
+        CALLBACK_RETRIES.inc(type=callback_type)
+
+    try:
+        with CALLBACK_SECONDS.time(type=callback_type):
+            response = _get_http_client().post(
+                PIPELINE_CALLBACK_URL,
+                content=content,
+                headers=_request_headers(content_encoding),
+            )
+            response.raise_for_status()
+    except httpx.TransportError:
+        CALLBACK_FAILURES.inc(type=callback_type)
+        # The pooled connection may be dead; don't reuse it for the retry
+        _reset_http_client()
+        raise
+    except httpx.HTTPError:
+        CALLBACK_FAILURES.inc(type=callback_type)
+        raise
+
+
+def _get_zstd_compressor():
+    """Lazily create a zstd compressor, or return None when `zstandard` is not installed."""
+    global _zstd_compressor
+    if _zstd_compressor is None:
+        try:
+            import zstandard
+        except ImportError:
+            logger.warning("zstandard is not installed, sending callbacks uncompressed")
+            _zstd_compressor = False
+        else:
+            _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    return _zstd_compressor or None
+
+
+def _post_callback(payload: JobPayload, body: BaseModel):
     """POST a callback to the Elysia API with retry logic."""
+    content, content_encoding = _encode_body(body)
     last_error: Exception | None = None
 
     for attempt in range(CALLBACK_RETRY_ATTEMPTS):
         try:
-            with httpx.Client(timeout=30) as client:
-                response = client.post(PIPELINE_CALLBACK_URL, json=body, headers=headers)
-                response.raise_for_status()
+            _send(content, content_encoding, body.type, attempt)
 
             return
 
@@ -45,41 +165,230 @@ def _post_callback(payload: JobPayload, body: dict):
         # extra={
         #     "session_id": payload.session_id,
         #     "run_id": payload.run_id,
-        #     "type": body.get("type"),
+        #     "type": body.type,
         #     "error": str(last_error),
         # },
     )
     raise RuntimeError(f"Failed to send callback after {CALLBACK_RETRY_ATTEMPTS} attempts: {last_error}")
 
 
-def send_completion(payload: JobPayload, results: list[dict]):
-    """Send a completion callback with all results."""
-    body = {
-        "type": "completion",
-        "session_id": payload.session_id,
-        "run_id": payload.run_id,
-        "status": "completed",
-        "results": results,
-    }
+def _deliver(
+    payload: JobPayload,
+    body: CompletionCallback | ErrorCallback | PartialCallback,
+    delivery_key: str | None = None,
+):
+    """Queue a callback in the outbox, or POST it synchronously when the outbox is disabled.
+
+    Queued callbacks are sent by a background thread, so the task can return
+    as soon as the body is on disk. `delivery_key` defaults to the run ID,
+    which keeps one terminal callback per run.
+    """
+    outbox = get_callback_outbox()
+    if outbox is not None:
+        content, content_encoding = _encode_body(body)
+        try:
+            outbox.enqueue(
+                delivery_key or payload.run_id,
+                payload.session_id,
+                payload.run_id,
+                body.type,
+                content,
+                content_encoding,
+            )
+        except sqlite3.Error as error:
+            logger.error(
+                "Could not queue callback, sending it inline",
+                extra={"session_id": payload.session_id, "run_id": payload.run_id, "error": str(error)},
+            )
+        else:
+            start_outbox_sender()
+            _sender_wakeup.set()
+            return
+
     _post_callback(payload, body)
 
 
+def start_outbox_sender():
+    """Start the background outbox sender for this process, if the outbox is enabled."""
+    global _sender, _sender_pid
+    if not CALLBACK_OUTBOX_DIR:
+        return
+
+    # A forked child inherits the parent's thread object but not the thread
+    if _sender is not None and _sender_pid == os.getpid() and _sender.is_alive():
+        return
+
+    _sender = threading.Thread(target=_run_outbox_sender, name="callback-outbox", daemon=True)
+    _sender_pid = os.getpid()
+    _sender.start()
+
+
+def _run_outbox_sender():
+    # SQLite connections are per-thread, so the sender opens its own
+    outbox = CallbackOutbox(CALLBACK_OUTBOX_DIR)
+    last_stats_log = 0.0
+
+    while True:
+        try:
+            entries = outbox.claim_due(1, lease_seconds=OUTBOX_LEASE_SECONDS)
+            for entry in entries:
+                _deliver_outbox_entry(outbox, entry)
+
+            if time.monotonic() - last_stats_log >= OUTBOX_STATS_LOG_INTERVAL:
+                stats = outbox.stats()
+                if stats["depth"] or stats["dead"]:
+                    logger.warning("Callback outbox backlog", extra=stats)
+                last_stats_log = time.monotonic()
+
+            if entries:
+                continue
+            wait = outbox.seconds_until_due()
+        except sqlite3.Error as error:
+            logger.error("Callback outbox unavailable", extra={"error": str(error)})
+            wait = OUTBOX_POLL_SECONDS
+
+        _sender_wakeup.wait(OUTBOX_POLL_SECONDS if wait is None else min(wait, OUTBOX_POLL_SECONDS))
+        _sender_wakeup.clear()
+
+
+def _deliver_outbox_entry(outbox: CallbackOutbox, entry: OutboxEntry):
+    try:
+        _send(entry.content, entry.content_encoding, entry.type, entry.attempts)
+    except httpx.HTTPError as error:
+        retry_at = _next_attempt_at(entry, error)
+        outbox.mark_failed(entry.id, str(error), retry_at)
+        if retry_at is None:
+            logger.error(
+                "Giving up on callback",
+                extra={
+                    "session_id": entry.session_id,
+                    "run_id": entry.run_id,
+                    "type": entry.type,
+                    "attempts": entry.attempts + 1,
+                    "error": str(error),
+                },
+            )
+        return
+
+    outbox.mark_delivered(entry.id)
+
+
+def _next_attempt_at(entry: OutboxEntry, error: httpx.HTTPError) -> float | None:
+    """Return when to retry a failed delivery, or None to give up on it."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        # Other client errors will fail the same way every time
+        if 400 <= status_code < 500 and status_code not in (408, 429):
+            return None
+
+    if time.time() - entry.created_at > CALLBACK_OUTBOX_MAX_AGE_SECONDS:
+        return None
+
+    # Full jitter, so workers that lost the API at the same moment don't retry in lockstep
+    ceiling = min(CALLBACK_OUTBOX_MAX_BACKOFF_SECONDS, CALLBACK_RETRY_BACKOFF[0] * 2 ** entry.attempts)
+    return time.time() + random.uniform(0, ceiling)
+
+
+class ResultBatcher:
+    """Collect a session's results and flush them early as `partial` callbacks.
+
+    With CALLBACK_PARTIAL_BATCH_SIZE > 0, pending results are sent every that
+    many results or every CALLBACK_PARTIAL_INTERVAL_SECONDS, whichever comes
+    first. A batch that cannot be sent stays pending and goes out with the next
+    batch or the terminal callback. When disabled, every result stays pending
+    for the terminal callback, as before.
+    """
+
+    def __init__(self, payload: JobPayload, batch_size: int = CALLBACK_PARTIAL_BATCH_SIZE):
+        self.payload = payload
+        self.batch_size = batch_size
+        self.pending: list[FileResult] = []
+        self.sent = 0
+        self.batches = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.batch_size > 0
+
+    @property
+    def total(self) -> int:
+        return self.sent + len(self.pending)
+
+    @property
+    def total_results(self) -> int | None:
+        """The run's result count for the terminal callback, or None if nothing went out early."""
+        return self.total if self.batches else None
+
+    def add(self, result: FileResult):
+        self.pending.append(result)
+        if not self.enabled:
+            return
+
+        if (
+            len(self.pending) >= self.batch_size
+            or time.monotonic() - self._last_flush >= CALLBACK_PARTIAL_INTERVAL_SECONDS
+        ):
+            self.flush()
+
+    def flush(self):
+        """Send pending results as one `partial` callback."""
+        self._last_flush = time.monotonic()
+        if not self.pending:
+            return
+
+        if send_partial(self.payload, self.batches, self.pending):
+            self.sent += len(self.pending)
+            self.batches += 1
+            self.pending = []
+
+
+def send_partial(payload: JobPayload, batch: int, results: list[FileResult]) -> bool:
+    """Send one batch of results ahead of completion, returning False if it could not be sent."""
+    body = PartialCallback(
+        session_id=payload.session_id,
+        run_id=payload.run_id,
+        batch=batch,
+        results=results,
+    )
+    try:
+        _deliver(payload, body, delivery_key=f"{payload.run_id}:partial:{batch}")
+    except RuntimeError:
+        logger.warning(
+            "Partial callback failed, keeping results for the next callback",
+            extra={"session_id": payload.session_id, "run_id": payload.run_id, "batch": batch},
+        )
+        return False
+    return True
+
+
+def send_completion(payload: JobPayload, results: list[FileResult], total_results: int | None = None):
+    """Send a completion callback with all results, or the remainder after partial callbacks."""
+    body = CompletionCallback(
+        session_id=payload.session_id,
+        run_id=payload.run_id,
+        results=results,
+        total_results=total_results,
+    )
+    _deliver(payload, body)
+
+
 def send_error(
     payload: JobPayload,
     error: str,
-    partial_results: list[dict] | None = None,
+    partial_results: list[FileResult] | None = None,
+    total_results: int | None = None,
 ):
     """Send an error callback."""
-    body = {
-        "type": "error",
-        "session_id": payload.session_id,
-        "run_id": payload.run_id,
-        "status": "failed",
-        "error": error,
-        "partial_results": partial_results or [],
-    }
+    body = ErrorCallback(
+        session_id=payload.session_id,
+        run_id=payload.run_id,
+        error=error,
+        partial_results=partial_results or [],
+        total_results=total_results,
+    )
     try:
-        _post_callback(payload, body)
+        _deliver(payload, body)
     except RuntimeError:
         logger.error(
             "Error callback failed",
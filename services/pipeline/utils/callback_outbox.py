@@ -0,0 +1,200 @@
+"""Durable local outbox for callbacks awaiting delivery to the Elysia API.
+
+Run `python -m utils.callback_outbox` to print the outbox depth and age, or
+`python -m utils.callback_outbox --retry-dead` to requeue callbacks that were
+given up on.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from config import CALLBACK_OUTBOX_DIR
+
+logger = logging.getLogger(__name__)
+
+_outbox: CallbackOutbox | None = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS callbacks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    delivery_key TEXT NOT NULL UNIQUE,
+    session_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content BLOB NOT NULL,
+    content_encoding TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS callbacks_due ON callbacks (state, next_attempt_at);
+CREATE INDEX IF NOT EXISTS callbacks_run ON callbacks (run_id, created_at);
+"""
+
+# A pending row whose run has no earlier row left, pending or dead, so a run's callbacks arrive in order
+_DELIVERABLE = """
+state = 'pending' AND NOT EXISTS (
+    SELECT 1 FROM callbacks earlier
+    WHERE earlier.run_id = callbacks.run_id
+    AND (
+        earlier.created_at < callbacks.created_at
+        OR (earlier.created_at = callbacks.created_at AND earlier.id < callbacks.id)
+    )
+)
+"""
+
+
+class OutboxEntry(NamedTuple):
+    """A claimed callback, ready to POST."""
+
+    id: int
+    session_id: str
+    run_id: str
+    type: str
+    content: bytes
+    content_encoding: str | None
+    attempts: int
+    created_at: float
+
+
+class CallbackOutbox:
+    """SQLite-backed queue of encoded callback bodies.
+
+    Each row is keyed by a delivery key, which is the run ID for terminal
+    callbacks. Enqueuing again for the same key replaces the pending body, so a
+    redelivered task never queues a second completion for one run. Rows are
+    claimed under a lease, so several worker processes can share one outbox
+    directory without double-sending. Rows that cannot be delivered move to the
+    `dead` state rather than being deleted.
+
+    A run's rows are delivered one at a time in `created_at` order: a partial
+    waiting on backoff, or dead, holds back the run's later partials and its
+    terminal callback, so the API never sees a finished run with rows missing.
+    """
+
+    def __init__(self, directory: str | Path):
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path / "callbacks.sqlite3", timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # FULL, not NORMAL: a queued callback must survive a power loss once enqueue returns
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def enqueue(
+        self,
+        delivery_key: str,
+        session_id: str,
+        run_id: str,
+        callback_type: str,
+        content: bytes,
+        content_encoding: str | None = None,
+    ):
+        """Durably store a callback body, replacing any pending body with the same key."""
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO callbacks "
+            "(delivery_key, session_id, run_id, type, content, content_encoding, created_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (delivery_key, session_id, run_id, callback_type, content, content_encoding, now, now),
+        )
+
+    def claim_due(self, limit: int, lease_seconds: float) -> list[OutboxEntry]:
+        """Return up to `limit` due callbacks, oldest first, leasing them to the caller.
+
+        Only the oldest remaining row of each run can be claimed.
+        """
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT id, session_id, run_id, type, content, content_encoding, attempts, created_at "
+                f"FROM callbacks WHERE {_DELIVERABLE} AND next_attempt_at <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE callbacks SET next_attempt_at = ? WHERE id = ?",
+                [(now + lease_seconds, row[0]) for row in rows],
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        return [OutboxEntry(*row) for row in rows]
+
+    def mark_delivered(self, entry_id: int):
+        self._db.execute("DELETE FROM callbacks WHERE id = ?", (entry_id,))
+
+    def mark_failed(self, entry_id: int, error: str, retry_at: float | None):
+        """Record a failed attempt. A `retry_at` of None gives up on the callback."""
+        if retry_at is None:
+            self._db.execute(
+                "UPDATE callbacks SET state = 'dead', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error, entry_id),
+            )
+        else:
+            self._db.execute(
+                "UPDATE callbacks SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (retry_at, error, entry_id),
+            )
+
+    def seconds_until_due(self) -> float | None:
+        """Return how long until the next claimable callback is due, or None when none can be claimed."""
+        (next_attempt_at,) = self._db.execute(
+            f"SELECT MIN(next_attempt_at) FROM callbacks WHERE {_DELIVERABLE}"
+        ).fetchone()
+        if next_attempt_at is None:
+            return None
+        return max(0.0, next_attempt_at - time.time())
+
+    def retry_dead(self) -> int:
+        """Move every dead callback back to pending, returning how many were requeued."""
+        cursor = self._db.execute(
+            "UPDATE callbacks SET state = 'pending', attempts = 0, next_attempt_at = ? WHERE state = 'dead'",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        depth, oldest, dead = self._db.execute(
+            "SELECT COUNT(*) FILTER (WHERE state = 'pending'), "
+            "MIN(created_at) FILTER (WHERE state = 'pending'), "
+            "COUNT(*) FILTER (WHERE state = 'dead') FROM callbacks"
+        ).fetchone()
+        return {
+            "depth": depth,
+            "oldest_age_seconds": round(time.time() - oldest, 1) if oldest is not None else 0.0,
+            "dead": dead,
+        }
+
+
+def get_callback_outbox() -> CallbackOutbox | None:
+    """Return the process-wide outbox, or None when CALLBACK_OUTBOX_DIR is unset."""
+    global _outbox
+    if not CALLBACK_OUTBOX_DIR:
+        return None
+
+    if _outbox is None:
+        _outbox = CallbackOutbox(CALLBACK_OUTBOX_DIR)
+    return _outbox
+
+
+if __name__ == "__main__":
+    outbox = get_callback_outbox()
+    if outbox is None:
+        sys.exit("CALLBACK_OUTBOX_DIR is not set")
+
+    if "--retry-dead" in sys.argv[1:]:
+        print(f"Requeued {outbox.retry_dead()} dead callbacks")
+    print(json.dumps(outbox.stats()))
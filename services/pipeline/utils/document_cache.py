@@ -0,0 +1,189 @@
+"""Content-addressed local cache of extracted text and parsed profiles."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from config import DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_BYTES
+from models import CandidateProfile
+
+logger = logging.getLogger(__name__)
+
+_cache: DocumentCache | None = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    content_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    raw_text TEXT NOT NULL,
+    profile TEXT,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (content_hash, version)
+);
+CREATE INDEX IF NOT EXISTS documents_last_access ON documents (last_access);
+CREATE TABLE IF NOT EXISTS objects (
+    storage_key TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+class DocumentCache:
+    """SQLite-backed cache of `raw_text` and `CandidateProfile`, keyed by file bytes.
+
+    Entries are keyed by the SHA-256 of the file bytes plus a `version` string
+    that captures the pipeline, model, and taxonomy versions, so changing any of
+    them misses naturally. A side table maps `storage_key` + ETag to the content
+    hash, letting the worker skip downloads of objects it has already seen.
+    Least-recently-used entries are evicted once the stored text and profiles
+    exceed `max_bytes`.
+    """
+
+    def __init__(self, directory: str | Path, version: str, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES):
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path / "documents.sqlite3", timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, content_hash: str) -> tuple[str, CandidateProfile | None] | None:
+        """Return the cached (raw_text, profile) for a content hash, counting the hit or miss."""
+        document = self._lookup(content_hash)
+        if document is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return document
+
+    def get_by_object(self, storage_key: str, etag: str) -> tuple[str, CandidateProfile | None] | None:
+        """Look up a cached document by storage key and ETag, without the file bytes.
+
+        Only hits are counted: on a miss the caller downloads the file and
+        looks it up with `get`, which counts the file's one miss.
+        """
+        row = self._db.execute(
+            "SELECT content_hash FROM objects WHERE storage_key = ? AND etag = ?",
+            (storage_key, etag),
+        ).fetchone()
+        document = self._lookup(row[0]) if row is not None else None
+        if document is not None:
+            self.hits += 1
+        return document
+
+    def known_etags(self, storage_keys: list[str]) -> dict[str, str]:
+        """Return the last seen ETag for each storage key that has a cached document."""
+        if not storage_keys:
+            return {}
+
+        placeholders = ",".join("?" * len(storage_keys))
+        rows = self._db.execute(
+            f"SELECT o.storage_key, o.etag FROM objects o JOIN documents d "
+            f"ON d.content_hash = o.content_hash AND d.version = ? "
+            f"WHERE o.storage_key IN ({placeholders})",
+            (self.version, *storage_keys),
+        ).fetchall()
+        return dict(rows)
+
+    def put(
+        self,
+        content_hash: str,
+        raw_text: str,
+        profile: CandidateProfile | None,
+        storage_key: str | None = None,
+        etag: str | None = None,
+    ):
+        """Store a document and optionally remember which object it came from."""
+        profile_json = profile.model_dump_json() if profile is not None else None
+        size = len(raw_text.encode("utf-8")) + len(profile_json or "")
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (content_hash, version, raw_text, profile, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, self.version, raw_text, profile_json, size, time.time()),
+            )
+            if storage_key and etag:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO objects (storage_key, etag, content_hash) VALUES (?, ?, ?)",
+                    (storage_key, etag, content_hash),
+                )
+            self._evict()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self._db.close()
+
+    def stats(self) -> dict:
+        entries, total_bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total_bytes}
+
+    def _lookup(self, content_hash: str) -> tuple[str, CandidateProfile | None] | None:
+        row = self._db.execute(
+            "SELECT raw_text, profile FROM documents WHERE content_hash = ? AND version = ?",
+            (content_hash, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute(
+            "UPDATE documents SET last_access = ? WHERE content_hash = ? AND version = ?",
+            (time.time(), content_hash, self.version),
+        )
+        raw_text, profile = row
+        return raw_text, CandidateProfile.model_validate_json(profile) if profile else None
+
+    def _evict(self):
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% so a full cache doesn't evict on every insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims: list[tuple[str, str]] = []
+        for content_hash, version, size in self._db.execute(
+            "SELECT content_hash, version, size FROM documents ORDER BY last_access"
+        ):
+            victims.append((content_hash, version))
+            freed += size
+            if freed >= target:
+                break
+
+        self._db.executemany("DELETE FROM documents WHERE content_hash = ? AND version = ?", victims)
+        self._db.execute(
+            "DELETE FROM objects WHERE content_hash NOT IN (SELECT content_hash FROM documents)"
+        )
+        logger.info("Evicted cached documents", extra={"count": len(victims), "bytes": freed})
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def get_document_cache(version: str) -> DocumentCache | None:
+    """Return the process-wide cache, or None when DOCUMENT_CACHE_DIR is unset."""
+    global _cache
+    if not DOCUMENT_CACHE_DIR:
+        return None
+
+    if _cache is None or _cache.version != version:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+        _cache = DocumentCache(DOCUMENT_CACHE_DIR, version)
+    return _cache
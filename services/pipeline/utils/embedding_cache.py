@@ -0,0 +1,221 @@
+"""Host-wide persistent cache of semantic embeddings backed by a memory-mapped float16 matrix."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+_cache: EmbeddingCache | None = None
+
+STORAGE_DTYPE = np.float16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    text_hash TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+"""
+
+
+class EmbeddingCache:
+    """Append-only float16 vector store shared by every worker process on a host.
+
+    Vectors live in `vectors.<generation>.f16`, a flat row-major matrix that
+    readers memory-map, so a lookup is a slice of the mapping rather than a
+    read. A small SQLite index maps text hashes to rows. Its write lock also
+    serializes appends across processes, so no extra file locking is needed.
+
+    Each namespace (model name, backend, max chars) gets its own directory.
+    When the matrix outgrows `max_bytes`, the most recently used half is
+    compacted into a new generation file. Readers notice the generation change
+    and remap.
+    """
+
+    def __init__(self, directory: str | Path, namespace: str, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+        self.namespace = namespace
+        self.path = Path(directory) / digest
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(self.path / "index.sqlite3", timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._mapped_generation: int | None = None
+        self._matrix: np.memmap | None = None
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Return the cached float32 embedding for each text, or None where missing."""
+        found: list[np.ndarray | None] = [None] * len(texts)
+        if not texts:
+            return found
+
+        hashes = [_text_hash(text) for text in texts]
+        placeholders = ",".join("?" * len(set(hashes)))
+        self._db.execute("BEGIN")
+        try:
+            generation, dim = self._read_meta()
+            rows = dict(self._db.execute(
+                f"SELECT text_hash, row FROM vectors WHERE text_hash IN ({placeholders})",
+                tuple(set(hashes)),
+            ).fetchall())
+        finally:
+            self._db.execute("COMMIT")
+
+        matrix = self._map(generation, dim) if rows else None
+        for i, text_hash in enumerate(hashes):
+            row = rows.get(text_hash)
+            if matrix is not None and row is not None and row < matrix.shape[0]:
+                found[i] = np.asarray(matrix[row], dtype=np.float32)
+
+        hit_hashes = [(time.time(), text_hash) for text_hash, vector in zip(hashes, found) if vector is not None]
+        self.hits += len(hit_hashes)
+        self.misses += len(texts) - len(hit_hashes)
+        if hit_hashes:
+            self._db.executemany("UPDATE vectors SET last_access = ? WHERE text_hash = ?", hit_hashes)
+
+        return found
+
+    def put_many(self, texts: list[str], embeddings: np.ndarray):
+        """Append embeddings for texts not already stored."""
+        if not texts:
+            return
+
+        vectors = np.ascontiguousarray(embeddings, dtype=STORAGE_DTYPE)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            generation, dim = self._read_meta()
+            if dim != vectors.shape[1]:
+                # First write, or the model's dimension changed under the same name: start over
+                self._remove_vector_file(generation)
+                generation, dim = generation + 1, vectors.shape[1]
+                self._db.execute("DELETE FROM vectors")
+                self._write_meta(generation, dim)
+
+            existing = {
+                row[0] for row in self._db.execute(
+                    f"SELECT text_hash FROM vectors WHERE text_hash IN ({','.join('?' * len(texts))})",
+                    tuple(_text_hash(text) for text in texts),
+                )
+            }
+            new: dict[str, np.ndarray] = {}
+            for text, vector in zip(texts, vectors):
+                text_hash = _text_hash(text)
+                if text_hash not in existing:
+                    new.setdefault(text_hash, vector)
+
+            if new:
+                vector_file = self._vector_file(generation)
+                with open(vector_file, "ab") as f:
+                    first_row = f.tell() // (dim * 2)
+                    f.write(np.stack(list(new.values())).tobytes())
+
+                now = time.time()
+                self._db.executemany(
+                    "INSERT INTO vectors (text_hash, row, last_access) VALUES (?, ?, ?)",
+                    [(text_hash, first_row + offset, now) for offset, text_hash in enumerate(new)],
+                )
+                if (first_row + len(new)) * dim * 2 > self.max_bytes:
+                    self._compact(generation, dim)
+
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        (entries,) = self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def _compact(self, generation: int, dim: int):
+        """Rewrite the most recently used half of the rows into a new generation file."""
+        keep_rows = max(1, self.max_bytes // (dim * 2) // 2)
+        kept = self._db.execute(
+            "SELECT text_hash, row FROM vectors ORDER BY last_access DESC LIMIT ?",
+            (keep_rows,),
+        ).fetchall()
+
+        source = np.memmap(self._vector_file(generation), dtype=np.float16, mode="r").reshape(-1, dim)
+        new_generation = generation + 1
+        with open(self._vector_file(new_generation), "wb") as f:
+            f.write(np.ascontiguousarray(source[[row for _, row in kept]]).tobytes())
+        del source
+
+        self._db.execute("DELETE FROM vectors")
+        now = time.time()
+        self._db.executemany(
+            "INSERT INTO vectors (text_hash, row, last_access) VALUES (?, ?, ?)",
+            [(text_hash, new_row, now) for new_row, (text_hash, _) in enumerate(kept)],
+        )
+        self._write_meta(new_generation, dim)
+
+        # Processes still mapping the old file keep its inode alive until they remap
+        self._remove_vector_file(generation)
+        logger.info("Compacted embedding cache", extra={"kept": len(kept), "generation": new_generation})
+
+    def _map(self, generation: int, dim: int) -> np.memmap | None:
+        vector_file = self._vector_file(generation)
+        rows = vector_file.stat().st_size // (dim * 2) if vector_file.exists() else 0
+        if rows == 0:
+            return None
+
+        # Remap after a compaction or once other processes have appended past our mapping
+        if self._mapped_generation != generation or self._matrix is None or self._matrix.shape[0] < rows:
+            self._matrix = np.memmap(vector_file, dtype=np.float16, mode="r", shape=(rows, dim))
+            self._mapped_generation = generation
+        return self._matrix
+
+    def _read_meta(self) -> tuple[int, int]:
+        meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        return meta.get("generation", 0), meta.get("dim", 0)
+
+    def _write_meta(self, generation: int, dim: int):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("generation", generation), ("dim", dim)],
+        )
+
+    def _remove_vector_file(self, generation: int):
+        try:
+            os.remove(self._vector_file(generation))
+        except OSError:
+            pass
+
+    def _vector_file(self, generation: int) -> Path:
+        return self.path / f"vectors.{generation}.f16"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def at_storage_precision(embeddings: np.ndarray) -> np.ndarray:
+    """Round float32 embeddings to the precision cache hits come back at, keeping float32."""
+    return np.asarray(embeddings, dtype=STORAGE_DTYPE).astype(np.float32)
+
+
+def get_embedding_cache(namespace: str) -> EmbeddingCache | None:
+    """Return the process-wide cache for a namespace, or None when EMBEDDING_CACHE_DIR is unset."""
+    global _cache
+    if not EMBEDDING_CACHE_DIR:
+        return None
+
+    if _cache is None or _cache.namespace != namespace:
+        _cache = EmbeddingCache(EMBEDDING_CACHE_DIR, namespace)
+    return _cache
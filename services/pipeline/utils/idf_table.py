@@ -0,0 +1,152 @@
+"""Corpus IDF table for hashed lexical features, stored as a memory-mapped float32 array.
+
+Rebuild the table from a directory of historical resumes with:
+    python -m utils.idf_table <texts_dir> <output_dir> [n_features]
+
+Every `.txt`, `.pdf`, and `.docx` file under `texts_dir` counts as one document.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from config import LEXICAL_HASH_FEATURES, LEXICAL_IDF_DIR
+
+logger = logging.getLogger(__name__)
+
+_table: IdfTable | None = None
+_load_failed = False
+
+IDF_FILE = "idf.f32"
+META_FILE = "meta.json"
+
+
+# Magic, n_features, documents, built_at; 24 bytes keeps the float32 weights aligned
+_HEADER = struct.Struct("<4sIqd")
+_MAGIC = b"IDF1"
+
+
+class IdfTable:
+    """Read-only IDF weights indexed by hashed feature, shared through the page cache.
+
+    The header of `idf.f32` records how the table was built, so one atomic
+    rename publishes the weights together with their `n_features`; `meta.json`
+    is a readable copy for operators. Scoring hashes terms into the same
+    `n_features` columns, so the table and the vectorizer always agree.
+    """
+
+    def __init__(self, directory: str | Path):
+        path = Path(directory) / IDF_FILE
+        with path.open("rb") as file:
+            header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:4] != _MAGIC:
+            raise ValueError(f"{path} has no IDF table header; rebuild it with python -m utils.idf_table")
+
+        _, self.n_features, self.documents, self.built_at = _HEADER.unpack(header)
+        expected_size = _HEADER.size + 4 * self.n_features
+        if path.stat().st_size != expected_size:
+            raise ValueError(f"{path} holds {path.stat().st_size} bytes, expected {expected_size}")
+        self.idf = np.memmap(path, dtype=np.float32, mode="r", offset=_HEADER.size, shape=(self.n_features,))
+
+
+def build_idf_table(
+    term_lists: Iterable[list[str]],
+    output_dir: str | Path,
+    n_features: int = LEXICAL_HASH_FEATURES,
+) -> int:
+    """Count hashed document frequencies over analyzed documents and write a smoothed IDF table.
+
+    Uses the same smoothing as scikit-learn's TfidfTransformer:
+    `idf = ln((1 + n) / (1 + df)) + 1`. Returns the number of documents counted.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    vectorizer = HashingVectorizer(
+        n_features=n_features,
+        analyzer=_identity_analyzer,
+        alternate_sign=False,
+        norm=None,
+        binary=True,
+    )
+    document_frequency = np.zeros(n_features, dtype=np.int64)
+    documents = 0
+
+    batch: list[list[str]] = []
+    for terms in term_lists:
+        batch.append(terms)
+        if len(batch) >= 256:
+            document_frequency += _count_documents(vectorizer, batch)
+            documents += len(batch)
+            batch = []
+    if batch:
+        document_frequency += _count_documents(vectorizer, batch)
+        documents += len(batch)
+
+    idf = (np.log((1 + documents) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    path = Path(output_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    built_at = time.time()
+    # Write then rename so running workers never map a half-written table
+    with (path / f"{IDF_FILE}.tmp").open("wb") as file:
+        file.write(_HEADER.pack(_MAGIC, n_features, documents, built_at))
+        idf.tofile(file)
+    os.replace(path / f"{IDF_FILE}.tmp", path / IDF_FILE)
+    (path / f"{META_FILE}.tmp").write_text(
+        json.dumps({"n_features": n_features, "documents": documents, "built_at": built_at})
+    )
+    os.replace(path / f"{META_FILE}.tmp", path / META_FILE)
+    return documents
+
+
+def _count_documents(vectorizer, batch: list[list[str]]) -> np.ndarray:
+    return np.asarray(vectorizer.transform(batch).sum(axis=0)).ravel().astype(np.int64)
+
+
+def _identity_analyzer(terms: list[str]) -> list[str]:
+    """Pass pre-analyzed terms through, for the vectorizers here and in the score stage."""
+    return terms
+
+
+def get_idf_table() -> IdfTable | None:
+    """Return the process-wide IDF table, or None when LEXICAL_IDF_DIR is unset or unreadable."""
+    global _table, _load_failed
+    if _table is None and LEXICAL_IDF_DIR and not _load_failed:
+        try:
+            _table = IdfTable(LEXICAL_IDF_DIR)
+        except (OSError, ValueError, KeyError) as error:
+            _load_failed = True
+            logger.error("Could not load lexical IDF table", extra={"path": LEXICAL_IDF_DIR, "error": str(error)})
+    return _table
+
+
+def _iter_corpus_terms(texts_dir: Path):
+    from stages.extract import extract_text
+    from stages.score import _analyze_terms
+
+    for file_path in sorted(texts_dir.rglob("*")):
+        if file_path.suffix.lower() not in (".txt", ".pdf", ".docx") or not file_path.is_file():
+            continue
+        text = extract_text(file_path.read_bytes(), file_path.name)
+        if text.strip():
+            yield _analyze_terms(text)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+
+    started = time.perf_counter()
+    n_features = int(sys.argv[3]) if len(sys.argv) > 3 else LEXICAL_HASH_FEATURES
+    count = build_idf_table(_iter_corpus_terms(Path(sys.argv[1])), sys.argv[2], n_features)
+    seconds = round(time.perf_counter() - started, 2)
+    print(json.dumps({"documents": count, "n_features": n_features, "seconds": seconds}))
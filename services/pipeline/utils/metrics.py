@@ -0,0 +1,296 @@
+"""Per-stage worker metrics in the Prometheus text exposition format.
+
+Metrics are kept in process memory. With METRICS_PORT set, the main worker
+process serves them at `http://<host>:<port>/metrics`. With METRICS_DIR set,
+every process (prefork children and intra-session pool workers included)
+also writes its values to `<pid>-<id>.json` in that directory after each
+task, and the endpoint sums them, so one scrape covers the whole worker. The
+random per-process id keeps a process that reuses a dead one's pid from
+overwriting its totals.
+
+Run `python -m utils.metrics` to print the values collected in METRICS_DIR.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from config import METRICS_DIR, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+_registry: dict[str, Counter | Histogram] = {}
+_server: ThreadingHTTPServer | None = None
+_snapshot_name = f"{os.getpid()}-{uuid.uuid4().hex[:12]}.json"
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BYTES_BUCKETS = (1024, 10 * 1024, 50 * 1024, 100 * 1024, 250 * 1024, 500 * 1024, 1024**2, 5 * 1024**2, 20 * 1024**2)
+CHARS_BUCKETS = (500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 200000)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = _label_key(self, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {json.dumps(key): value for key, value in self._values.items()}
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+class Histogram:
+    """Cumulative histogram with optional labels, stored as per-bucket counts plus sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(self, labels)
+        with self._lock:
+            # One count per bucket, then +Inf, then the sum
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict[str, list[float]]:
+        with self._lock:
+            return {json.dumps(key): list(counts) for key, counts in self._values.items()}
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Time spent in a pipeline stage; batched stages observe one value per batch.",
+    ("stage",),
+)
+STAGE_FILES = Counter(
+    "pipeline_stage_files_total",
+    "Files processed by a pipeline stage; divide stage seconds by this for the per-file mean.",
+    ("stage",),
+)
+DOCUMENT_BYTES = Histogram("pipeline_document_bytes", "Size of downloaded resume files.", buckets=BYTES_BUCKETS)
+DOCUMENT_CHARS = Histogram("pipeline_document_chars", "Characters of extracted resume text.", buckets=CHARS_BUCKETS)
+SEMANTIC_FALLBACKS = Counter(
+    "pipeline_semantic_fallback_total",
+    "Resumes scored with the spaCy vector fallback instead of the sentence-transformer.",
+)
+SESSION_FILES = Histogram("pipeline_session_files", "Files per profiling session.", buckets=COUNT_BUCKETS)
+SESSION_SECONDS = Histogram("pipeline_session_seconds", "Wall time of a session task.", ("mode",))
+SESSIONS = Counter("pipeline_sessions_total", "Finished sessions by outcome.", ("outcome",))
+QUEUE_WAIT_SECONDS = Histogram(
+    "pipeline_queue_wait_seconds",
+    "Time from the API publishing a session to a worker starting it.",
+    ("queue",),
+)
+CALLBACK_SECONDS = Histogram("pipeline_callback_seconds", "Latency of one callback POST attempt.", ("type",))
+CALLBACK_RETRIES = Counter("pipeline_callback_retries_total", "Callback POST attempts after the first.", ("type",))
+CALLBACK_FAILURES = Counter("pipeline_callback_failures_total", "Callback POST attempts that failed.", ("type",))
+
+
+@contextmanager
+def stage_timer(stage: str, files: int = 1):
+    """Time a stage and count the files it handled."""
+    with STAGE_SECONDS.time(stage=stage):
+        yield
+    STAGE_FILES.inc(files, stage=stage)
+
+
+def _reset_after_fork():
+    """Start a forked process at zero, since its parent's values are reported by the parent."""
+    global _server, _snapshot_name
+    _server = None
+    _snapshot_name = f"{os.getpid()}-{uuid.uuid4().hex[:12]}.json"
+    for metric in _registry.values():
+        metric.reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _label_key(metric: Counter | Histogram, labels: dict[str, str]) -> tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in metric.labelnames)
+
+
+def snapshot() -> dict[str, dict]:
+    """Return this process's metric values in a JSON-serializable form."""
+    return {name: metric.snapshot() for name, metric in _registry.items()}
+
+
+def write_snapshot():
+    """Write this process's values to METRICS_DIR; a no-op when it is unset."""
+    if not METRICS_DIR:
+        return
+
+    path = Path(METRICS_DIR)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+        temporary = path / f"{_snapshot_name}.tmp"
+        temporary.write_text(json.dumps(snapshot()))
+        os.replace(temporary, path / _snapshot_name)
+    except OSError as error:
+        logger.warning("Could not write metrics snapshot", extra={"path": METRICS_DIR, "error": str(error)})
+
+
+def clear_snapshots():
+    """Remove snapshots left by an earlier run of the worker, so counters start at zero."""
+    if METRICS_DIR and Path(METRICS_DIR).is_dir():
+        for file_path in Path(METRICS_DIR).glob("*.json"):
+            file_path.unlink(missing_ok=True)
+
+
+def collect() -> dict[str, dict]:
+    """Sum this process's live values with every other process's snapshot in METRICS_DIR."""
+    merged = snapshot()
+    if not METRICS_DIR or not Path(METRICS_DIR).is_dir():
+        return merged
+
+    for file_path in Path(METRICS_DIR).glob("*.json"):
+        if file_path.name == _snapshot_name:
+            continue
+        try:
+            values = json.loads(file_path.read_text())
+        except (OSError, ValueError):
+            continue
+
+        for name, series in values.items():
+            target = merged.setdefault(name, {})
+            for key, value in series.items():
+                if isinstance(value, list):
+                    current = target.get(key)
+                    target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target[key] = target.get(key, 0.0) + value
+    return merged
+
+
+def render(values: dict[str, dict] | None = None) -> str:
+    """Format metric values in the Prometheus text exposition format."""
+    values = collect() if values is None else values
+    lines: list[str] = []
+
+    for name, metric in _registry.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        for key, value in sorted(values.get(name, {}).items()):
+            labels = dict(zip(metric.labelnames, json.loads(key)))
+            if isinstance(metric, Counter):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+
+            cumulative = 0.0
+            for bound, count in zip((*metric.buckets, float("inf")), value[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve `/metrics` from a daemon thread; a no-op when the port is 0 or already serving."""
+    global _server
+    if port <= 0 or _server is not None:
+        return
+
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as error:
+        logger.error("Could not start metrics server", extra={"port": port, "error": str(error)})
+        return
+
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics", extra={"port": port})
+
+
+if __name__ == "__main__":
+    print(render(), end="")
@@ -0,0 +1,135 @@
+"""Registry of the heavy NLP models, loaded lazily or preloaded when a worker process starts.
+
+Importing the pipeline modules must stay cheap so Celery control commands and
+health pings don't load torch, spaCy, or scikit-learn. Each model is built by
+its own lazy getter. This module names those getters, preloads them with a
+warm-up inference at worker startup, and writes the ready file the container
+healthcheck waits for once the worker consumes.
+
+Run `python -m utils.model_registry` to measure a cold start.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from config import WORKER_READY_FILE
+
+logger = logging.getLogger(__name__)
+
+MODEL_LOADERS: dict[str, str] = {
+    "skills": "utils.skill_matcher:get_skill_matcher",
+    "spacy": "stages.parse:_get_nlp",
+    "lexical": "stages.score:_get_lexical_analyzer",
+    "lexical_idf": "stages.score:_get_corpus_idf",
+    "semantic": "stages.score:_get_semantic_model",
+}
+
+_WARM_UP_RESUME = """Jane Doe
+jane.doe@example.com
+
+Skills
+Python, SQL, Docker
+
+Experience
+Software Engineer, Example Corp
+Jan 2020 - Present
+Built data pipelines in Python.
+"""
+_WARM_UP_JOB = "Software engineer with 3+ years of Python and SQL experience."
+
+_ready = False
+_preload_timings: dict[str, float] = {}
+
+
+def get_model(name: str):
+    """Return a registered model, loading it on first use."""
+    module_name, getter = MODEL_LOADERS[name].split(":")
+    return getattr(importlib.import_module(module_name), getter)()
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def preload(warm_up: bool = True) -> dict[str, float]:
+    """Load every registered model and run one warm-up inference.
+
+    Returns the seconds spent on each model and on the warm-up. A model that
+    fails to load is logged and left to its stage's fallback. Once a process
+    has preloaded, later calls return the first call's timings without
+    loading or warming up again.
+    """
+    global _ready, _preload_timings
+
+    if _ready:
+        return _preload_timings
+
+    timings: dict[str, float] = {}
+    for name in MODEL_LOADERS:
+        started = time.perf_counter()
+        try:
+            get_model(name)
+        except Exception as error:
+            logger.error("Model preload failed", extra={"model": name, "error": str(error)})
+        timings[name] = round(time.perf_counter() - started, 3)
+
+    if warm_up:
+        started = time.perf_counter()
+        try:
+            _warm_up()
+        except Exception as error:
+            logger.error("Model warm-up failed", extra={"error": str(error)}, exc_info=True)
+        timings["warm_up"] = round(time.perf_counter() - started, 3)
+
+    _ready = True
+    _preload_timings = timings
+    logger.info("Pipeline models ready", extra={"pid": os.getpid(), "timings": timings})
+    return timings
+
+
+def _warm_up():
+    """Run one resume through parse and score so first-call allocations happen before real work."""
+    from stages.parse import parse_resume
+    from stages.score import build_job_context, score_lexical_batch, score_resume, score_semantic_batch
+
+    profile = parse_resume(_WARM_UP_RESUME)
+    job = build_job_context(_WARM_UP_JOB)
+    lexical_sim = score_lexical_batch([_WARM_UP_RESUME], job)[0]
+    semantic_sim = score_semantic_batch([_WARM_UP_RESUME], job)[0]
+    score_resume(_WARM_UP_RESUME, profile, job, lexical_sim=lexical_sim, semantic_sim=semantic_sim)
+
+
+def clear_ready_file():
+    """Remove a ready file left by an earlier worker, before this one starts its pool."""
+    if WORKER_READY_FILE:
+        Path(WORKER_READY_FILE).unlink(missing_ok=True)
+
+
+def write_ready_file():
+    """Mark the worker ready for the healthcheck, whether or not models were preloaded.
+
+    Called once from the main process when it starts consuming, so prefork
+    children starting or restarting later never touch the file.
+    """
+    if not WORKER_READY_FILE:
+        return
+
+    ready = {"pid": os.getpid(), "ready_at": time.time(), "preloaded": _ready, "timings": _preload_timings}
+    try:
+        Path(WORKER_READY_FILE).write_text(json.dumps(ready))
+    except OSError as error:
+        logger.warning("Could not write worker ready file", extra={"path": WORKER_READY_FILE, "error": str(error)})
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    import worker  # noqa: F401
+
+    import_seconds = round(time.perf_counter() - started, 3)
+    print(json.dumps({"import_worker": import_seconds, **preload()}))
@@ -0,0 +1,174 @@
+"""On-demand profiling of pipeline tasks, written as pstats and collapsed stacks.
+
+With PROFILE_DIR set, a task is profiled when it was sent with a truthy
+`profile` message header, or when it falls in the one-in-PROFILE_EVERY_N
+sample chosen from its task ID. A profiled task runs under a stack sampler,
+whose collapsed stacks (`<name>.collapsed`) feed flamegraph tools directly,
+and, unless PROFILE_MODE is `sample`, under cProfile too (`<name>.pstats`,
+read with `python -m pstats`). Only the newest PROFILE_MAX_FILES profiles are
+kept. With PROFILE_DIR unset, nothing is profiled and tasks run untouched.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from config import PROFILE_DIR, PROFILE_EVERY_N, PROFILE_MAX_FILES, PROFILE_MODE, PROFILE_SAMPLE_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+_active: dict[str, TaskProfile] = {}
+
+COLLAPSED_SUFFIX = ".collapsed"
+PSTATS_SUFFIX = ".pstats"
+
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class TaskProfile:
+    """The profilers attached to one running task."""
+
+    def __init__(self, task_id: str, task_name: str, session_id: str | None):
+        self.task_id = task_id
+        self.task_name = task_name
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        self.profiler = cProfile.Profile() if PROFILE_MODE != "sample" else None
+
+    def start(self):
+        self.sampler.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self) -> str:
+        """Stop profiling and write the profile files, returning their common name without suffix."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.sampler.stop()
+
+        path = Path(PROFILE_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+        milliseconds = int(self.started_at * 1000) % 1000
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at)) + f"{milliseconds:03d}"
+        stem = f"{stamp}-{_safe(self.session_id or 'unknown')}-{self.task_name}-{_safe(self.task_id)[:8]}"
+
+        (path / f"{stem}{COLLAPSED_SUFFIX}").write_text(self.sampler.collapsed(), encoding="utf-8")
+        if self.profiler is not None:
+            self.profiler.dump_stats(path / f"{stem}{PSTATS_SUFFIX}")
+        return stem
+
+
+def should_profile(task) -> bool:
+    """Decide from the task's `profile` header or its task ID whether to profile it."""
+    if not PROFILE_DIR:
+        return False
+
+    if profile_requested(task.request):
+        return True
+
+    if PROFILE_EVERY_N <= 0:
+        return False
+    task_id = task.request.id or ""
+    return int(hashlib.sha256(task_id.encode("utf-8")).hexdigest()[:8], 16) % PROFILE_EVERY_N == 0
+
+
+def profile_requested(request) -> bool:
+    """Whether the task was sent with a truthy `profile` header.
+
+    A worker exposes custom headers as request attributes; eager calls keep them in `request.headers`.
+    """
+    return bool(getattr(request, "profile", None) or (getattr(request, "headers", None) or {}).get("profile"))
+
+
+def start_task_profile(task, task_id: str, args, kwargs):
+    """Start profiling a task in its own thread, if it is selected; call from `task_prerun`."""
+    if not should_profile(task):
+        return
+
+    profile = TaskProfile(task_id, task.name.rsplit(".", 1)[-1], _session_id(args, kwargs))
+    _active[task_id] = profile
+    profile.start()
+
+
+def stop_task_profile(task_id: str):
+    """Stop and write the task's profile, if one is running; call from `task_postrun`."""
+    profile = _active.pop(task_id, None)
+    if profile is None:
+        return
+
+    try:
+        stem = profile.stop()
+        _prune(Path(PROFILE_DIR), PROFILE_MAX_FILES)
+    except OSError as error:
+        logger.warning("Could not write task profile", extra={"path": PROFILE_DIR, "error": str(error)})
+        return
+
+    logger.info(
+        "Wrote task profile",
+        extra={"session_id": profile.session_id, "task": profile.task_name, "profile": stem},
+    )
+
+
+def _session_id(args, kwargs) -> str | None:
+    # Every pipeline task carries a job payload dict among its arguments
+    for value in (*(args or ()), *(kwargs or {}).values()):
+        if isinstance(value, dict) and "session_id" in value:
+            return str(value["session_id"])
+    return None
+
+
+def _prune(directory: Path, max_profiles: int):
+    """Delete the oldest profiles beyond `max_profiles`, keeping each profile's files together."""
+    # Names start with the UTC start time, so they sort oldest first
+    stems = sorted(file_path.name[:-len(COLLAPSED_SUFFIX)] for file_path in directory.glob(f"*{COLLAPSED_SUFFIX}"))
+    for stem in stems[:max(0, len(stems) - max_profiles)]:
+        for suffix in (COLLAPSED_SUFFIX, PSTATS_SUFFIX):
+            (directory / f"{stem}{suffix}").unlink(missing_ok=True)
+
+
+def _safe(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", value)[:64]
+
+
+def _short_path(filename: str) -> str:
+    parts = Path(filename).parts
+    return "/".join(parts[-2:])
@@ -0,0 +1,293 @@
+"""Per-run checkpoints of finished work and a run lease, so redelivered sessions resume.
+
+With `acks_late`, a worker that dies mid-session leaves its message to be
+redelivered. The next delivery reads what the dead worker checkpointed and
+only processes the files that were left, while the lease keeps a concurrent
+duplicate delivery of the same run from processing it twice.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import CHECKPOINT_DIR, CHECKPOINT_MAX_AGE_SECONDS, RUN_LEASE_SECONDS
+from models import FileResult
+
+logger = logging.getLogger(__name__)
+
+_store: CheckpointStore | None = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    owner TEXT,
+    lease_expires_at REAL NOT NULL DEFAULT 0,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    raw_text TEXT NOT NULL,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, file_id)
+);
+CREATE INDEX IF NOT EXISTS runs_updated_at ON runs (updated_at);
+"""
+
+
+class RunLeaseHeldError(Exception):
+    """Another worker holds the run's lease."""
+
+    def __init__(self, run_id: str, owner: str, retry_after: float):
+        super().__init__(f"Run {run_id} is leased to {owner}")
+        self.owner = owner
+        self.retry_after = retry_after
+
+
+class RunLeaseLostError(Exception):
+    """Another worker took over or finished the run while this one was processing it."""
+
+    def __init__(self, run_id: str):
+        super().__init__(f"Lost the lease on run {run_id}")
+        self.run_id = run_id
+
+
+class RunLeaseUnconfirmedError(RunLeaseLostError):
+    """The lease lapsed and the store could not be read to tell whether this worker still holds it."""
+
+
+class RunLease:
+    """A run lease held by this worker, renewed in the background by `hold_run_lease`.
+
+    `lost` is set when a renewal finds another owner. A lease that is flagged
+    lost, or has gone unrenewed for its full duration (a stalled heartbeat or
+    a failing store), is re-checked against the store before the run gives up
+    on it: if nobody else took the run over, this worker keeps it.
+    """
+
+    def __init__(self, store: CheckpointStore, run_id: str, owner: str):
+        self.run_id = run_id
+        self.owner = owner
+        self.lease_seconds = store.lease_seconds
+        self.lost = threading.Event()
+        self._store = store
+        self._expires_at = time.monotonic() + store.lease_seconds
+
+    def renewed(self, renewed_at: float):
+        self._expires_at = renewed_at + self.lease_seconds
+
+    def check(self):
+        """Raise RunLeaseLostError once another worker holds the run, so it stops before sending anything.
+
+        Raises RunLeaseUnconfirmedError when the lease lapsed and ownership cannot be read.
+        """
+        if not self.lost.is_set() and time.monotonic() < self._expires_at:
+            return
+
+        started = time.monotonic()
+        try:
+            # An expired lease nobody else took is simply taken back
+            still_held = self._store.renew(self.run_id, self.owner) or self._store.acquire(self.run_id, self.owner)
+        except RunLeaseHeldError:
+            still_held = False
+        except sqlite3.Error as error:
+            raise RunLeaseUnconfirmedError(self.run_id) from error
+
+        if not still_held:
+            self.lost.set()
+            raise RunLeaseLostError(self.run_id)
+        self.lost.clear()
+        self.renewed(started)
+
+
+class CheckpointStore:
+    """SQLite-backed run leases and per-(run_id, file_id) checkpoints.
+
+    A file is checkpointed twice: with its extracted text once extraction
+    finishes, and with its `FileResult` once it is scored. A resumed run skips
+    both the download and extraction of the first kind and all work for the
+    second. The directory may be shared by every worker process on a host.
+    """
+
+    def __init__(self, directory: str | Path, lease_seconds: float = RUN_LEASE_SECONDS):
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        # The lease heartbeat writes from its own thread
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path / "checkpoints.sqlite3",
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._prune()
+
+    def acquire(self, run_id: str, owner: str) -> bool:
+        """Take the run's lease unless another owner holds an unexpired one.
+
+        Returns False when the run already finished. Raises RunLeaseHeldError when
+        another worker is processing it.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT owner, lease_expires_at, finished_at FROM runs WHERE run_id = ?", (run_id,)
+                ).fetchone()
+                if row is not None and row[2] is not None:
+                    self._db.execute("COMMIT")
+                    return False
+                if row is not None and row[0] != owner and row[1] > now:
+                    self._db.execute("COMMIT")
+                    raise RunLeaseHeldError(run_id, row[0], row[1] - now)
+
+                self._db.execute(
+                    "INSERT INTO runs (run_id, owner, lease_expires_at, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (run_id) DO UPDATE SET owner = excluded.owner, "
+                    "lease_expires_at = excluded.lease_expires_at, updated_at = excluded.updated_at",
+                    (run_id, owner, now + self.lease_seconds, now),
+                )
+                self._db.execute("COMMIT")
+            except RunLeaseHeldError:
+                raise
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+
+    def renew(self, run_id: str, owner: str) -> bool:
+        """Extend the lease; False means it was lost to another owner."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE runs SET lease_expires_at = ?, updated_at = ? WHERE run_id = ? AND owner = ?",
+                (now + self.lease_seconds, now, run_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, run_id: str, owner: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE runs SET lease_expires_at = 0, updated_at = ? WHERE run_id = ? AND owner = ?",
+                (time.time(), run_id, owner),
+            )
+
+    def finish(self, run_id: str, owner: str):
+        """Mark the run done and drop its checkpoints; later deliveries of it are skipped."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE runs SET finished_at = ?, lease_expires_at = 0, updated_at = ? "
+                    "WHERE run_id = ? AND owner = ?",
+                    (now, now, run_id, owner),
+                )
+                self._db.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def save_text(self, run_id: str, file_id: int, raw_text: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO checkpoints (run_id, file_id, raw_text, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (run_id, file_id) DO NOTHING",
+                (run_id, file_id, raw_text, time.time()),
+            )
+
+    def save_result(self, run_id: str, result: FileResult):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, file_id, raw_text, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, result.file_id, result.raw_text, result.model_dump_json(), time.time()),
+            )
+
+    def load(self, run_id: str) -> tuple[dict[int, str], dict[int, FileResult]]:
+        """Return the run's checkpointed texts of unscored files and its scored results, by file ID."""
+        texts: dict[int, str] = {}
+        results: dict[int, FileResult] = {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT file_id, raw_text, result FROM checkpoints WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        for file_id, raw_text, result in rows:
+            if result is None:
+                texts[file_id] = raw_text
+            else:
+                results[file_id] = FileResult.model_validate_json(result)
+        return texts, results
+
+    def _prune(self):
+        cutoff = time.time() - CHECKPOINT_MAX_AGE_SECONDS
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,)
+            )
+            self._db.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+
+
+@contextmanager
+def hold_run_lease(store: CheckpointStore, run_id: str, owner: str):
+    """Renew the run's lease in the background while the block runs, then release it.
+
+    Yields the RunLease, whose `check()` the block calls between files to stop
+    once another worker holds the run. The heartbeat keeps going after a failed
+    renewal, so a lease that `check()` takes back stays renewed.
+    """
+    lease = RunLease(store, run_id, owner)
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(store.lease_seconds / 3):
+            started = time.monotonic()
+            try:
+                if not store.renew(run_id, owner):
+                    if not lease.lost.is_set():
+                        logger.warning("Run lease lost", extra={"run_id": run_id, "owner": owner})
+                    lease.lost.set()
+                    continue
+            except sqlite3.Error as error:
+                logger.warning("Run lease renewal failed", extra={"run_id": run_id, "error": str(error)})
+                continue
+            lease.renewed(started)
+
+    thread = threading.Thread(target=heartbeat, name="run-lease", daemon=True)
+    thread.start()
+    try:
+        yield lease
+    finally:
+        stop.set()
+        thread.join()
+        store.release(run_id, owner)
+
+
+def lease_owner(task_id: str | None) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{task_id}"
+
+
+def get_checkpoint_store() -> CheckpointStore | None:
+    """Return the process-wide checkpoint store, or None when CHECKPOINT_DIR is unset."""
+    global _store
+    if not CHECKPOINT_DIR:
+        return None
+
+    if _store is None:
+        _store = CheckpointStore(CHECKPOINT_DIR)
+    return _store
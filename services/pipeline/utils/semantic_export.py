@@ -0,0 +1,51 @@
+"""Build a local SEMANTIC_MODEL_DIR with ONNX and int8-quantized ONNX copies of the semantic model.
+
+Usage:
+    python -m utils.semantic_export <output_dir> [arm64|avx2|avx512|avx512_vnni]
+
+This is the one step that needs network access (or a warm Hugging Face cache).
+Workers then load the directory with SEMANTIC_MODEL_DIR and SEMANTIC_BACKEND
+set to `onnx` or `onnx-int8`, without touching the network. Requires the
+optional `sentence-transformers[onnx]` dependencies.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from config import SEMANTIC_MODEL_NAME
+
+QUANTIZATION_FILES = {
+    "arm64": "onnx/model_qint8_arm64.onnx",
+    "avx2": "onnx/model_quint8_avx2.onnx",
+    "avx512": "onnx/model_qint8_avx512.onnx",
+    "avx512_vnni": "onnx/model_qint8_avx512_vnni.onnx",
+}
+
+
+def export(output_dir: str, quantization: str = "avx2") -> Path:
+    """Save the model's torch weights, `onnx/model.onnx`, and a dynamically quantized int8 variant.
+
+    Keeping the torch weights lets one directory serve every SEMANTIC_BACKEND.
+    """
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+
+    if quantization not in QUANTIZATION_FILES:
+        raise ValueError(f"Unknown quantization target {quantization!r}, expected one of {sorted(QUANTIZATION_FILES)}")
+
+    SentenceTransformer(SEMANTIC_MODEL_NAME).save_pretrained(output_dir)
+    model = SentenceTransformer(SEMANTIC_MODEL_NAME, backend="onnx")
+    model.save_pretrained(output_dir)
+    export_dynamic_quantized_onnx_model(model, quantization, output_dir)
+    return Path(output_dir) / QUANTIZATION_FILES[quantization]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    quantized_file = export(sys.argv[1], *sys.argv[2:3])
+    print(f"SEMANTIC_MODEL_DIR={sys.argv[1]}")
+    print(f"SEMANTIC_ONNX_FILE={quantized_file.relative_to(sys.argv[1])}")
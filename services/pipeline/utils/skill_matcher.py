@@ -0,0 +1,150 @@
+"""Single-pass skills taxonomy matcher shared by the parse and score stages."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SKILLS_TAXONOMY_PATH = Path(__file__).parent.parent / "data" / "skills_taxonomy.json"
+
+_matcher: SkillMatcher | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SkillHit:
+    """A single taxonomy match inside a scanned text."""
+
+    skill: str
+    start: int
+    end: int
+    text: str
+    section: str | None = None
+
+
+class SkillMatcher:
+    """Find every taxonomy skill in a text with one compiled regex scan.
+
+    The taxonomy is folded into a character trie and compiled into a single
+    lookahead alternation, so each text position is tried once against the
+    trie instead of once per skill. Matches keep the `\\b<skill>\\b` semantics
+    of the per-skill patterns they replace, including overlapping hits such
+    as "spring" inside "spring boot".
+    """
+
+    def __init__(self, skills: list[str]):
+        self.skills: frozenset[str] = frozenset(s.lower() for s in skills if s and s.strip())
+        self.digest = hashlib.sha256("\n".join(sorted(self.skills)).encode("utf-8")).hexdigest()[:16]
+        trie = _build_trie(self.skills)
+        self._pattern = _compile_trie_pattern(trie) if self.skills else None
+        # Shorter taxonomy entries that are prefixes of a longer one, so a single
+        # longest match at a position can still report every overlapping skill.
+        self._prefixes = _trie_prefixes(trie)
+
+    def __bool__(self) -> bool:
+        return bool(self.skills)
+
+    def find_all(self, text: str, section: str | None = None) -> list[SkillHit]:
+        """Return every skill occurrence in `text`, ordered by position."""
+        if self._pattern is None or not text:
+            return []
+
+        hits: list[SkillHit] = []
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            matched = match.group(1)
+            skill = matched.lower()
+            if skill not in self.skills:
+                continue
+
+            for prefix in self._prefixes[skill]:
+                end = start + len(prefix)
+                if _is_boundary(text, end):
+                    hits.append(SkillHit(prefix, start, end, text[start:end], section))
+            hits.append(SkillHit(skill, start, start + len(matched), matched, section))
+
+        return hits
+
+    def first_hits(self, text: str, section: str | None = None) -> dict[str, SkillHit]:
+        """Return the first occurrence of each skill found in `text`."""
+        first: dict[str, SkillHit] = {}
+        for hit in self.find_all(text, section):
+            first.setdefault(hit.skill, hit)
+        return first
+
+    def skills_in(self, text: str) -> set[str]:
+        """Return the set of canonical (lowercase) skills mentioned in `text`."""
+        return {hit.skill for hit in self.find_all(text)}
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Lazily build the process-wide matcher from the skills taxonomy."""
+    global _matcher
+    if _matcher is None:
+        _matcher = SkillMatcher(_load_taxonomy())
+    return _matcher
+
+
+def _load_taxonomy() -> list[str]:
+    if not SKILLS_TAXONOMY_PATH.exists():
+        logger.error("Skills taxonomy file not found", extra={"path": str(SKILLS_TAXONOMY_PATH)})
+        return []
+
+    with open(SKILLS_TAXONOMY_PATH) as f:
+        return json.load(f)
+
+
+def _build_trie(skills: frozenset[str]) -> dict:
+    trie: dict = {}
+    for skill in skills:
+        node = trie
+        for char in skill:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return trie
+
+
+def _trie_prefixes(trie: dict) -> dict[str, tuple[str, ...]]:
+    """Map each skill to the skills ending on its path through the trie, shortest first."""
+    prefixes: dict[str, tuple[str, ...]] = {}
+    stack: list[tuple[dict, str, tuple[str, ...]]] = [(trie, "", ())]
+    while stack:
+        node, path, above = stack.pop()
+        if "" in node:
+            prefixes[path] = above
+            above = (*above, path)
+        stack.extend((child, path + char, above) for char, child in node.items() if char)
+    return prefixes
+
+
+def _compile_trie_pattern(trie: dict) -> re.Pattern[str]:
+    # Zero-width lookahead so finditer tries every position, letting hits overlap.
+    return re.compile(r"(?=\b(" + _trie_to_regex(trie) + r")\b)", re.IGNORECASE)
+
+
+def _trie_to_regex(node: dict) -> str:
+    terminal = "" in node
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        # Greedy optional: prefer the longer skill, backtrack to this one if the boundary fails.
+        return "(?:" + body + ")?"
+    return body
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
@@ -2,24 +2,41 @@
 
 from __future__ import annotations
 
+import contextvars
+import functools
 import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
 
-import boto3
+from config import STORAGE_PREFETCH_CONCURRENCY, STORAGE_PREFETCH_MAX_BYTES
+from utils.metrics import DOCUMENT_BYTES, STAGE_FILES, STAGE_SECONDS, stage_timer
+from utils.tracing import span
 
 _bucket = os.environ.get("R2_BUCKET_NAME")
 _client = None
 
 
 def _get_s3_client():
-    """Lazily initialize the S3 client for R2."""
+    """Lazily initialize the S3 client for R2.
+
+    The client is shared by prefetch threads, so its connection pool is sized
+    to the prefetch concurrency.
+    """
     global _client
     if _client is None:
+        import boto3
+        from botocore.config import Config
+
         _client = boto3.client(
             "s3",
             endpoint_url=os.environ["R2_ENDPOINT_URL"],
             aws_access_key_id=os.environ["R2_ACCESS_KEY_ID"],
             aws_secret_access_key=os.environ["R2_SECRET_ACCESS_KEY"],
             region_name="auto",
+            config=Config(max_pool_connections=max(10, STORAGE_PREFETCH_CONCURRENCY)),
         )
     return _client
 
@@ -47,7 +64,156 @@ def fetch_file(storage_key: str):
     client = _get_s3_client()
     bucket = _get_bucket()
 
-    response = client.get_object(Bucket=bucket, Key=storage_key)
-    data = response["Body"].read()
+    with stage_timer("fetch"):
+        response = client.get_object(Bucket=bucket, Key=storage_key)
+        data = response["Body"].read()
+    DOCUMENT_BYTES.observe(len(data))
 
     return data
+
+
+class FetchedFile(NamedTuple):
+    """A prefetched object. `data` is None when the object still matches a known ETag."""
+
+    data: bytes | None
+    etag: str | None
+
+
+class FilePrefetcher:
+    """Download a session's files concurrently while earlier files are being processed.
+
+    Iterating yields one future per storage key, in input order. At most
+    `concurrency` downloads run at once, and downloads ahead of the consumer
+    stop once `max_buffered_bytes` of unconsumed data is held in memory. The
+    next file the consumer needs is always allowed through, so one oversized
+    object cannot stall the session.
+
+    When `etags` holds a previously seen ETag for a key, the download is
+    conditional and an unchanged object comes back with `data=None`.
+
+    A yielded future is dropped once the consumer moves on, so its bytes are
+    freed with the consumer's last reference. A consumer that hands the bytes
+    elsewhere (e.g. to a process pool's task queue) calls `hold()` to keep
+    them counted until the returned release callable runs.
+
+    Usage:
+        with FilePrefetcher(keys) as prefetcher:
+            for future in prefetcher:
+                fetched = future.result()  # re-raises the download error, if any
+    """
+
+    def __init__(
+        self,
+        storage_keys: list[str],
+        concurrency: int = STORAGE_PREFETCH_CONCURRENCY,
+        max_buffered_bytes: int = STORAGE_PREFETCH_MAX_BYTES,
+        etags: dict[str, str] | None = None,
+    ):
+        self._storage_keys = storage_keys
+        self._etags = etags or {}
+        self._budget = _ByteBudget(max_buffered_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="r2-prefetch")
+        self._futures: list[Future[FetchedFile] | None] = []
+        self._current = -1
+        self._held: set[int] = set()
+
+    def __enter__(self):
+        # Each download runs in the caller's context, so its trace span nests under the session
+        self._futures = [
+            self._executor.submit(contextvars.copy_context().run, self._download, index, storage_key)
+            for index, storage_key in enumerate(self._storage_keys)
+        ]
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self) -> Iterator[Future[FetchedFile]]:
+        for index in range(len(self._futures)):
+            future, self._futures[index] = self._futures[index], None
+            self._current = index
+            yield future
+            del future
+            self._budget.advance(index)
+            if index not in self._held:
+                self._budget.release(index)
+
+    def hold(self) -> Callable[[], None]:
+        """Keep the current file's bytes counted against the budget until the returned callable runs."""
+        index = self._current
+        self._held.add(index)
+        return functools.partial(self._budget.release, index)
+
+    def close(self):
+        """Cancel pending downloads and wake any thread waiting for buffer space."""
+        self._budget.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _download(self, index: int, storage_key: str) -> FetchedFile:
+        with span("fetch", storage_key=storage_key) as current:
+            fetched = self._download_object(index, storage_key)
+            current.set(bytes=len(fetched.data) if fetched.data is not None else 0, not_modified=fetched.data is None)
+            return fetched
+
+    def _download_object(self, index: int, storage_key: str) -> FetchedFile:
+        from botocore.exceptions import ClientError
+
+        client = _get_s3_client()
+        known_etag = self._etags.get(storage_key)
+        conditional = {"IfNoneMatch": known_etag} if known_etag else {}
+
+        started = time.perf_counter()
+        try:
+            response = client.get_object(Bucket=_get_bucket(), Key=storage_key, **conditional)
+        except ClientError as error:
+            if known_etag and error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304:
+                return FetchedFile(data=None, etag=known_etag)
+            raise
+
+        # Waiting for buffer space is backpressure from the consumer, not download time
+        requested = time.perf_counter() - started
+        self._budget.reserve(index, int(response.get("ContentLength") or 0))
+        started = time.perf_counter()
+        data = response["Body"].read()
+        STAGE_SECONDS.observe(requested + time.perf_counter() - started, stage="fetch")
+        STAGE_FILES.inc(stage="fetch")
+        DOCUMENT_BYTES.observe(len(data))
+        return FetchedFile(data=data, etag=response.get("ETag"))
+
+
+class _ByteBudget:
+    """Bound the bytes downloaded ahead of the consumer, never blocking the head file."""
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._used = 0
+        self._head = 0
+        self._held: dict[int, int] = {}
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def reserve(self, index: int, size: int):
+        with self._condition:
+            while not self._closed and index != self._head and self._used + size > self._limit:
+                self._condition.wait()
+            if self._closed:
+                raise RuntimeError("File prefetcher was closed")
+            self._used += size
+            self._held[index] = size
+
+    def advance(self, index: int):
+        """Mark `index` consumed, letting the next file through regardless of the limit."""
+        with self._condition:
+            self._head = index + 1
+            self._condition.notify_all()
+
+    def release(self, index: int):
+        """Return the bytes held for `index`; safe to call more than once."""
+        with self._condition:
+            self._used -= self._held.pop(index, 0)
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,263 @@
+"""Sampled trace spans for sessions, files, stages, and their sub-steps, written as JSONL.
+
+Spans nest session -> file -> stage -> sub-step and follow the OpenTelemetry
+span shape (trace and span IDs, parent, start and end in Unix nanoseconds,
+attributes, status). Every task of a run derives the same trace ID from the
+run ID, so fanned-out subtasks land in one trace, and the sampling decision is
+made from that ID. With TRACE_DIR unset or TRACE_SAMPLE_RATE at 0, spans are
+no-ops.
+
+Each process appends to its own `spans-<pid>.jsonl` in TRACE_DIR, rotated at
+TRACE_MAX_BYTES. Summarize the files with:
+    python -m utils.tracing <trace_dir> [top_n]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import logging.handlers
+import math
+import os
+import secrets
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from config import TRACE_BACKUP_COUNT, TRACE_DIR, TRACE_MAX_BYTES, TRACE_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+_writer: logging.Logger | None = None
+
+SERVICE_NAME = "resumemo-pipeline"
+
+
+class Span:
+    """One timed operation in a sampled trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "start_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_span_id: str | None, name: str, attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, end_ns: int) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "attributes": self.attributes,
+            "status": (
+                {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {"code": "STATUS_CODE_OK"}
+            ),
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def tracing_enabled() -> bool:
+    return bool(TRACE_DIR) and TRACE_SAMPLE_RATE > 0
+
+
+@contextmanager
+def trace(name: str, run_id: str, **attributes):
+    """Open a root span for a task of `run_id`, if the run is sampled; `run_id` is recorded as an attribute."""
+    if not tracing_enabled():
+        yield _NOOP_SPAN
+        return
+
+    trace_id = hashlib.sha256(run_id.encode("utf-8")).hexdigest()[:32]
+    if int(trace_id[:8], 16) / 0x100000000 >= TRACE_SAMPLE_RATE:
+        yield _NOOP_SPAN
+        return
+
+    with _open_span(trace_id, None, name, {"run_id": run_id, **attributes}) as root:
+        yield root
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a child of the current span; a no-op outside a sampled trace."""
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+
+    with _open_span(parent.trace_id, parent.span_id, name, attributes) as child:
+        yield child
+
+
+def current_span() -> Span | _NoopSpan:
+    """Return the innermost open span, to add attributes to it."""
+    return _current.get() or _NOOP_SPAN
+
+
+def current_context() -> tuple[str, str] | None:
+    """Return the current (trace_id, span_id), for handing to another process."""
+    current = _current.get()
+    return (current.trace_id, current.span_id) if current is not None else None
+
+
+@contextmanager
+def attach(context: tuple[str, str] | None, name: str, **attributes):
+    """Open a span under a parent from another process, as returned by `current_context`."""
+    if context is None or not tracing_enabled():
+        yield _NOOP_SPAN
+        return
+
+    trace_id, parent_span_id = context
+    with _open_span(trace_id, parent_span_id, name, attributes) as child:
+        yield child
+
+
+@contextmanager
+def _open_span(trace_id: str, parent_span_id: str | None, name: str, attributes: dict):
+    current = Span(trace_id, parent_span_id, name, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as error:
+        current.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        _current.reset(token)
+        _write(current.to_dict(time.time_ns()))
+
+
+def _write(record: dict):
+    try:
+        _get_writer().info(json.dumps(record, default=str))
+    except Exception as error:
+        logger.warning("Could not write trace span", extra={"error": str(error)})
+
+
+def _get_writer() -> logging.Logger:
+    """Return a logger that appends to this process's rotating span file."""
+    global _writer
+    if _writer is None:
+        Path(TRACE_DIR).mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            Path(TRACE_DIR) / f"spans-{os.getpid()}.jsonl",
+            maxBytes=TRACE_MAX_BYTES,
+            backupCount=TRACE_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        writer = logging.getLogger(f"{__name__}.spans.{os.getpid()}")
+        writer.handlers = [handler]
+        writer.setLevel(logging.INFO)
+        writer.propagate = False
+        _writer = writer
+    return _writer
+
+
+def _reset_after_fork():
+    # A forked child writes its own file
+    global _writer
+    _writer = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def load_spans(trace_dir: str | Path) -> list[dict]:
+    """Read every span in a trace directory, including rotated files."""
+    spans: list[dict] = []
+    for file_path in sorted(Path(trace_dir).glob("spans-*.jsonl*")):
+        with open(file_path, encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+
+def report(spans: list[dict], top_n: int = 10) -> dict:
+    """Aggregate spans into per-name duration percentiles and the slowest sessions.
+
+    A session lasts from the earliest start to the latest end of any span in
+    its trace, so a fanned-out session covers its `session.files` and
+    `session.aggregate` tasks and not just the dispatch.
+    """
+    durations: dict[str, list[float]] = defaultdict(list)
+    traces: dict[str, list[dict]] = defaultdict(list)
+
+    for record in spans:
+        milliseconds = (record["end_time_unix_nano"] - record["start_time_unix_nano"]) / 1e6
+        durations[record["name"]].append(milliseconds)
+        traces[record["trace_id"]].append(record)
+
+    sessions = [_session_summary(trace_id, records) for trace_id, records in traces.items()]
+
+    stages = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        stages[name] = {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 0.50), 2),
+            "p90_ms": round(_percentile(values, 0.90), 2),
+            "p99_ms": round(_percentile(values, 0.99), 2),
+            "max_ms": round(values[-1], 2),
+            "total_ms": round(sum(values), 1),
+        }
+
+    sessions.sort(key=lambda session: session["duration_ms"], reverse=True)
+    return {"spans": len(spans), "stages": stages, "slowest_sessions": sessions[:top_n]}
+
+
+def _session_summary(trace_id: str, records: list[dict]) -> dict:
+    roots = [record for record in records if record.get("parent_span_id") is None]
+    # Prefer the `session` root, which carries the full file count and the mode
+    root = min(roots or records, key=lambda record: (record["name"] != "session", record["start_time_unix_nano"]))
+    attributes = root.get("attributes", {})
+    started = min(record["start_time_unix_nano"] for record in records)
+    ended = max(record["end_time_unix_nano"] for record in records)
+    return {
+        "trace_id": trace_id,
+        "session_id": attributes.get("session_id"),
+        "run_id": attributes.get("run_id"),
+        "files": attributes.get("files"),
+        "mode": attributes.get("mode"),
+        "tasks": len(roots),
+        "duration_ms": round((ended - started) / 1e6, 1),
+    }
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(json.dumps(report(load_spans(sys.argv[1]), top), indent=2))
@@ -2,32 +2,159 @@
 Celery application and task definitions for the Resumemo profiling pipeline.
 
 Start the worker with:
-    celery -A worker worker --loglevel=info --queues=profiling.jobs --pool=solo --concurrency=1
+    celery -A worker worker --loglevel=info --pool=solo --concurrency=1
+
+The worker consumes the queues listed in CELERY_QUEUES (see celeryconfig.py).
 """
 
 # Load .env before any project imports that read os.environ at module level
 from dotenv import load_dotenv
 load_dotenv()
 
+import gc
 import logging
+import multiprocessing
+import sqlite3
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import AsyncResult, Pool
+
+from celery import Celery, chord
+from celery.exceptions import ChordError, SoftTimeLimitExceeded
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_ready
 
-from celery import Celery
-from celery.exceptions import SoftTimeLimitExceeded
+from celeryconfig import LANE_QUEUE_MAX_PRIORITY
 
-from utils.callback import send_completion, send_error
-from stages.extract import extract_text
-from models import FileManifestItem, JobPayload, FileResult
-from stages.parse import parse_resume
-from stages.score import score_resume
-from utils.storage import fetch_file
+from config import (
+    DOCUMENT_CACHE_ETAG_LOOKUP,
+    FILE_TASK_MAX_RETRIES,
+    FILE_TASK_SOFT_TIME_LIMIT_SECONDS,
+    MODEL_PRELOAD,
+    PIPELINE_VERSION,
+    SESSION_FANOUT_CHUNK_SIZE,
+    SESSION_FANOUT_MIN_FILES,
+    SESSION_PROCESS_WORKERS,
+)
+from utils.callback import ResultBatcher, send_completion, send_error, start_outbox_sender
+from stages.extract import extract_text, extractor_fingerprint
+from models import FileManifestItem, JobPayload, FileResult, ParsedDocument
+from stages.parse import _get_nlp, parse_resume, parse_resumes, parser_fingerprint
+from stages.score import (
+    JobContext,
+    build_job_context,
+    job_context_from_dict,
+    job_context_to_dict,
+    score_lexical_batch,
+    score_resume,
+    score_semantic_batch,
+)
+from utils.skill_matcher import get_skill_matcher
+from utils.document_cache import DocumentCache, content_hash, get_document_cache
+from utils.model_registry import clear_ready_file, preload, write_ready_file
+from utils.metrics import (
+    DOCUMENT_CHARS,
+    QUEUE_WAIT_SECONDS,
+    SESSION_FILES,
+    SESSION_SECONDS,
+    SESSIONS,
+    clear_snapshots,
+    stage_timer,
+    start_metrics_server,
+    write_snapshot,
+)
+from utils.profiling import profile_requested, start_task_profile, stop_task_profile
+from utils.tracing import attach, current_context, span, trace
+from utils.run_checkpoint import (
+    CheckpointStore,
+    RunLease,
+    RunLeaseHeldError,
+    RunLeaseLostError,
+    RunLeaseUnconfirmedError,
+    get_checkpoint_store,
+    hold_run_lease,
+    lease_owner,
+)
+from utils.storage import FilePrefetcher, fetch_file
 from stages.summarize import summarize_candidate
 
 logger = logging.getLogger(__name__)
+_file_pool: Pool | None = None
 
 app = Celery("pipeline")
 app.config_from_object("celeryconfig")
 
 
+@worker_init.connect
+def _preload_models_in_worker(sender=None, **kwargs):
+    """Load and warm the models before consuming when tasks run in worker threads.
+
+    The threads pool sends no `worker_process_init`; prefork children and the
+    solo pool (whose constructor sends it) preload in `_preload_models_in_child`.
+    """
+    pool = getattr(sender, "pool_cls", None)
+    pool_name = pool if isinstance(pool, str) else getattr(pool, "__module__", "")
+    if MODEL_PRELOAD and "threads" in (pool_name or ""):
+        preload()
+
+
+@worker_process_init.connect
+def _preload_models_in_child(**kwargs):
+    if MODEL_PRELOAD:
+        preload()
+
+
+@worker_process_init.connect
+def _start_file_pool(**kwargs):
+    """Fork the intra-session pool at startup, after the models load and before `worker_ready` starts threads.
+
+    Only the solo pool sends this in the main process; prefork children cannot fork a pool of their own.
+    """
+    if multiprocessing.parent_process() is None:
+        _get_file_pool()
+
+
+@worker_init.connect
+def _clear_ready_file(**kwargs):
+    clear_ready_file()
+
+
+@worker_ready.connect
+def _signal_ready(**kwargs):
+    """Write the healthcheck's ready file once the worker consumes, after any preloading above."""
+    write_ready_file()
+
+
+@worker_ready.connect
+def _drain_callback_outbox(**kwargs):
+    """Resume delivering callbacks queued before the last worker restart."""
+    start_outbox_sender()
+
+
+@worker_init.connect
+def _reset_metrics(**kwargs):
+    clear_snapshots()
+
+
+@worker_ready.connect
+def _serve_metrics(**kwargs):
+    start_metrics_server()
+
+
+@task_postrun.connect
+def _publish_metrics(**kwargs):
+    write_snapshot()
+
+
+@task_prerun.connect
+def _start_profile(task_id=None, task=None, args=None, kwargs=None, **extra):
+    start_task_profile(task, task_id, args, kwargs)
+
+
+@task_postrun.connect
+def _stop_profile(task_id=None, **kwargs):
+    stop_task_profile(task_id)
+
+
 @app.task(
     name="pipeline.process_session",
     bind=True,
@@ -39,47 +166,255 @@ def process_session(self, raw_payload: dict):
     """Process all resumes in a profiling session.
 
     Fetches files from R2, runs extract -> parse -> score -> summarize,
-    and POSTs results back to the Elysia API via HTTP callback.
+    and POSTs results back to the Elysia API via HTTP callback. Large
+    sessions are instead fanned out to `process_files` subtasks and
+    finished by `aggregate_session`.
+
+    With CHECKPOINT_DIR set, the run is leased to this worker and each file's
+    progress is checkpointed, so a redelivery resumes where it stopped. A
+    worker whose run is taken over stops between files without sending
+    anything, leaving the run to the new holder; one whose lease lapsed
+    without a takeover takes it back and carries on.
     """
     payload = JobPayload.model_validate(raw_payload)
+    _observe_session_start(self, payload)
 
-    results: list[dict] = []
-    errors: list[dict] = []
+    checkpoints = get_checkpoint_store()
+    if checkpoints is None:
+        _run_session(self, payload)
+        return
 
+    owner = lease_owner(self.request.id)
     try:
-        for file in payload.files:
-            try:
-                result = _process_single_file(file, payload)
-                results.append(result)
-            except Exception as e:
-                logger.error(
-                    "Failed to process file",
-                    extra={
-                        "session_id": payload.session_id,
-                        "file_id": file.file_id,
-                        "original_name": file.original_name,
-                        "error": str(e),
-                    },
-                    exc_info=True,
+        if not checkpoints.acquire(payload.run_id, owner):
+            logger.info(
+                "Run already finished, skipping redelivery",
+                extra={"session_id": payload.session_id, "run_id": payload.run_id},
+            )
+            return
+    except RunLeaseHeldError as held:
+        # No retry cap: the holder either finishes the run or dies and its lease expires
+        logger.info(
+            "Run is leased to another worker, retrying later",
+            extra={"session_id": payload.session_id, "run_id": payload.run_id, "owner": held.owner},
+        )
+        raise self.retry(countdown=max(1, round(held.retry_after)), max_retries=self.request.retries + 1)
+
+    with hold_run_lease(checkpoints, payload.run_id, owner) as lease:
+        try:
+            _run_session(self, payload, checkpoints, lease)
+        except RunLeaseUnconfirmedError as error:
+            # Nothing was sent; a redelivery resumes from the checkpoints under a fresh lease
+            logger.warning(
+                "Run lease could not be confirmed, retrying the run",
+                extra={"session_id": payload.session_id, "run_id": payload.run_id, "error": str(error.__cause__)},
+            )
+            raise self.retry(exc=error)
+        except RunLeaseLostError:
+            logger.warning(
+                "Run lease lost, leaving the run to its new holder",
+                extra={"session_id": payload.session_id, "run_id": payload.run_id, "owner": owner},
+            )
+            return
+        checkpoints.finish(payload.run_id, owner)
+
+
+def _observe_session_start(task, payload: JobPayload):
+    SESSION_FILES.observe(len(payload.files))
+
+    # Set by the API publisher; absent on retries and Python-side sends
+    published_at = getattr(task.request, "published_at", None)
+    if isinstance(published_at, (int, float)) and not task.request.retries:
+        queue = (task.request.delivery_info or {}).get("routing_key") or ""
+        QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - published_at), queue=queue)
+
+
+def _run_session(
+    task,
+    payload: JobPayload,
+    checkpoints: CheckpointStore | None = None,
+    lease: RunLease | None = None,
+):
+    results = ResultBatcher(payload)
+    errors: list[dict] = []
+
+    with (
+        trace("session", payload.run_id, session_id=payload.session_id, files=len(payload.files)) as root,
+        _reporting_failures(payload, results),
+    ):
+        if _should_fan_out(payload):
+            root.set(mode="fan_out")
+            with SESSION_SECONDS.time(mode="fan_out_dispatch"):
+                _fan_out(
+                    payload,
+                    build_job_context(payload.job_description),
+                    queue=(task.request.delivery_info or {}).get("routing_key"),
+                    profile=profile_requested(task.request),
                 )
-                errors.append({
-                    "file_id": file.file_id,
-                    "original_name": file.original_name,
-                    "error": str(e),
-                })
-
-        # All files processed — send completion or error
-        if results or not errors:
-            send_completion(payload=payload, results=results)
-        else:
-            # Every single file failed
-            send_error(
-                payload=payload,
-                error=f"All {len(errors)} files failed processing",
-                partial_results=[],
+            return
+
+        started = time.perf_counter()
+
+        restored_texts, restored_results = checkpoints.load(payload.run_id) if checkpoints else ({}, {})
+        if restored_texts or restored_results:
+            logger.info(
+                "Resuming run from checkpoints",
+                extra={
+                    "session_id": payload.session_id,
+                    "run_id": payload.run_id,
+                    "extracted": len(restored_texts),
+                    "scored": len(restored_results),
+                },
             )
+        for file in payload.files:
+            if file.file_id in restored_results:
+                results.add(restored_results[file.file_id])
+        remaining_files = [file for file in payload.files if file.file_id not in restored_results]
+        remaining = payload.model_copy(update={"files": remaining_files})
+        root.set(mode="inline", restored_texts=len(restored_texts), restored_results=len(restored_results))
+
+        job = build_job_context(payload.job_description)
+
+        # Stages 1-2 per file, so every resume text is known before embedding
+        documents = _extract_and_parse_all(remaining, errors, checkpoints, restored_texts, lease)
+
+        # Stages 3-4, then completion or error
+        _score_documents(
+            job,
+            documents,
+            results,
+            errors,
+            payload,
+            context_texts=[result.raw_text for result in restored_results.values()],
+            checkpoints=checkpoints,
+            lease=lease,
+        )
+        if lease is not None:
+            lease.check()
+        _send_outcome(payload, results, errors)
+        SESSION_SECONDS.observe(time.perf_counter() - started, mode="inline")
+
+
+@app.task(
+    name="pipeline.process_files",
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(SoftTimeLimitExceeded,),
+    retry_backoff=True,
+    max_retries=FILE_TASK_MAX_RETRIES,
+)
+def process_files(self, raw_payload: dict, raw_job: dict | None = None):
+    """Extract, parse, and embed one chunk of a fanned-out session.
+
+    Returns the parsed documents and their semantic similarities for
+    `aggregate_session`. Failed files are reported as errors rather than
+    raised, so one bad resume never fails the chord. `raw_job` is the job
+    context `process_session` built once for the whole session.
+    """
+    payload = JobPayload.model_validate(raw_payload)
+    errors: list[dict] = []
+
+    try:
+        with trace("session.files", payload.run_id, session_id=payload.session_id, files=len(payload.files)):
+            documents = _extract_and_parse_all(payload, errors)
+            job = job_context_from_dict(raw_job) if raw_job else build_job_context(payload.job_description)
+            with _stage("score_semantic", files=len(documents)):
+                semantic_scores = score_semantic_batch([document.raw_text for document in documents], job)
+    except SoftTimeLimitExceeded:
+        logger.error(
+            "File task timed out",
+            extra={"session_id": payload.session_id, "file_ids": [file.file_id for file in payload.files]},
+        )
+        failed = {error["file_id"] for error in errors}
+        errors.extend(
+            {
+                "file_id": file.file_id,
+                "original_name": file.original_name,
+                "error": "File processing exceeded time limit",
+            }
+            for file in payload.files
+            if file.file_id not in failed
+        )
+        documents, semantic_scores = [], []
+
+    return {
+        "documents": [document.model_dump(mode="json") for document in documents],
+        "semantic_scores": semantic_scores,
+        "errors": errors,
+    }
+
+
+@app.task(
+    name="pipeline.aggregate_session",
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def aggregate_session(self, chunk_results: list[dict], raw_payload: dict, raw_job: dict | None = None):
+    """Score and summarize a fanned-out session's documents in manifest order, then send its callbacks.
+
+    The subtasks already computed the semantic similarities, so the job
+    context here never carries the JD embedding.
+    """
+    payload = JobPayload.model_validate(raw_payload)
+
+    results = ResultBatcher(payload)
+    errors: list[dict] = []
+    documents: list[ParsedDocument] = []
+    semantic_scores: list[float] = []
+
+    with (
+        trace("session.aggregate", payload.run_id, session_id=payload.session_id, files=len(payload.files)),
+        _reporting_failures(payload, results),
+        SESSION_SECONDS.time(mode="fan_out_aggregate"),
+    ):
+        # Chord results arrive in header order, which is manifest order
+        for chunk in chunk_results:
+            documents.extend(ParsedDocument.model_validate(document) for document in chunk["documents"])
+            semantic_scores.extend(chunk["semantic_scores"])
+            errors.extend(chunk["errors"])
+
+        job = job_context_from_dict(raw_job) if raw_job else build_job_context(payload.job_description, embed=False)
+        _score_documents(job, documents, results, errors, payload, semantic_scores=semantic_scores)
+        _send_outcome(payload, results, errors)
+
+
+@app.task(name="pipeline.fail_session")
+def fail_session(request, exc, traceback, raw_payload: dict):
+    """Send the error callback when a fanned-out session's subtask fails for good.
+
+    Linked as the chord's error callback. Failures of `aggregate_session`
+    itself are reported by that task, so only chord errors are handled here.
+
+    The callback carries no results: chunks that did finish hold only parsed
+    documents and semantic scores, and files are scored and summarized in
+    the aggregator, which never runs once a subtask has failed.
+    """
+    if not isinstance(exc, ChordError):
+        return
+
+    payload = JobPayload.model_validate(raw_payload)
+    logger.error(
+        "Fanned-out session failed",
+        extra={"session_id": payload.session_id, "error": str(exc)},
+    )
+    send_error(payload=payload, error=f"File subtask failed: {exc}", partial_results=[])
+
+
+@contextmanager
+def _reporting_failures(payload: JobPayload, results: ResultBatcher):
+    """Send an error callback with the results so far when a session task times out or crashes."""
+    try:
+        yield
+
+    except RunLeaseLostError:
+        # The run's new holder reports it
+        raise
 
     except SoftTimeLimitExceeded:
+        SESSIONS.inc(outcome="timed_out")
         logger.error(
             "Pipeline job timed out",
             extra={"session_id": payload.session_id},
@@ -87,11 +422,13 @@ def process_session(self, raw_payload: dict):
         send_error(
             payload=payload,
             error="Pipeline job exceeded time limit",
-            partial_results=results,
+            partial_results=results.pending,
+            total_results=results.total_results,
         )
         raise
 
     except Exception as e:
+        SESSIONS.inc(outcome="crashed")
         logger.error(
             "Pipeline job failed",
             extra={
@@ -103,16 +440,413 @@ def process_session(self, raw_payload: dict):
         send_error(
             payload=payload,
             error=str(e),
-            partial_results=results,
+            partial_results=results.pending,
+            total_results=results.total_results,
         )
         raise
-def _process_single_file(file: FileManifestItem, payload: JobPayload):
-    """Run the full pipeline on a single resume file."""
-    # Stage 1: Fetch and extract text
-    file_bytes = fetch_file(file.storage_key)
-    raw_text = extract_text(file_bytes, file.original_name)
 
-    if not raw_text.strip():
+
+def _should_fan_out(payload: JobPayload):
+    if SESSION_FANOUT_MIN_FILES <= 0 or len(payload.files) < SESSION_FANOUT_MIN_FILES:
+        return False
+
+    if not app.conf.result_backend:
+        logger.warning(
+            "Session fan-out needs CELERY_RESULT_BACKEND, processing inline",
+            extra={"session_id": payload.session_id},
+        )
+        return False
+
+    return True
+
+
+def _fan_out(payload: JobPayload, job: JobContext, queue: str | None = None, profile: bool = False):
+    """Dispatch one `process_files` subtask per chunk of files, joined by `aggregate_session`.
+
+    Every subtask gets the session's job context, so the JD is encoded and
+    matched against the skills taxonomy once rather than once per chunk.
+
+    Subtasks stay in the session's queue lane at top priority, so a session
+    already started finishes before the lane's next session begins. A session
+    sent with the `profile` header passes it on, so its subtasks are profiled too.
+    """
+    chunk_size = max(1, SESSION_FANOUT_CHUNK_SIZE)
+    raw_payload = payload.model_dump()
+    raw_job = job_context_to_dict(job)
+    options = {"queue": queue, "priority": LANE_QUEUE_MAX_PRIORITY} if queue else {}
+    if profile:
+        options["headers"] = {"profile": True}
+
+    header = []
+    for start in range(0, len(payload.files), chunk_size):
+        files = payload.files[start:start + chunk_size]
+        soft_time_limit = FILE_TASK_SOFT_TIME_LIMIT_SECONDS * len(files)
+        chunk_payload = payload.model_copy(update={"files": files}).model_dump()
+        header.append(
+            process_files.si(chunk_payload, raw_job).set(
+                soft_time_limit=soft_time_limit,
+                time_limit=soft_time_limit + 60,
+                **options,
+            )
+        )
+
+    aggregate = aggregate_session.s(raw_payload, job_context_to_dict(job, embed=False))
+    callback = aggregate.set(**options).on_error(fail_session.s(raw_payload))
+    chord(header)(callback)
+
+    logger.info(
+        "Fanned out session",
+        extra={"session_id": payload.session_id, "files": len(payload.files), "subtasks": len(header)},
+    )
+
+
+def _score_documents(
+    job: JobContext,
+    documents: list[ParsedDocument],
+    results: ResultBatcher,
+    errors: list[dict],
+    payload: JobPayload,
+    semantic_scores: list[float] | None = None,
+    context_texts: list[str] | None = None,
+    checkpoints: CheckpointStore | None = None,
+    lease: RunLease | None = None,
+):
+    """Run stages 3-4 for parsed documents, adding each FileResult to `results`.
+
+    Semantic similarity is computed here unless `semantic_scores` was already
+    computed by the fanned-out subtasks. `context_texts` are resumes of the
+    session scored earlier, which still count towards the session IDF.
+    """
+    # Lexical similarity for the whole session in one pass, so every resume shares one IDF
+    resume_texts = [document.raw_text for document in documents]
+    with _stage("score_lexical", files=len(resume_texts), context_documents=len(context_texts or [])):
+        lexical_scores = score_lexical_batch(resume_texts + (context_texts or []), job)[:len(resume_texts)]
+
+    # Semantic similarity in one batched pass, or per result batch when partial callbacks are on
+    chunk_size = results.batch_size if results.enabled else max(1, len(documents))
+    for start in range(0, len(documents), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        if semantic_scores is None:
+            with _stage("score_semantic", files=len(resume_texts[chunk])):
+                chunk_semantic_scores = score_semantic_batch(resume_texts[chunk], job)
+        else:
+            chunk_semantic_scores = semantic_scores[chunk]
+
+        for document, lexical_sim, semantic_sim in zip(documents[chunk], lexical_scores[chunk], chunk_semantic_scores):
+            if lease is not None:
+                lease.check()
+            try:
+                with span("file.score", file_id=document.file.file_id, chars=len(document.raw_text)):
+                    result = _score_and_summarize(document, job, lexical_sim, semantic_sim)
+            except Exception as e:
+                _record_file_error(payload, document.file, e, errors)
+                continue
+
+            if checkpoints is not None:
+                _save_checkpoint(payload, checkpoints.save_result, result)
+            results.add(result)
+
+
+def _send_outcome(payload: JobPayload, results: ResultBatcher, errors: list[dict]):
+    """Send the completion callback, or an error callback when every file failed.
+
+    The outcome is counted once the callback is sent (or queued), so a failed
+    send is counted only as `crashed`, by `_reporting_failures`.
+    """
+    if results.total or not errors:
+        send_completion(payload=payload, results=results.pending, total_results=results.total_results)
+        SESSIONS.inc(outcome="completed")
+    else:
+        # Every single file failed
+        send_error(
+            payload=payload,
+            error=f"All {len(errors)} files failed processing",
+            partial_results=[],
+        )
+        SESSIONS.inc(outcome="failed")
+
+
+def _extract_and_parse_all(
+    payload: JobPayload,
+    errors: list[dict],
+    checkpoints: CheckpointStore | None = None,
+    restored_texts: dict[int, str] | None = None,
+    lease: RunLease | None = None,
+):
+    """Run stages 1-2 for every file, returning parsed documents in manifest order.
+
+    Downloads of upcoming files overlap with extraction. Files already in the
+    document cache skip extraction and parsing (and, with ETag lookup, the
+    download too), as do files whose text was checkpointed by an earlier
+    delivery of the run. Inline, the remaining texts are then parsed in one
+    batched spaCy pass. When SESSION_PROCESS_WORKERS > 1, extraction and
+    parsing are instead spread per file across a local process pool.
+    """
+    pool = _get_file_pool()
+    cache = _open_document_cache(payload)
+    restored_texts = restored_texts or {}
+
+    slots: list[ParsedDocument | None] = [None] * len(payload.files)
+    origins: dict[int, tuple[str, str | None]] = {}
+    extracted: list[tuple[int, str]] = []
+    submitted: list[tuple[int, AsyncResult]] = []
+
+    fetch_indices: list[int] = []
+    for index, file in enumerate(payload.files):
+        if file.file_id in restored_texts:
+            extracted.append((index, restored_texts[file.file_id]))
+        else:
+            fetch_indices.append(index)
+
+    storage_keys = [payload.files[index].storage_key for index in fetch_indices]
+    etags: dict[str, str] = {}
+    if cache is not None and DOCUMENT_CACHE_ETAG_LOOKUP:
+        etags = _read_document_cache(payload, cache.known_etags, storage_keys) or {}
+
+    try:
+        with FilePrefetcher(storage_keys, etags=etags) as prefetcher:
+            for index, fetched in zip(fetch_indices, prefetcher):
+                file = payload.files[index]
+                if lease is not None:
+                    lease.check()
+                try:
+                    with span("file.extract", file_id=file.file_id) as file_span:
+                        fetched_file = fetched.result()
+                        file_bytes = fetched_file.data
+                        cached = None
+
+                        if file_bytes is None:
+                            # Unchanged since a cached run; download anyway if the document was evicted since
+                            cached = _read_document_cache(
+                                payload, cache.get_by_object, file.storage_key, fetched_file.etag
+                            )
+                            if cached is None:
+                                file_bytes = fetch_file(file.storage_key)
+                        if cached is None and cache is not None:
+                            digest = content_hash(file_bytes)
+                            origins[index] = (digest, fetched_file.etag)
+                            cached = _read_document_cache(payload, cache.get, digest)
+
+                        file_span.set(bytes=len(file_bytes) if file_bytes is not None else 0, cached=cached is not None)
+                        if cached is not None:
+                            raw_text, profile = cached
+                            slots[index] = ParsedDocument(file=file, raw_text=raw_text, profile=profile)
+                        elif pool is None:
+                            raw_text = _extract(file, file_bytes)
+                            if checkpoints is not None:
+                                _save_checkpoint(payload, checkpoints.save_text, file.file_id, raw_text)
+                            extracted.append((index, raw_text))
+                        else:
+                            # The bytes wait in the pool's task queue until a child takes them
+                            release = prefetcher.hold()
+                            async_result = pool.apply_async(
+                                _extract_and_parse,
+                                (file, file_bytes, current_context()),
+                                callback=lambda _, release=release: release(),
+                                error_callback=lambda _, release=release: release(),
+                            )
+                            submitted.append((index, async_result))
+                except Exception as e:
+                    _record_file_error(payload, file, e, errors)
+
+        for index, async_result in submitted:
+            if lease is not None:
+                lease.check()
+            try:
+                document = async_result.get()
+                slots[index] = document
+                if checkpoints is not None:
+                    _save_checkpoint(payload, checkpoints.save_text, document.file.file_id, document.raw_text)
+            except Exception as e:
+                _record_file_error(payload, payload.files[index], e, errors)
+    except BaseException:
+        # A timeout or crash mid-session leaves stale tasks queued in the pool
+        if pool is not None:
+            _terminate_file_pool()
+        raise
+
+    if extracted:
+        for index, document in _parse_extracted(payload, extracted, errors):
+            slots[index] = document
+
+    if cache is not None:
+        _store_in_document_cache(payload, cache, slots, origins)
+
+    return [document for document in slots if document is not None]
+
+
+def _open_document_cache(payload: JobPayload) -> DocumentCache | None:
+    """Open the document cache for this pipeline version; a cache that cannot open is skipped."""
+    try:
+        return get_document_cache(f"{PIPELINE_VERSION}:{extractor_fingerprint()}:{parser_fingerprint()}")
+    except Exception as e:
+        logger.warning("Document cache unavailable", extra={"session_id": payload.session_id, "error": str(e)})
+        return None
+
+
+def _read_document_cache(payload: JobPayload, read, *args):
+    """Read from the document cache; a cache failure is a miss, never a failed file."""
+    try:
+        return read(*args)
+    except Exception as e:
+        logger.warning("Document cache read failed", extra={"session_id": payload.session_id, "error": str(e)})
+        return None
+
+
+def _store_in_document_cache(
+    payload: JobPayload,
+    cache: DocumentCache,
+    slots: list[ParsedDocument | None],
+    origins: dict[int, tuple[str, str | None]],
+):
+    """Write freshly parsed documents to the cache; a cache failure never fails the session."""
+    try:
+        for index, (digest, etag) in origins.items():
+            document = slots[index]
+            if document is not None:
+                cache.put(digest, document.raw_text, document.profile, storage_key=document.file.storage_key, etag=etag)
+        logger.info("Document cache stats", extra={"session_id": payload.session_id, **cache.stats()})
+    except Exception as e:
+        logger.warning("Document cache write failed", extra={"session_id": payload.session_id, "error": str(e)})
+
+
+def _save_checkpoint(payload: JobPayload, save, *args):
+    """Write a run checkpoint; a checkpoint failure never fails the session."""
+    try:
+        save(payload.run_id, *args)
+    except sqlite3.Error as e:
+        logger.warning("Checkpoint write failed", extra={"session_id": payload.session_id, "error": str(e)})
+
+
+def _parse_extracted(payload: JobPayload, extracted: list[tuple[int, str]], errors: list[dict]):
+    """Parse extracted texts in one batch, falling back to per-file parsing to isolate failures.
+
+    Returns (manifest index, document) pairs; files that failed to parse are omitted.
+    """
+    parseable = [(index, raw_text) for index, raw_text in extracted if raw_text.strip()]
+
+    try:
+        with _stage("parse", files=len(parseable), chars=sum(len(raw_text) for _, raw_text in parseable)):
+            parsed = parse_resumes([raw_text for _, raw_text in parseable])
+            profiles = dict(zip((index for index, _ in parseable), parsed))
+    except Exception:
+        logger.warning("Batch parse failed, parsing files individually", extra={"session_id": payload.session_id})
+        profiles = {}
+        for index, raw_text in parseable:
+            try:
+                profiles[index] = parse_resume(raw_text)
+            except Exception as e:
+                _record_file_error(payload, payload.files[index], e, errors)
+
+    documents: list[tuple[int, ParsedDocument]] = []
+    for index, raw_text in extracted:
+        file = payload.files[index]
+        if not raw_text.strip():
+            documents.append((index, ParsedDocument(file=file, raw_text="", profile=None)))
+        elif index in profiles:
+            documents.append((index, ParsedDocument(file=file, raw_text=raw_text, profile=profiles[index])))
+
+    return documents
+
+
+def _get_file_pool():
+    """Lazily fork the intra-session process pool.
+
+    The pool only extracts and parses, so the spaCy pipeline and the skill
+    matcher are loaded and the heap frozen before forking, sharing them
+    copy-on-write with the children. `_start_file_pool` forks it before the
+    outbox sender and metrics server threads start. A pool re-forked after a
+    timeout forks alongside those threads; that is safe because the children
+    only use logging, metrics, and tracing besides the models, and all three
+    reset their locks or writers in the child at fork.
+    """
+    global _file_pool
+    if SESSION_PROCESS_WORKERS <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return None
+
+    if _file_pool is None:
+        _get_nlp()
+        get_skill_matcher()
+        gc.freeze()
+        _file_pool = multiprocessing.get_context("fork").Pool(processes=SESSION_PROCESS_WORKERS)
+        logger.info("Started intra-session process pool", extra={"processes": SESSION_PROCESS_WORKERS})
+
+    return _file_pool
+
+
+def _terminate_file_pool():
+    global _file_pool
+    if _file_pool is not None:
+        _file_pool.terminate()
+        _file_pool = None
+
+
+def _record_file_error(payload: JobPayload, file: FileManifestItem, error: Exception, errors: list[dict]):
+    logger.error(
+        "Failed to process file",
+        extra={
+            "session_id": payload.session_id,
+            "file_id": file.file_id,
+            "original_name": file.original_name,
+            "error": str(error),
+        },
+        exc_info=True,
+    )
+    errors.append({
+        "file_id": file.file_id,
+        "original_name": file.original_name,
+        "error": str(error),
+    })
+
+
+@contextmanager
+def _stage(name: str, files: int = 1, **attributes):
+    """Time a stage for the metrics and record it as a trace span."""
+    with stage_timer(name, files), span(name, **attributes) as current:
+        yield current
+
+
+def _extract(file: FileManifestItem, file_bytes: bytes) -> str:
+    with _stage("extract", bytes=len(file_bytes)) as current:
+        raw_text = extract_text(file_bytes, file.original_name)
+        current.set(chars=len(raw_text))
+    DOCUMENT_CHARS.observe(len(raw_text))
+    return raw_text
+
+
+def _extract_and_parse(file: FileManifestItem, file_bytes: bytes, trace_context: tuple[str, str] | None = None):
+    """Extract a fetched file's text and parse a structured profile.
+
+    `trace_context` parents this pool task's spans under the submitting file's span.
+    """
+    try:
+        with attach(trace_context, "file.pool", file_id=file.file_id):
+            # Stage 1: Extract text
+            raw_text = _extract(file, file_bytes)
+
+            if not raw_text.strip():
+                return ParsedDocument(file=file, raw_text="", profile=None)
+
+            # Stage 2: Parse structured data
+            with _stage("parse", chars=len(raw_text)):
+                profile = parse_resume(raw_text)
+            return ParsedDocument(file=file, raw_text=raw_text, profile=profile)
+    finally:
+        # Runs in a pool process, whose metrics only reach the endpoint through METRICS_DIR
+        write_snapshot()
+
+
+def _score_and_summarize(
+    document: ParsedDocument,
+    job: JobContext,
+    lexical_sim: float | None = None,
+    semantic_sim: float | None = None,
+):
+    """Score a parsed document and build its FileResult."""
+    file = document.file
+    profile = document.profile
+
+    if profile is None:
         return FileResult(
             file_id=file.file_id,
             candidate_name=None,
@@ -124,30 +858,31 @@ def _process_single_file(file: FileManifestItem, payload: JobPayload):
             score_breakdown={},
             summary="Could not extract text from this document.",
             skills_matched=[],
-        ).model_dump()
-
-    # Stage 2: Parse structured data
-    profile = parse_resume(raw_text)
+        )
 
     # Stage 3: Score against job description
-    scoring = score_resume(
-        raw_text=raw_text,
-        profile=profile,
-        job_description=payload.job_description,
-    )
+    with _stage("score"):
+        scoring = score_resume(
+            raw_text=document.raw_text,
+            profile=profile,
+            job=job,
+            lexical_sim=lexical_sim,
+            semantic_sim=semantic_sim,
+        )
 
     # Stage 4: Generate summary
-    summary = summarize_candidate(profile=profile, scoring=scoring)
+    with _stage("summarize"):
+        summary = summarize_candidate(profile=profile, scoring=scoring)
 
     return FileResult(
         file_id=file.file_id,
         candidate_name=profile.name,
         candidate_email=profile.email,
         candidate_phone=profile.phone,
-        raw_text=raw_text,
+        raw_text=document.raw_text,
         parsed_profile=profile.model_dump(),
         overall_score=scoring.overall_score,
         score_breakdown=scoring.model_dump()["breakdown"],
         summary=summary,
         skills_matched=scoring.get_matched_skills(),
-    ).model_dump()
+    )